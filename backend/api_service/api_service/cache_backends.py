@@ -0,0 +1,351 @@
+"""
+Two-tier cache backend: a bounded in-process LRU (L1) in front of Redis (L2).
+
+Reads are served from L1 when possible and fall back to Redis, filling L1.
+Writes go to Redis, evict the key from L1 and publish the key on a Redis
+pub/sub channel; every worker process subscribes to the channel and evicts
+the keys written by other processes. L1 entries also expire after
+L1_TIMEOUT seconds, which bounds staleness if an invalidation is missed
+(e.g. while a worker reconnects to Redis). L1 is bypassed while a worker
+is not subscribed.
+
+L1 keeps values pickled, so every read returns a new object, as Redis does.
+Keys starting with an L1_EXCLUDE prefix (locks, counters) always go to
+Redis.
+
+Hits and misses of both tiers are counted per process and added to a Redis
+hash every STATS_INTERVAL seconds; tier_stats() reports the totals.
+
+Configured in CACHES like RedisCache, with additional OPTIONS:
+
+    L1_MAX_ENTRIES        Entries kept per process (default 256)
+    L1_TIMEOUT            Seconds an entry is kept in L1 (default 5)
+    L1_EXCLUDE            Key prefixes never kept in L1
+    INVALIDATION_CHANNEL  Pub/sub channel of written keys
+    STATS_INTERVAL        Seconds between flushes of the tier counts
+"""
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.redis import RedisCache
+
+logger = logging.getLogger(__name__)
+
+STATS = ('l1_hits', 'l1_misses', 'l2_hits', 'l2_misses')
+
+# Message clearing every L1 entry
+CLEAR_ALL = '*'
+
+# Seconds before subscribing again after a failed subscription
+SUBSCRIBE_RETRY_INTERVAL = 30
+
+_missing = object()
+
+
+class LocalTier:
+    """
+    In-process LRU of pickled values with a per-entry expiry, shared by the
+    threads of a process, and its subscription to invalidations.
+    """
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._subscriber = None
+        self._retry_at = 0
+        self.origin = None
+        self.stats = dict.fromkeys(STATS, 0)
+        self.next_flush = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _missing
+            expires_at, data = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return _missing
+            self._entries.move_to_end(key)
+        return pickle.loads(data)
+
+    def set(self, key, value, timeout=None):
+        if timeout is not None and timeout <= 0:
+            self.delete([key])
+            return
+        expires_at = time.monotonic() + min(self.timeout, timeout or self.timeout)
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._entries[key] = (expires_at, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def count(self, stat, n=1):
+        with self._lock:
+            self.stats[stat] += n
+
+    def take_stats(self):
+        with self._lock:
+            stats, self.stats = self.stats, dict.fromkeys(STATS, 0)
+        return stats
+
+    def subscribed(self, get_client, channel):
+        """
+        Whether this process receives invalidations, subscribing if needed.
+        """
+        pid = os.getpid()
+        if self._pid == pid:
+            return True
+
+        if time.monotonic() < self._retry_at:
+            return False
+
+        with self._lock:
+            if self._pid == pid:
+                return True
+            # Entries and counts inherited from a parent process are not ours
+            self._entries.clear()
+            self.stats = dict.fromkeys(STATS, 0)
+            try:
+                pubsub = get_client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{channel: self._on_message})
+                self._subscriber = pubsub.run_in_thread(
+                    sleep_time=1.0, daemon=True, exception_handler=self._on_error
+                )
+            except Exception as e:
+                logger.warning(f"L1 cache disabled, cannot subscribe to invalidations: {str(e)}")
+                self._retry_at = time.monotonic() + SUBSCRIBE_RETRY_INTERVAL
+                return False
+            self.origin = f'{pid}:{uuid.uuid4().hex}'
+            self._pid = pid
+        return True
+
+    def _on_message(self, message):
+        origin, _, keys = message['data'].decode('utf-8').partition('|')
+        if origin == self.origin:
+            return
+        if keys == CLEAR_ALL:
+            self.clear()
+        else:
+            self.delete(keys.split('\n'))
+
+    def _on_error(self, error, pubsub, thread):
+        logger.warning(f"L1 cache invalidation subscription lost: {str(error)}")
+        thread.stop()
+        with self._lock:
+            # Resubscribe on next use; invalidations may have been missed meanwhile
+            self._pid = None
+            self._entries.clear()
+
+
+# Local tiers by location and channel, shared by the backend instances of
+# all threads of a process
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class TwoTierRedisCache(RedisCache):
+    """
+    RedisCache with an in-process L1 cache invalidated through pub/sub.
+    """
+    def __init__(self, server, params):
+        options = dict(params.get('OPTIONS', {}))
+        max_entries = options.pop('L1_MAX_ENTRIES', 256)
+        timeout = options.pop('L1_TIMEOUT', 5)
+        self._l1_exclude = tuple(options.pop('L1_EXCLUDE', ()))
+        self._channel = options.pop('INVALIDATION_CHANNEL', 'cache_invalidation')
+        self._stats_interval = options.pop('STATS_INTERVAL', 60)
+        super().__init__(server, {**params, 'OPTIONS': options})
+
+        tier_key = (tuple(self._servers), self._channel)
+        with _tiers_lock:
+            if tier_key not in _tiers:
+                _tiers[tier_key] = LocalTier(max_entries, timeout)
+            self._l1 = _tiers[tier_key]
+
+        self._stats_key = f'{self._channel}:stats'
+
+    def _l1_key(self, key):
+        """
+        Whether a key is ever kept in L1.
+        """
+        return not key.startswith(self._l1_exclude)
+
+    def _l1_enabled(self, key):
+        """
+        Whether a key may be read from and kept in L1 now.
+        """
+        return self._l1_key(key) and self._l1.subscribed(self._cache.get_client, self._channel)
+
+    def _invalidate(self, keys, version=None):
+        """
+        Evict written keys from L1 in this and other processes.
+
+        Returns:
+            dict: {key: cache key} of the keys kept in L1
+        """
+        cache_keys = {
+            key: self.make_and_validate_key(key, version=version)
+            for key in keys if self._l1_key(key)
+        }
+        if cache_keys:
+            self._l1.delete(cache_keys.values())
+            message = '\n'.join(cache_keys.values())
+            self._cache.get_client().publish(self._channel, f'{self._l1.origin}|{message}')
+        return cache_keys
+
+    def _count(self, stat, n=1):
+        if not n:
+            return
+        self._l1.count(stat, n)
+        if time.monotonic() >= self._l1.next_flush:
+            self._l1.next_flush = time.monotonic() + self._stats_interval
+            self.flush_stats()
+
+    def flush_stats(self):
+        """
+        Add this process's tier counts to the shared totals.
+        """
+        stats = self._l1.take_stats()
+        if not any(stats.values()):
+            return
+        pipeline = self._cache.get_client().pipeline(transaction=False)
+        for stat, n in stats.items():
+            if n:
+                pipeline.hincrby(self._stats_key, stat, n)
+        pipeline.execute()
+
+    def tier_stats(self):
+        """
+        Hits, misses and hit rate of each tier, over all processes.
+
+        Returns:
+            dict: {'l1': {'hits', 'misses', 'hit_rate'}, 'l2': {...}}; hit_rate
+                is None for a tier that was not read
+        """
+        self.flush_stats()
+        totals = {
+            stat.decode('utf-8'): int(n)
+            for stat, n in self._cache.get_client(write=False).hgetall(self._stats_key).items()
+        }
+        stats = {}
+        for tier in ('l1', 'l2'):
+            hits = totals.get(f'{tier}_hits', 0)
+            misses = totals.get(f'{tier}_misses', 0)
+            stats[tier] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / (hits + misses) if hits + misses else None,
+            }
+        return stats
+
+    def reset_tier_stats(self):
+        self._l1.take_stats()
+        self._cache.get_client().delete(self._stats_key)
+
+    def get(self, key, default=None, version=None):
+        l1_enabled = self._l1_enabled(key)
+        cache_key = self.make_and_validate_key(key, version=version)
+        if l1_enabled:
+            value = self._l1.get(cache_key)
+            if value is not _missing:
+                self._count('l1_hits')
+                return value
+            self._count('l1_misses')
+
+        value = self._cache.get(cache_key, _missing)
+        if value is _missing:
+            self._count('l2_misses')
+            return default
+        self._count('l2_hits')
+        if l1_enabled:
+            self._l1.set(cache_key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        l1_keys = {cache_key for cache_key, key in key_map.items() if self._l1_enabled(key)}
+
+        found = {}
+        for cache_key in l1_keys:
+            value = self._l1.get(cache_key)
+            if value is not _missing:
+                found[cache_key] = value
+        self._count('l1_hits', len(found))
+        self._count('l1_misses', len(l1_keys) - len(found))
+
+        remaining = [cache_key for cache_key in key_map if cache_key not in found]
+        if remaining:
+            fetched = self._cache.get_many(remaining)
+            self._count('l2_hits', len(fetched))
+            self._count('l2_misses', len(remaining) - len(fetched))
+            for cache_key, value in fetched.items():
+                if cache_key in l1_keys:
+                    self._l1.set(cache_key, value)
+            found.update(fetched)
+
+        return {key_map[cache_key]: value for cache_key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        super().set(key, value, timeout, version)
+        cache_keys = self._invalidate([key], version)
+        if cache_keys and self._l1_enabled(key):
+            self._l1.set(cache_keys[key], value, self.get_backend_timeout(timeout))
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        result = super().set_many(data, timeout, version)
+        cache_keys = self._invalidate(data, version)
+        backend_timeout = self.get_backend_timeout(timeout)
+        for key, cache_key in cache_keys.items():
+            if self._l1_enabled(key):
+                self._l1.set(cache_key, data[key], backend_timeout)
+        return result
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = super().add(key, value, timeout, version)
+        if added:
+            self._invalidate([key], version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        touched = super().touch(key, timeout, version)
+        self._invalidate([key], version)
+        return touched
+
+    def incr(self, key, delta=1, version=None):
+        value = super().incr(key, delta, version)
+        self._invalidate([key], version)
+        return value
+
+    def delete(self, key, version=None):
+        deleted = super().delete(key, version)
+        self._invalidate([key], version)
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        super().delete_many(keys, version)
+        self._invalidate(keys, version)
+
+    def clear(self):
+        cleared = super().clear()
+        self._l1.clear()
+        self._cache.get_client().publish(self._channel, f'{self._l1.origin}|{CLEAR_ALL}')
+        return cleared
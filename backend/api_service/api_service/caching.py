@@ -0,0 +1,260 @@
+"""
+Response caching keyed on dataset versions.
+
+Responses are cached like cache_page caches them, but the key prefix of each
+endpoint includes the dataset version counters the request depends on (see
+indicators/versions.py). A load bumps the counters of the indicators, regions
+and sectors it touched, so the next request for data it changed misses and is
+recomputed, while cached responses for untouched data stay valid. Timeouts in
+CACHE_TTL therefore only bound how long unused entries are kept.
+
+Misses are filled single-flight: the first request to miss takes a lock in
+the cache, shared by all workers, and computes the response, while concurrent
+requests for it wait for the response to be stored. Endpoints cached with
+stale_while_revalidate also keep their latest response under a key without
+versions, and serve it to those concurrent requests instead of waiting. Stale
+responses are not given an ETag, so clients fetch them again.
+
+Hits, stale hits and misses are counted per endpoint in each process and
+added to the counts in the cache every stats_interval seconds, in one
+pipeline on Redis; the cache_stats management command reports the hit ratios.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.redis import RedisCache
+from django.utils.cache import get_cache_key, learn_cache_key
+
+from api_service.indicators.versions import request_versions, versions_digest
+
+# Default timeout of endpoints without a CACHE_TTL entry
+DEFAULT_TTL = 60 * 60 * 24
+
+# Endpoints wrapped in versioned_cache, for hit ratio reports
+CACHED_ENDPOINTS = []
+
+OUTCOMES = ('hits', 'stale', 'misses')
+
+# Counts of this process not yet added to the cache, by stats key
+_counts = Counter()
+_counts_lock = threading.Lock()
+_next_flush = 0
+
+
+def cache_config():
+    """
+    Response cache settings.
+    """
+    return getattr(settings, 'RESPONSE_CACHE', {})
+
+
+def _stats_key(endpoint, outcome):
+    return f'cache_stats:{endpoint}:{outcome}'
+
+
+def _count(endpoint, outcome):
+    """
+    Count a cache hit or miss of an endpoint.
+    """
+    global _next_flush
+    with _counts_lock:
+        _counts[_stats_key(endpoint, outcome)] += 1
+        flush = time.monotonic() >= _next_flush
+        if flush:
+            _next_flush = time.monotonic() + cache_config().get('stats_interval', 60)
+    if flush:
+        flush_cache_stats()
+
+
+def flush_cache_stats():
+    """
+    Add this process's endpoint counts to the shared counts in the cache.
+    """
+    global _counts
+    with _counts_lock:
+        counts, _counts = _counts, Counter()
+    if not counts:
+        return
+
+    backend = caches[DEFAULT_CACHE_ALIAS]
+    if isinstance(backend, RedisCache):
+        # Counts are stored as plain integers, so INCRBY keeps them readable
+        pipeline = backend._cache.get_client(write=True).pipeline(transaction=False)
+        for key, n in counts.items():
+            pipeline.incrby(backend.make_and_validate_key(key), n)
+        pipeline.execute()
+        return
+
+    for key, n in counts.items():
+        try:
+            cache.incr(key, n)
+        except ValueError:
+            # First count of the endpoint; another worker may have added it meanwhile
+            if not cache.add(key, n, None):
+                cache.incr(key, n)
+
+
+def cache_stats(endpoints=None):
+    """
+    Hits, stale hits, misses and hit ratio of cached endpoints.
+
+    Returns:
+        dict: {endpoint: {'hits', 'stale', 'misses', 'hit_ratio'}}; stale hits
+            count as hits in hit_ratio, which is None for endpoints not
+            requested yet
+    """
+    endpoints = endpoints or CACHED_ENDPOINTS
+    flush_cache_stats()
+    counts = cache.get_many([
+        _stats_key(endpoint, outcome) for endpoint in endpoints for outcome in OUTCOMES
+    ])
+
+    stats = {}
+    for endpoint in endpoints:
+        stats[endpoint] = {outcome: counts.get(_stats_key(endpoint, outcome), 0) for outcome in OUTCOMES}
+        total = sum(stats[endpoint].values())
+        served = total - stats[endpoint]['misses']
+        stats[endpoint]['hit_ratio'] = served / total if total else None
+    return stats
+
+
+def reset_cache_stats(endpoints=None):
+    """
+    Clear the hit and miss counts of cached endpoints.
+    """
+    keys = [
+        _stats_key(endpoint, outcome)
+        for endpoint in endpoints or CACHED_ENDPOINTS for outcome in OUTCOMES
+    ]
+    with _counts_lock:
+        for key in keys:
+            _counts.pop(key, None)
+    cache.delete_many(keys)
+
+
+def _cached_response(request, key_prefix):
+    """
+    Response cached for a request under a key prefix, or None.
+    """
+    cache_key = get_cache_key(request, key_prefix, 'GET', cache=cache)
+    if cache_key is None:
+        return None
+    return cache.get(cache_key)
+
+
+def _lock_key(request, key_prefix):
+    """
+    Key of the lock held while a request's response is computed.
+    """
+    url = hashlib.md5(request.build_absolute_uri().encode('ascii')).hexdigest()
+    return f'cache_fill:{key_prefix}:{url}'
+
+
+def _wait_for_fill(request, key_prefix, lock_key):
+    """
+    Wait for the request holding the lock to store the response.
+
+    Returns:
+        HttpResponse: The stored response, or None if the lock was released
+            without one or the wait timed out
+    """
+    config = cache_config()
+    deadline = time.monotonic() + config.get('wait_timeout', 10)
+    poll_interval = config.get('poll_interval', 0.05)
+
+    while time.monotonic() < deadline:
+        time.sleep(poll_interval)
+        response = _cached_response(request, key_prefix)
+        if response is not None:
+            return response
+        if cache.get(lock_key) is None:
+            return None
+    return None
+
+
+def versioned_cache(endpoint, ttl, stale_while_revalidate=False):
+    """
+    Cache the responses of a viewset method under keys that include the
+    dataset versions of the request, filling misses single-flight.
+
+    Only complete 200 responses to GET and HEAD requests are cached; streamed
+    responses are not.
+
+    Args:
+        endpoint: Endpoint name used in cache keys and hit ratio reports
+        ttl: CACHE_TTL entry holding the timeout
+        stale_while_revalidate: Serve the previous response to requests
+            arriving while a miss is being filled, instead of waiting
+    """
+    CACHED_ENDPOINTS.append(endpoint)
+    stale_prefix = f'{endpoint}:stale'
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_method(self, request, *args, **kwargs)
+
+            config = cache_config()
+            timeout = getattr(settings, 'CACHE_TTL', {}).get(ttl, DEFAULT_TTL)
+            key_prefix = f'{endpoint}:{versions_digest(request_versions(request))}'
+
+            response = _cached_response(request, key_prefix)
+            if response is not None:
+                _count(endpoint, 'hits')
+                return response
+
+            lock_key = _lock_key(request, key_prefix)
+            if not cache.add(lock_key, 1, config.get('lock_timeout', 30)):
+                # Another request is computing this response
+                if stale_while_revalidate:
+                    response = _cached_response(request, stale_prefix)
+                    if response is not None:
+                        _count(endpoint, 'stale')
+                        response.dataset_stale = True
+                        return response
+
+                response = _wait_for_fill(request, key_prefix, lock_key)
+                if response is not None:
+                    _count(endpoint, 'hits')
+                    return response
+                # Compute without the lock, which belongs to the other request
+                lock_key = None
+
+            _count(endpoint, 'misses')
+            try:
+                response = view_method(self, request, *args, **kwargs)
+            except Exception:
+                if lock_key:
+                    cache.delete(lock_key)
+                raise
+
+            if response.status_code != 200 or response.streaming:
+                if lock_key:
+                    cache.delete(lock_key)
+                return response
+
+            def store(rendered):
+                # The Vary header of the rendered response decides the key
+                cache.set(learn_cache_key(request, rendered, timeout, key_prefix, cache), rendered, timeout)
+                if stale_while_revalidate:
+                    stale_timeout = config.get('stale_timeout', timeout)
+                    cache.set(
+                        learn_cache_key(request, rendered, stale_timeout, stale_prefix, cache),
+                        rendered, stale_timeout
+                    )
+                if lock_key:
+                    cache.delete(lock_key)
+
+            if hasattr(response, 'render') and callable(response.render) and not response.is_rendered:
+                response.add_post_render_callback(store)
+            else:
+                store(response)
+            return response
+        return wrapper
+    return decorator
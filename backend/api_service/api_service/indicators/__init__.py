@@ -1 +1 @@
-
+from . import checks  # noqa: F401 (registers the system checks)
@@ -0,0 +1,93 @@
+"""
+Set-based computation of previous_value and change_percent.
+
+IndicatorValue.save() only derives change_percent when the caller has already
+filled in previous_value, and bulk writes skip save() entirely. The functions
+here derive both fields for whole series with a LAG() window over
+(indicator, region, sector) ordered by date, and write back only the rows
+whose stored values differ.
+"""
+import logging
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import Lag
+
+from .models import Indicator, IndicatorValue
+
+logger = logging.getLogger(__name__)
+
+# Number of series combined into a single windowed query
+SERIES_PER_QUERY = 200
+
+
+def compute_change_percent(value, previous_value):
+    """
+    Percentage change between two values, matching IndicatorValue.save().
+    """
+    if previous_value is None or previous_value == 0:
+        return None
+    return ((value - previous_value) / previous_value) * 100
+
+
+def _series_filters(series_keys=None, indicator_ids=None):
+    """
+    Build one filter per query, each covering a group of series.
+    """
+    if series_keys is None:
+        if indicator_ids is None:
+            indicator_ids = Indicator.objects.values_list('id', flat=True)
+        # A full recompute works one indicator at a time to bound memory
+        return [Q(indicator_id=indicator_id) for indicator_id in indicator_ids]
+
+    series_keys = list(series_keys)
+    filters = []
+    for start in range(0, len(series_keys), SERIES_PER_QUERY):
+        filters.append(reduce(or_, (
+            Q(indicator_id=indicator_id, region_id=region_id, sector_id=sector_id)
+            for indicator_id, region_id, sector_id in series_keys[start:start + SERIES_PER_QUERY]
+        )))
+    return filters
+
+
+def recompute_changes(series_keys=None, indicator_ids=None, batch_size=5000):
+    """
+    Recompute previous_value and change_percent for a set of series.
+
+    Args:
+        series_keys: (indicator_id, region_id, sector_id) tuples to recompute,
+            or None for every series
+        indicator_ids: Restrict a full recompute to these indicators
+        batch_size: Rows per bulk_update statement
+
+    Returns:
+        int: Number of rows updated
+    """
+    updated = 0
+
+    for series_filter in _series_filters(series_keys, indicator_ids):
+        rows = IndicatorValue.objects.filter(series_filter).annotate(
+            lag_value=Window(
+                expression=Lag('value'),
+                partition_by=[F('indicator_id'), F('region_id'), F('sector_id')],
+                order_by=F('date').asc()
+            )
+        ).order_by().values_list('id', 'value', 'previous_value', 'change_percent', 'lag_value')
+
+        changed = []
+        for pk, value, previous_value, change_percent, lag_value in rows:
+            new_change = compute_change_percent(value, lag_value)
+            if previous_value != lag_value or change_percent != new_change:
+                changed.append(IndicatorValue(pk=pk, previous_value=lag_value, change_percent=new_change))
+
+        if changed:
+            with transaction.atomic():
+                IndicatorValue.objects.bulk_update(
+                    changed, ['previous_value', 'change_percent'], batch_size=batch_size
+                )
+            updated += len(changed)
+
+    logger.info(f"Recomputed changes: {updated} indicator values updated")
+    return updated
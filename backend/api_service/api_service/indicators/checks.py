@@ -0,0 +1,54 @@
+"""
+System checks of the indicators app.
+"""
+from django.core.checks import Error, register
+from django.urls import get_resolver
+
+
+def _view_filtersets(patterns):
+    """
+    (view, filterset class) of the DRF views routed by URL patterns.
+    """
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            yield from _view_filtersets(pattern.url_patterns)
+            continue
+        view = getattr(pattern.callback, 'cls', None)
+        filterset = getattr(view, 'filterset_class', None)
+        if filterset is not None:
+            yield view, filterset
+
+
+@register()
+def check_version_params(app_configs, **kwargs):
+    """
+    Filters named like the query parameters dataset versions are keyed on
+    must filter on the code the counters are bumped for, or be id
+    parameters, so cached responses and ETags follow the data.
+    """
+    from .versions import ID_PARAMS, INDICATOR_PARAMS, REGION_PARAMS, SECTOR_PARAMS
+
+    relations = [(param, 'indicator') for param in INDICATOR_PARAMS]
+    relations += [(param, 'region') for param in REGION_PARAMS]
+    relations += [(param, 'sector') for param in SECTOR_PARAMS]
+
+    errors = []
+    checked = set()
+    for view, filterset in _view_filtersets(get_resolver().url_patterns):
+        if filterset in checked:
+            continue
+        checked.add(filterset)
+        for param, relation in relations:
+            param_filter = filterset.base_filters.get(param)
+            if param_filter is None or param_filter.field_name == f'{relation}__code':
+                continue
+            if param in ID_PARAMS and param_filter.field_name in (relation, f'{relation}_id', f'{relation}__id'):
+                continue
+            errors.append(Error(
+                f"{filterset.__name__}.{param} filters on {param_filter.field_name}, "
+                f"but dataset versions are bumped per {relation} code",
+                hint=f"Filter on {relation}__code, or add {param} to ID_PARAMS in indicators/versions.py",
+                obj=view,
+                id='indicators.E001',
+            ))
+    return errors
@@ -0,0 +1,157 @@
+import json
+import logging
+import pika
+from django.conf import settings
+
+from .loader import IndicatorValueLoader
+
+logger = logging.getLogger(__name__)
+
+class IndicatorLoaderConsumer:
+    """
+    Consume processed scraper records from RabbitMQ and bulk-load them.
+
+    Messages are buffered until prefetch_count messages have arrived or the
+    queue has been idle for flush_interval seconds, then loaded with a single
+    IndicatorValueLoader call and acknowledged together. A backlog therefore
+    drains at bulk-insert speed rather than one message at a time.
+    """
+    def __init__(self, drain=False, batch_size=None):
+        self.config = settings.RABBITMQ_CONFIG
+        loader_config = getattr(settings, 'INDICATOR_LOADER', {})
+
+        self.exchange = self.config.get('exchange', 'snbs')
+        self.queue = self.config.get('indicator_queue', 'indicator_values')
+        self.prefetch_count = loader_config.get('prefetch_count', 200)
+        self.flush_interval = loader_config.get('flush_interval', 2.0)
+        self.drain = drain
+        self.loader = IndicatorValueLoader(batch_size=batch_size)
+
+        self.connection = None
+        self.channel = None
+        self.running = False
+
+    def connect(self):
+        """
+        Connect to RabbitMQ server.
+        """
+        parameters = pika.ConnectionParameters(
+            host=self.config.get('host', 'localhost'),
+            port=self.config.get('port', 5672),
+            virtual_host=self.config.get('virtual_host', '/'),
+            credentials=pika.PlainCredentials(
+                username=self.config.get('username', 'guest'),
+                password=self.config.get('password', 'guest')
+            ),
+            heartbeat=self.config.get('heartbeat', 600),
+            connection_attempts=self.config.get('connection_attempts', 3),
+            retry_delay=self.config.get('retry_delay', 5)
+        )
+
+        self.connection = pika.BlockingConnection(parameters)
+        self.channel = self.connection.channel()
+
+        self.channel.exchange_declare(
+            exchange=self.exchange,
+            exchange_type='direct',
+            durable=True
+        )
+
+        self.channel.queue_declare(
+            queue=self.queue,
+            durable=True
+        )
+
+        self.channel.queue_bind(
+            exchange=self.exchange,
+            queue=self.queue,
+            routing_key=self.queue
+        )
+
+        # Let RabbitMQ push a full batch before we acknowledge
+        self.channel.basic_qos(prefetch_count=self.prefetch_count)
+
+        logger.info(f"Connected to RabbitMQ at {self.config.get('host')}:{self.config.get('port')}")
+
+    def consume(self):
+        """
+        Consume and load messages in batches until stopped, or until the
+        queue is empty when draining a backlog.
+        """
+        try:
+            if not self.connection or self.connection.is_closed:
+                self.connect()
+
+            logger.info(f"Started consuming from queue: {self.queue}")
+            self.running = True
+            batch = []
+
+            for method, properties, body in self.channel.consume(self.queue, inactivity_timeout=self.flush_interval):
+                if method is not None:
+                    batch.append((method, body))
+                    if len(batch) < self.prefetch_count:
+                        continue
+
+                if batch:
+                    self.process_batch(batch)
+                    batch = []
+                elif self.drain:
+                    logger.info("Queue drained, stopping loader")
+                    break
+
+                if not self.running:
+                    break
+
+        except Exception as e:
+            logger.exception(f"Error in indicator loader consumer: {str(e)}")
+
+        finally:
+            self.cleanup()
+
+    def process_batch(self, batch):
+        """
+        Load a batch of messages and acknowledge them together.
+        """
+        payloads = []
+        for method, body in batch:
+            try:
+                payloads.append(json.loads(body))
+            except json.JSONDecodeError as e:
+                logger.error(f"Invalid JSON in message: {str(e)}")
+
+        try:
+            result = self.loader.load(payloads)
+            logger.info(f"Loaded batch of {len(batch)} messages: {result}")
+        except Exception as e:
+            # Fall back to loading one message at a time so a single bad
+            # payload does not discard the whole batch
+            logger.exception(f"Error loading batch, retrying messages individually: {str(e)}")
+            for payload in payloads:
+                try:
+                    self.loader.load([payload])
+                except Exception as e:
+                    logger.exception(f"Error loading item {payload.get('item_id')}: {str(e)}")
+
+        self.channel.basic_ack(delivery_tag=batch[-1][0].delivery_tag, multiple=True)
+
+    def cleanup(self):
+        """
+        Clean up connections.
+        """
+        try:
+            if self.channel and self.channel.is_open:
+                self.channel.cancel()
+
+            if self.connection and self.connection.is_open:
+                self.connection.close()
+
+            self.running = False
+            logger.info("Indicator loader stopped and connections closed")
+        except Exception as e:
+            logger.exception(f"Error during cleanup: {str(e)}")
+
+    def stop(self):
+        """
+        Stop the consumer after the current batch.
+        """
+        self.running = False
@@ -0,0 +1,79 @@
+"""
+Largest-Triangle-Three-Buckets downsampling of time series.
+
+LTTB keeps the first and last points and, from each of threshold - 2 equal
+buckets in between, the point forming the largest triangle with the point
+kept from the previous bucket and the average of the next bucket. Peaks and
+troughs survive, unlike with averaging or striding.
+
+Bucket bounds and next-bucket averages are computed for all buckets at once;
+only the choice of point, which depends on the previous bucket's choice,
+loops over the buckets.
+"""
+import numpy as np
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Indices of the points kept when downsampling to threshold points.
+
+    Args:
+        x: Increasing x coordinates (e.g. date ordinals)
+        y: Values
+        threshold: Number of points to keep
+
+    Returns:
+        numpy.ndarray: Sorted indices into x and y
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Buckets i = 0 .. threshold - 3 cover [bounds[i], bounds[i + 1])
+    every = (n - 2) / (threshold - 2)
+    bounds = np.floor(np.arange(threshold - 1) * every).astype(int) + 1
+    bounds[-1] = n - 1
+
+    # Average of the bucket after each bucket; the last bucket is followed
+    # by the last point
+    x_sums = np.concatenate(([0.0], np.cumsum(x)))
+    y_sums = np.concatenate(([0.0], np.cumsum(y)))
+    starts = bounds[1:-1]
+    ends = bounds[2:]
+    sizes = ends - starts
+    next_x = np.append((x_sums[ends] - x_sums[starts]) / sizes, x[-1])
+    next_y = np.append((y_sums[ends] - y_sums[starts]) / sizes, y[-1])
+
+    indices = np.empty(threshold, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+    selected = 0
+    for bucket in range(threshold - 2):
+        start, end = bounds[bucket], bounds[bucket + 1]
+        ax, ay = x[selected], y[selected]
+        areas = np.abs(
+            (ax - next_x[bucket]) * (y[start:end] - ay)
+            - (ax - x[start:end]) * (next_y[bucket] - ay)
+        )
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+
+    return indices
+
+
+def downsample_rows(rows, threshold):
+    """
+    Downsample (date, value, change_percent) rows ordered by date.
+
+    Returns:
+        list: The kept rows
+    """
+    rows = list(rows)
+    if threshold >= len(rows) or threshold < 3:
+        return rows
+
+    x = np.fromiter((row[0].toordinal() for row in rows), dtype=float, count=len(rows))
+    y = np.fromiter((row[1] for row in rows), dtype=float, count=len(rows))
+    return [rows[index] for index in lttb_indices(x, y, threshold)]
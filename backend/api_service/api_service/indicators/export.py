@@ -0,0 +1,124 @@
+"""
+Streaming export of indicator values as CSV or NDJSON.
+
+Rows are read as tuples from a server-side cursor in chunks and encoded
+(and optionally gzipped) chunk by chunk, so memory stays constant however
+many rows are exported.
+"""
+import csv
+import io
+import json
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+EXPORT_CSV = 'csv'
+EXPORT_NDJSON = 'ndjson'
+EXPORT_FORMATS = (EXPORT_CSV, EXPORT_NDJSON)
+
+CONTENT_TYPES = {
+    EXPORT_CSV: 'text/csv',
+    EXPORT_NDJSON: 'application/x-ndjson',
+}
+
+# Exported column names and the fields they are read from
+EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('indicator_code', 'indicator__code'),
+    ('indicator_name', 'indicator__name'),
+    ('indicator_unit', 'indicator__unit'),
+    ('region', 'region__code'),
+    ('sector', 'sector__code'),
+    ('date', 'date'),
+    ('value', 'value'),
+    ('previous_value', 'previous_value'),
+    ('change_percent', 'change_percent'),
+    ('is_estimate', 'is_estimate'),
+    ('is_preliminary', 'is_preliminary'),
+    ('source_url', 'source_url'),
+]
+
+
+def export_rows(queryset, chunk_size):
+    """
+    Exported rows of a queryset, read from a server-side cursor.
+    """
+    return queryset.order_by('date', 'id').values_list(
+        *[field for _, field in EXPORT_COLUMNS]
+    ).iterator(chunk_size=chunk_size)
+
+
+def _chunks(rows, size):
+    """
+    Group rows into lists of at most size rows.
+    """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _encode_csv(rows, chunk_size):
+    """
+    Yield CSV text, one chunk of rows at a time.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    for chunk in _chunks(rows, chunk_size):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _encode_ndjson(rows, chunk_size):
+    """
+    Yield newline-delimited JSON, one chunk of rows at a time.
+    """
+    names = [name for name, _ in EXPORT_COLUMNS]
+    for chunk in _chunks(rows, chunk_size):
+        yield ''.join(
+            json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder, separators=(',', ':')) + '\n'
+            for row in chunk
+        )
+
+
+def _gzip(chunks):
+    """
+    Gzip a stream of text chunks.
+    """
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_response(queryset, export_format=EXPORT_CSV, compress=False):
+    """
+    StreamingHttpResponse exporting the rows of a queryset as an attachment.
+    """
+    chunk_size = getattr(settings, 'INDICATOR_EXPORT', {}).get('chunk_size', 5000)
+    rows = export_rows(queryset, chunk_size)
+
+    encode = _encode_csv if export_format == EXPORT_CSV else _encode_ndjson
+    content = encode(rows, chunk_size)
+    filename = f'indicator_values.{export_format}'
+    content_type = CONTENT_TYPES[export_format]
+    if compress:
+        content = _gzip(content)
+        filename += '.gz'
+        content_type = 'application/gzip'
+
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,152 @@
+"""
+Fast-path serialization of indicator values for the high-volume list,
+list_detail and key_stats endpoints.
+
+Rows are read with values() projections and turned into plain dicts, without
+instantiating models or running DRF's per-field machinery. The output is the
+same as IndicatorValueSerializer, IndicatorValueDetailSerializer and
+KeyStatIndicatorSerializer produce, key for key and in the same order; those
+serializers remain in use for single objects and the API schema.
+
+Dates and datetimes are formatted by DRF's own fields, so DATE_FORMAT,
+DATETIME_FORMAT and the time zone settings apply as before.
+"""
+from rest_framework import serializers
+
+_date_field = serializers.DateField()
+_datetime_field = serializers.DateTimeField()
+
+# values() projections of each fast path
+VALUE_FIELDS = (
+    'id', 'indicator_id', 'indicator__name', 'indicator__unit',
+    'value', 'date', 'change_percent',
+)
+
+VALUE_DETAIL_FIELDS = (
+    'id', 'indicator_id', 'indicator__name', 'indicator__code', 'indicator__unit',
+    'region_id', 'region__name', 'region__code', 'region__center_lat', 'region__center_lng',
+    'sector_id', 'sector__name', 'sector__code',
+    'value', 'date', 'previous_value', 'change_percent',
+    'source_url', 'source_document', 'confidence_level',
+    'is_estimate', 'is_preliminary', 'metadata',
+    'created_at', 'updated_at',
+)
+
+KEY_STAT_FIELDS = (
+    'indicator_value_id', 'indicator__name', 'indicator__unit',
+    'value', 'change_percent', 'date',
+)
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+def _str(value):
+    return None if value is None else str(value)
+
+
+def _date(value):
+    return None if value is None else _date_field.to_representation(value)
+
+
+def _datetime(value):
+    return None if value is None else _datetime_field.to_representation(value)
+
+
+def serialize_values(rows):
+    """
+    IndicatorValueSerializer output of VALUE_FIELDS rows.
+    """
+    return [
+        {
+            'id': row['id'],
+            'indicator': row['indicator_id'],
+            'indicator_name': row['indicator__name'],
+            'indicator_unit': row['indicator__unit'],
+            'value': _float(row['value']),
+            'date': _date(row['date']),
+            'change_percent': _float(row['change_percent']),
+        }
+        for row in rows
+    ]
+
+
+def serialize_value_details(rows):
+    """
+    IndicatorValueDetailSerializer output of VALUE_DETAIL_FIELDS rows.
+    """
+    return [
+        {
+            'id': row['id'],
+            'indicator': {
+                'id': row['indicator_id'],
+                'name': _str(row['indicator__name']),
+                'code': _str(row['indicator__code']),
+                'unit': _str(row['indicator__unit']),
+            },
+            'region': {
+                'id': row['region_id'],
+                'name': _str(row['region__name']),
+                'code': _str(row['region__code']),
+                'center_lat': _float(row['region__center_lat']),
+                'center_lng': _float(row['region__center_lng']),
+            } if row['region_id'] is not None else None,
+            'sector': {
+                'id': row['sector_id'],
+                'name': _str(row['sector__name']),
+                'code': _str(row['sector__code']),
+            } if row['sector_id'] is not None else None,
+            'value': _float(row['value']),
+            'date': _date(row['date']),
+            'previous_value': _float(row['previous_value']),
+            'change_percent': _float(row['change_percent']),
+            'source_url': _str(row['source_url']),
+            'source_document': _str(row['source_document']),
+            'confidence_level': _float(row['confidence_level']),
+            'is_estimate': bool(row['is_estimate']),
+            'is_preliminary': bool(row['is_preliminary']),
+            'metadata': row['metadata'],
+            'created_at': _datetime(row['created_at']),
+            'updated_at': _datetime(row['updated_at']),
+        }
+        for row in rows
+    ]
+
+
+def _formatted_value(value, unit):
+    if unit:
+        if unit == '%':
+            return f"{value:.2f}%"
+        elif unit == '$':
+            return f"${value:,.2f}"
+        return f"{value} {unit}"
+    return f"{value}"
+
+
+def _trend(change_percent):
+    if change_percent is None:
+        return 'neutral'
+    elif change_percent > 0:
+        return 'up'
+    elif change_percent < 0:
+        return 'down'
+    return 'neutral'
+
+
+def serialize_key_stats(rows):
+    """
+    KeyStatIndicatorSerializer output of KEY_STAT_FIELDS rows.
+    """
+    return [
+        {
+            'id': row['indicator_value_id'],
+            'indicator_name': row['indicator__name'],
+            'indicator_unit': row['indicator__unit'],
+            'formatted_value': _formatted_value(row['value'], row['indicator__unit']),
+            'change_percent': _float(row['change_percent']),
+            'trend': _trend(row['change_percent']),
+            'last_updated': row['date'].strftime('%b %Y'),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,75 @@
+"""
+Maintenance of LatestIndicatorValue.
+
+The loader refreshes the latest value of every series it wrote, after
+previous_value and change_percent have been recomputed, so readers of the
+latest values never have to scan a series' history.
+"""
+import logging
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Max, Q
+
+from .changes import _series_filters
+from .models import IndicatorValue, LatestIndicatorValue
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_latest_values(series_keys=None, indicator_ids=None, batch_size=5000):
+    """
+    Rebuild LatestIndicatorValue rows for a set of series.
+
+    Args:
+        series_keys: (indicator_id, region_id, sector_id) tuples to refresh,
+            or None for every series
+        indicator_ids: Restrict a full refresh to these indicators
+        batch_size: Rows per bulk_create statement
+
+    Returns:
+        int: Number of latest values written
+    """
+    written = 0
+
+    for series_filter in _series_filters(series_keys, indicator_ids):
+        latest = IndicatorValue.objects.filter(series_filter).order_by().values(
+            'indicator_id', 'region_id', 'sector_id'
+        ).annotate(latest_date=Max('date')).values_list(
+            'indicator_id', 'region_id', 'sector_id', 'latest_date'
+        )
+
+        rows = []
+        latest = list(latest)
+        if latest:
+            latest_filter = reduce(or_, (
+                Q(indicator_id=indicator_id, region_id=region_id, sector_id=sector_id, date=latest_date)
+                for indicator_id, region_id, sector_id, latest_date in latest
+            ))
+            rows = [
+                LatestIndicatorValue(
+                    indicator_id=indicator_id,
+                    region_id=region_id,
+                    sector_id=sector_id,
+                    indicator_value_id=pk,
+                    value=value,
+                    date=value_date,
+                    previous_value=previous_value,
+                    change_percent=change_percent,
+                )
+                for pk, indicator_id, region_id, sector_id, value, value_date, previous_value, change_percent in
+                IndicatorValue.objects.filter(latest_filter).values_list(
+                    'id', 'indicator_id', 'region_id', 'sector_id',
+                    'value', 'date', 'previous_value', 'change_percent'
+                )
+            ]
+
+        # Series that lost all their values lose their latest value as well
+        with transaction.atomic():
+            LatestIndicatorValue.objects.filter(series_filter).delete()
+            LatestIndicatorValue.objects.bulk_create(rows, batch_size=batch_size)
+        written += len(rows)
+
+    logger.info(f"Refreshed latest values: {written} series")
+    return written
@@ -0,0 +1,521 @@
+"""
+Bulk loader for processed scraper output.
+
+The scraper ETL consumer forwards the processed records of each table together
+with the DataCategorizer output. This module maps those records to Indicator,
+Region, Sector and IndicatorValue rows and upserts the values in bulk on the
+(indicator, region, sector, date) key.
+"""
+import logging
+import re
+from collections import namedtuple
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from api_service.regions.models import Region
+from api_service.sectors.models import Sector
+from api_service.statistics.dashboards import refresh_dashboards
+from api_service.statistics.summary import refresh_after_load
+from .changes import recompute_changes
+from .latest import refresh_latest_values
+from .rollups import refresh_rollups
+from .snapshots import request_rebuild as request_snapshot_rebuild
+from .versions import bump_after_load as bump_dataset_versions
+from .models import Indicator, IndicatorValue
+
+logger = logging.getLogger(__name__)
+
+# A single value extracted from a processed table record
+Observation = namedtuple(
+    'Observation',
+    ['indicator_code', 'indicator_name', 'unit', 'region', 'sector', 'date', 'value', 'source_url']
+)
+
+# Columns that name the indicator in long tables (e.g. "Indicator | Value")
+LABEL_COLUMNS = ('indicator', 'metric', 'title', 'name', 'item', 'variable', 'description')
+# Columns that hold the value in long tables
+VALUE_COLUMNS = ('value', 'amount', 'figure', 'rate', 'total')
+# Columns added by pandas' table orient that never carry data
+IGNORED_COLUMNS = ('index', 'level_0')
+# Dimension values that mean "no breakdown" and map to a NULL region/sector
+NATIONAL_LABELS = {'national', 'somalia', 'total', 'all', 'all regions', 'all sectors', 'overall'}
+
+YEAR_PATTERN = re.compile(r'(?<!\d)(?:19|20)\d{2}(?!\d)')
+QUARTER_PATTERN = re.compile(r'\bq([1-4])\b')
+MONTH_PATTERN = re.compile(r'\b(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\b')
+NUMERIC_PATTERN = re.compile(r'-?\d+(?:\.\d+)?')
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+
+def make_code(text, max_length=50):
+    """
+    Build a snake_case code from a label.
+    """
+    code = re.sub(r'[^a-z0-9]+', '_', str(text).lower()).strip('_')
+    return code[:max_length]
+
+
+def parse_value(value):
+    """
+    Extract a float from a cell value ("5.2%", "1,234", 17.3).
+    """
+    if value is None or isinstance(value, bool):
+        return None
+
+    if isinstance(value, (int, float)):
+        # NaN is the only value that is not equal to itself
+        return float(value) if value == value else None
+
+    if isinstance(value, str):
+        match = NUMERIC_PATTERN.search(value.replace(',', ''))
+        if match:
+            return float(match.group())
+
+    return None
+
+
+def detect_unit(value):
+    """
+    Detect the unit of a formatted cell value.
+    """
+    if isinstance(value, str):
+        if '%' in value:
+            return '%'
+        if '$' in value:
+            return '$'
+    return None
+
+
+def parse_date(value):
+    """
+    Parse a period value (ISO date, year, "May 2025", "2024 Q3") to the
+    first day of that period.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+
+    if isinstance(value, (int, float)):
+        if value != value:
+            return None
+        year = int(value)
+        return date(year, 1, 1) if 1900 <= year <= 2100 else None
+
+    text = str(value).strip().lower()
+    if not text:
+        return None
+
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        pass
+
+    years = YEAR_PATTERN.findall(text)
+    if not years:
+        return None
+
+    # Ranges such as "2020-2023" resolve to the most recent year
+    month = 1
+    quarter_match = QUARTER_PATTERN.search(text)
+    month_match = MONTH_PATTERN.search(text)
+    if quarter_match:
+        month = (int(quarter_match.group(1)) - 1) * 3 + 1
+    elif month_match:
+        month = MONTHS[month_match.group(1)]
+
+    return date(int(years[-1]), month, 1)
+
+
+def clean_label(value):
+    """
+    Normalize a dimension label, returning None for national/total labels.
+    """
+    if value is None:
+        return None
+    label = re.sub(r'\s+', ' ', str(value)).strip()
+    if not label or label.lower() in NATIONAL_LABELS:
+        return None
+    return label
+
+
+class RecordMapper:
+    """
+    Map the processed records of one table to observations.
+
+    Three table layouts are recognised:
+    - wide: a label column plus one column per year ("Indicator | 2022 | 2023")
+    - long: a label column plus a value column ("Indicator | Value")
+    - measures: numeric columns as indicators, broken down by the time,
+      region and sector dimensions found by the DataCategorizer
+    """
+    def __init__(self, payload):
+        metadata = payload.get('metadata') or {}
+        categories = payload.get('categories') or {}
+
+        self.records = payload.get('records') or []
+        self.dtype_map = metadata.get('dtype_map') or {}
+        self.time_column = metadata.get('time_dimension')
+        self.region_column = categories.get('region_dimension')
+        self.sector_column = categories.get('sector_dimension')
+        self.category = make_code(payload.get('category') or categories.get('indicator_type') or '')
+        self.default_date = parse_date(payload.get('time_period'))
+        self.source_url = (payload.get('source_url') or '')[:500] or None
+
+        columns = self.dtype_map.keys() if self.dtype_map else (self.records[0].keys() if self.records else [])
+        dimensions = {self.time_column, self.region_column, self.sector_column}
+        self.columns = [
+            col for col in columns
+            if col not in IGNORED_COLUMNS and col not in dimensions
+        ]
+
+    def observations(self):
+        """
+        Return the list of observations for the table.
+        """
+        label_column = self._find_column(LABEL_COLUMNS, exclude_numeric=True)
+        year_columns = [col for col in self.columns if YEAR_PATTERN.fullmatch(col)]
+
+        if label_column and year_columns:
+            return list(self._wide_observations(label_column, year_columns))
+
+        value_column = self._find_column(VALUE_COLUMNS)
+        if label_column and value_column:
+            return list(self._long_observations(label_column, value_column))
+
+        return list(self._measure_observations())
+
+    def _find_column(self, candidates, exclude_numeric=False):
+        """
+        Find the first column named after one of the candidates.
+        """
+        for candidate in candidates:
+            for col in self.columns:
+                if exclude_numeric and self.dtype_map.get(col) == 'numeric':
+                    continue
+                if col == candidate or col.startswith(f"{candidate}_"):
+                    return col
+        return None
+
+    def _dimensions(self, record):
+        """
+        Get the region and sector labels for a record.
+        """
+        region = clean_label(record.get(self.region_column)) if self.region_column else None
+        sector = clean_label(record.get(self.sector_column)) if self.sector_column else None
+        return region, sector
+
+    def _record_date(self, record):
+        """
+        Get the date of a record from the time dimension or the item's time period.
+        """
+        if self.time_column:
+            record_date = parse_date(record.get(self.time_column))
+            if record_date:
+                return record_date
+        return self.default_date
+
+    def _wide_observations(self, label_column, year_columns):
+        for record in self.records:
+            label = clean_label(record.get(label_column))
+            if not label:
+                continue
+            region, sector = self._dimensions(record)
+            for col in year_columns:
+                value = parse_value(record.get(col))
+                if value is None:
+                    continue
+                yield Observation(
+                    make_code(label), label[:255], detect_unit(record.get(col)),
+                    region, sector, date(int(col), 1, 1), value, self.source_url
+                )
+
+    def _long_observations(self, label_column, value_column):
+        for record in self.records:
+            label = clean_label(record.get(label_column))
+            value = parse_value(record.get(value_column))
+            record_date = self._record_date(record)
+            if not label or value is None or record_date is None:
+                continue
+            region, sector = self._dimensions(record)
+            yield Observation(
+                make_code(label), label[:255], detect_unit(record.get(value_column)),
+                region, sector, record_date, value, self.source_url
+            )
+
+    def _measure_observations(self):
+        measures = [col for col in self.columns if self.dtype_map.get(col) == 'numeric']
+        indicators = {}
+        for col in measures:
+            # Prefix generic measure names ("total", "male") with the table category
+            code = col if not self.category or col.startswith(self.category) else f"{self.category}_{col}"
+            indicators[col] = (make_code(code), col.replace('_', ' ').title()[:255])
+
+        for record in self.records:
+            record_date = self._record_date(record)
+            if record_date is None:
+                continue
+            region, sector = self._dimensions(record)
+            for col in measures:
+                value = parse_value(record.get(col))
+                if value is None:
+                    continue
+                code, name = indicators[col]
+                yield Observation(code, name, None, region, sector, record_date, value, self.source_url)
+
+
+class LoadResult:
+    """
+    Summary of a bulk load, including the series it touched.
+    """
+    def __init__(self):
+        self.values_loaded = 0
+        self.records_skipped = 0
+        # (indicator_id, region_id, sector_id) -> [min_date, max_date]
+        self.series = {}
+
+    def touch(self, series_key, value_date):
+        """
+        Record that a value was written for a series.
+        """
+        bounds = self.series.get(series_key)
+        if bounds is None:
+            self.series[series_key] = [value_date, value_date]
+        elif value_date < bounds[0]:
+            bounds[0] = value_date
+        elif value_date > bounds[1]:
+            bounds[1] = value_date
+
+    @property
+    def indicator_ids(self):
+        return {key[0] for key in self.series}
+
+    @property
+    def region_ids(self):
+        return {key[1] for key in self.series if key[1] is not None}
+
+    @property
+    def sector_ids(self):
+        return {key[2] for key in self.series if key[2] is not None}
+
+    def __str__(self):
+        return f"{self.values_loaded} values in {len(self.series)} series ({self.records_skipped} payloads skipped)"
+
+
+class IndicatorValueLoader:
+    """
+    Upsert observations into IndicatorValue in bulk.
+
+    Values whose region and sector are both set are written with a single
+    INSERT ... ON CONFLICT DO UPDATE per batch. The database treats NULLs as
+    distinct in the unique key, so national or all-sector values cannot rely
+    on the conflict clause; their existing rows are looked up with one query
+    per batch and updated with bulk_update instead.
+    """
+    UNIQUE_FIELDS = ['indicator', 'region', 'sector', 'date']
+    UPDATE_FIELDS = ['value', 'source_url', 'updated_at']
+
+    def __init__(self, batch_size=None):
+        config = getattr(settings, 'INDICATOR_LOADER', {})
+        self.batch_size = batch_size or config.get('batch_size', 5000)
+
+    def load(self, payloads):
+        """
+        Map and load a list of processed item payloads.
+
+        Args:
+            payloads: Messages published by the scraper ETL consumer
+
+        Returns:
+            LoadResult: Counts and the (indicator, region, sector) series touched
+        """
+        result = LoadResult()
+        observations = []
+
+        for payload in payloads:
+            try:
+                observations.extend(RecordMapper(payload).observations())
+            except Exception as e:
+                logger.error(f"Error mapping records of item {payload.get('item_id')}: {str(e)}")
+                result.records_skipped += 1
+
+        if not observations:
+            return result
+
+        with transaction.atomic():
+            indicator_ids = self._resolve_indicators(observations)
+            region_ids = self._resolve_dimension(Region, {obs.region for obs in observations}, 20)
+            sector_ids = self._resolve_dimension(Sector, {obs.sector for obs in observations}, 50)
+
+            # Deduplicate on the unique key; the last observation wins
+            rows = {}
+            for obs in observations:
+                key = (
+                    indicator_ids[obs.indicator_code],
+                    region_ids.get(obs.region),
+                    sector_ids.get(obs.sector),
+                    obs.date,
+                )
+                rows[key] = (obs.value, obs.source_url)
+
+            keys = list(rows)
+            for start in range(0, len(keys), self.batch_size):
+                self._upsert(keys[start:start + self.batch_size], rows, result)
+
+        self._after_load(result)
+        return result
+
+    def _resolve_indicators(self, observations):
+        """
+        Map indicator codes to ids, creating missing indicators.
+        """
+        definitions = {}
+        for obs in observations:
+            if obs.indicator_code not in definitions or (obs.unit and not definitions[obs.indicator_code][1]):
+                definitions[obs.indicator_code] = (obs.indicator_name, obs.unit)
+
+        ids = dict(Indicator.objects.filter(code__in=definitions).values_list('code', 'id'))
+        missing = [code for code in definitions if code not in ids]
+
+        if missing:
+            Indicator.objects.bulk_create(
+                [
+                    Indicator(
+                        code=code,
+                        name=definitions[code][0],
+                        unit=definitions[code][1],
+                        metadata={'source': 'scraper'},
+                    )
+                    for code in missing
+                ],
+                ignore_conflicts=True
+            )
+            ids.update(Indicator.objects.filter(code__in=missing).values_list('code', 'id'))
+            logger.info(f"Created {len(missing)} indicators")
+
+        return ids
+
+    def _resolve_dimension(self, model, labels, code_length):
+        """
+        Map region or sector labels to ids by code or name, creating missing rows.
+        """
+        labels.discard(None)
+        if not labels:
+            return {}
+
+        lookup = {}
+        for pk, name, code in model.objects.values_list('id', 'name', 'code'):
+            lookup[name.lower()] = pk
+            lookup[code.lower()] = pk
+
+        ids = {label: lookup[label.lower()] for label in labels if label.lower() in lookup}
+        missing = {label: make_code(label, code_length) for label in labels if label not in ids}
+
+        if missing:
+            model.objects.bulk_create(
+                [
+                    model(name=label[:100], code=code, metadata={'source': 'scraper'})
+                    for label, code in missing.items()
+                ],
+                ignore_conflicts=True
+            )
+            created = dict(model.objects.filter(code__in=missing.values()).values_list('code', 'id'))
+            for label, code in missing.items():
+                ids[label] = created[code]
+            logger.info(f"Created {len(missing)} {model._meta.verbose_name_plural}")
+
+        return ids
+
+    def _upsert(self, keys, rows, result):
+        """
+        Write one batch of values.
+        """
+        now = timezone.now()
+        conflict_rows = []
+        nullable_keys = []
+
+        for key in keys:
+            if key[1] is None or key[2] is None:
+                nullable_keys.append(key)
+            else:
+                conflict_rows.append(self._build_value(key, rows[key], now))
+            result.touch(key[:3], key[3])
+
+        if conflict_rows:
+            IndicatorValue.objects.bulk_create(
+                conflict_rows,
+                batch_size=self.batch_size,
+                update_conflicts=True,
+                unique_fields=self.UNIQUE_FIELDS,
+                update_fields=self.UPDATE_FIELDS
+            )
+
+        if nullable_keys:
+            dates = [key[3] for key in nullable_keys]
+            existing = {
+                (indicator_id, region_id, sector_id, value_date): pk
+                for pk, indicator_id, region_id, sector_id, value_date in IndicatorValue.objects.filter(
+                    Q(region__isnull=True) | Q(sector__isnull=True),
+                    indicator_id__in={key[0] for key in nullable_keys},
+                    date__range=(min(dates), max(dates)),
+                ).values_list('id', 'indicator_id', 'region_id', 'sector_id', 'date')
+            }
+
+            to_create = []
+            to_update = []
+            for key in nullable_keys:
+                value = self._build_value(key, rows[key], now)
+                if key in existing:
+                    value.pk = existing[key]
+                    to_update.append(value)
+                else:
+                    to_create.append(value)
+
+            if to_create:
+                IndicatorValue.objects.bulk_create(to_create, batch_size=self.batch_size)
+            if to_update:
+                IndicatorValue.objects.bulk_update(to_update, self.UPDATE_FIELDS, batch_size=self.batch_size)
+
+        result.values_loaded += len(keys)
+
+    @staticmethod
+    def _build_value(key, row, now):
+        indicator_id, region_id, sector_id, value_date = key
+        value, source_url = row
+        return IndicatorValue(
+            indicator_id=indicator_id,
+            region_id=region_id,
+            sector_id=sector_id,
+            date=value_date,
+            value=value,
+            source_url=source_url,
+            updated_at=now,
+        )
+
+    def _after_load(self, result):
+        """
+        Run post-load steps for the series touched by a load.
+        """
+        logger.info(f"Loaded {result}")
+
+        if not result.series:
+            return
+
+        try:
+            recompute_changes(result.series, batch_size=self.batch_size)
+            refresh_latest_values(result.series, batch_size=self.batch_size)
+            refresh_rollups(result.series, batch_size=self.batch_size)
+            refresh_after_load(result.series)
+            refresh_dashboards(result.series)
+        finally:
+            # Bumped last, so a new ETag never tags data that is still being
+            # refreshed, and also when a refresh failed: the values themselves
+            # are committed, and cached responses must not outlive them
+            bump_dataset_versions(result.series)
+            request_snapshot_rebuild()
@@ -0,0 +1,148 @@
+import statistics
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Max, OuterRef, Subquery
+from api_service.indicators.latest import refresh_latest_values
+from api_service.indicators.models import Indicator, IndicatorValue, LatestIndicatorValue
+from api_service.regions.models import Region
+
+BENCH_PREFIX = 'bench_key_stats'
+
+class Command(BaseCommand):
+    help = 'Benchmark key stats lookups on LatestIndicatorValue against the Max(date) subquery as history grows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=2000000,
+            help='Indicator values inserted in total',
+        )
+        parser.add_argument(
+            '--steps',
+            type=int,
+            default=4,
+            help='Number of history sizes measured on the way to --rows',
+        )
+        parser.add_argument(
+            '--indicators',
+            type=int,
+            default=6,
+            help='Number of synthetic indicators',
+        )
+        parser.add_argument(
+            '--regions',
+            type=int,
+            default=20,
+            help='Number of synthetic regions, besides the national series',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Runs per query; the median is reported',
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the synthetic data instead of deleting it afterwards',
+        )
+
+    def handle(self, *args, **options):
+        indicators = [
+            Indicator.objects.get_or_create(
+                code=f'{BENCH_PREFIX}_{i}', defaults={'name': f'Benchmark indicator {i}', 'unit': '%'}
+            )[0]
+            for i in range(options['indicators'])
+        ]
+        regions = [
+            Region.objects.get_or_create(
+                code=f'BKS{i}', defaults={'name': f'Benchmark region {i}'}
+            )[0]
+            for i in range(options['regions'])
+        ]
+        codes = [indicator.code for indicator in indicators]
+        indicator_ids = [indicator.id for indicator in indicators]
+        region = regions[0] if regions else None
+
+        series = [(indicator.id, r.id if r else None) for indicator in indicators for r in [None] + regions]
+        days_per_step = max(1, options['rows'] // (len(series) * options['steps']))
+
+        try:
+            self.stdout.write(f'Series: {len(series)}, rows per step: {days_per_step * len(series)}')
+            self.stdout.write(f'{"rows":>12} {"subquery (ms)":>15} {"latest table (ms)":>19}')
+
+            start_date = date(1900, 1, 1)
+            for step in range(options['steps']):
+                first_day = step * days_per_step
+                for day in range(first_day, first_day + days_per_step, 100):
+                    IndicatorValue.objects.bulk_create([
+                        IndicatorValue(
+                            indicator_id=indicator_id,
+                            region_id=region_id,
+                            value=(offset * 7 + indicator_id) % 100,
+                            date=start_date + timedelta(days=offset),
+                        )
+                        for offset in range(day, min(day + 100, first_day + days_per_step))
+                        for indicator_id, region_id in series
+                    ], batch_size=10000)
+
+                refresh_latest_values(indicator_ids=indicator_ids)
+
+                rows = IndicatorValue.objects.filter(indicator_id__in=indicator_ids).count()
+                national_subquery = self.time_query(lambda: self.subquery_lookup(codes, None), options['repeat'])
+                national_latest = self.time_query(lambda: self.latest_lookup(codes, None), options['repeat'])
+                self.stdout.write(f'{rows:>12} {national_subquery:>15.2f} {national_latest:>19.2f}')
+
+            if region:
+                regional_subquery = self.time_query(lambda: self.subquery_lookup(codes, region), options['repeat'])
+                regional_latest = self.time_query(lambda: self.latest_lookup(codes, region), options['repeat'])
+                self.stdout.write(
+                    f'Regional lookup at {rows} rows: subquery {regional_subquery:.2f}ms, '
+                    f'latest table {regional_latest:.2f}ms'
+                )
+        finally:
+            if not options['keep']:
+                LatestIndicatorValue.objects.filter(indicator_id__in=indicator_ids).delete()
+                IndicatorValue.objects.filter(indicator_id__in=indicator_ids).delete()
+                Indicator.objects.filter(id__in=indicator_ids).delete()
+                Region.objects.filter(id__in=[r.id for r in regions]).delete()
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
+
+    def time_query(self, query, repeat):
+        """
+        Median wall time of a query in milliseconds.
+        """
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(query())
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def subquery_lookup(self, codes, region):
+        """
+        The correlated Max(date) subquery key_stats used before the latest table.
+        """
+        queryset = IndicatorValue.objects.select_related('indicator')
+        if region:
+            queryset = queryset.filter(region=region)
+        latest_dates = IndicatorValue.objects.filter(
+            indicator=OuterRef('indicator')
+        ).values('indicator').annotate(
+            max_date=Max('date')
+        ).values('max_date')
+        return queryset.filter(date=Subquery(latest_dates), indicator__code__in=codes)
+
+    def latest_lookup(self, codes, region):
+        """
+        The key_stats lookup on LatestIndicatorValue.
+        """
+        queryset = LatestIndicatorValue.objects.select_related('indicator').filter(
+            indicator__code__in=codes, sector__isnull=True
+        )
+        if region:
+            return queryset.filter(region=region)
+        return queryset.filter(region__isnull=True)
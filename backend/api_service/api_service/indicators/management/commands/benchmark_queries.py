@@ -0,0 +1,280 @@
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, models
+from api_service.indicators.latest import refresh_latest_values
+from api_service.indicators.models import Indicator, IndicatorValue, LatestIndicatorValue
+from api_service.regions.models import Region
+from api_service.sectors.models import Sector
+
+BENCH_PREFIX = 'bench_queries'
+
+# Indexes backing the time_series and list access paths
+ACCESS_PATH_INDEXES = ('indval_indicator_date_idx', 'indval_region_date_idx', 'indval_sector_date_idx')
+
+# Single-column foreign key indexes the access path indexes replaced
+FOREIGN_KEY_INDEXES = [
+    models.Index(fields=['indicator'], name='bench_indval_indicator_fk'),
+    models.Index(fields=['region'], name='bench_indval_region_fk'),
+    models.Index(fields=['sector'], name='bench_indval_sector_fk'),
+]
+
+class Command(BaseCommand):
+    help = 'Benchmark the indicator value queries of time_series, key_stats and list over a generated dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=2000000,
+            help='Indicator values generated',
+        )
+        parser.add_argument(
+            '--indicators',
+            type=int,
+            default=40,
+            help='Number of synthetic indicators',
+        )
+        parser.add_argument(
+            '--regions',
+            type=int,
+            default=18,
+            help='Number of synthetic regions, besides the national series',
+        )
+        parser.add_argument(
+            '--sectors',
+            type=int,
+            default=8,
+            help='Number of synthetic sectors, besides the all-sector series',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Seed of the generated values',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=10,
+            help='Runs per query; the median is reported',
+        )
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Also time the queries with the previous indexes and ordering',
+        )
+        parser.add_argument(
+            '--explain',
+            action='store_true',
+            help='Print the plan of each query',
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the generated data, to be reused by the next run',
+        )
+
+    def handle(self, *args, **options):
+        indicators = [
+            Indicator.objects.get_or_create(
+                code=f'{BENCH_PREFIX}_{i}', defaults={'name': f'Benchmark indicator {i}'}
+            )[0]
+            for i in range(options['indicators'])
+        ]
+        regions = [
+            Region.objects.get_or_create(
+                code=f'BQR{i}', defaults={'name': f'Benchmark region {i}'}
+            )[0]
+            for i in range(options['regions'])
+        ]
+        sectors = [
+            Sector.objects.get_or_create(
+                code=f'BQS{i}', defaults={'name': f'Benchmark sector {i}'}
+            )[0]
+            for i in range(options['sectors'])
+        ]
+        indicator_ids = [indicator.id for indicator in indicators]
+
+        try:
+            existing = IndicatorValue.objects.filter(indicator_id__in=indicator_ids).count()
+            if existing != options['rows']:
+                IndicatorValue.objects.filter(indicator_id__in=indicator_ids).delete()
+                self.generate(indicators, regions, sectors, options['rows'], options['seed'])
+                refresh_latest_values(indicator_ids=indicator_ids)
+            else:
+                self.stdout.write(f'Reusing {existing} generated values')
+            self.analyze()
+
+            queries = self.queries(indicators[0], regions[0], sectors[0])
+
+            if options['explain']:
+                for name, (query, _) in queries.items():
+                    self.stdout.write(f'{name}:\n{query().explain()}\n')
+
+            timings = {name: self.time_query(query, options['repeat']) for name, (query, _) in queries.items()}
+
+            previous = {}
+            if options['compare']:
+                with self.previous_indexes():
+                    previous = {
+                        name: self.time_query(previous_query or query, options['repeat'])
+                        for name, (query, previous_query) in queries.items()
+                    }
+
+            self.stdout.write(f'{"query":<36} {"current (ms)":>13} {"previous (ms)":>14} {"speedup":>8}')
+            for name, timing in timings.items():
+                if name in previous:
+                    self.stdout.write(
+                        f'{name:<36} {timing:>13.2f} {previous[name]:>14.2f} {previous[name] / timing:>7.1f}x'
+                    )
+                else:
+                    self.stdout.write(f'{name:<36} {timing:>13.2f}')
+        finally:
+            if not options['keep']:
+                LatestIndicatorValue.objects.filter(indicator_id__in=indicator_ids).delete()
+                IndicatorValue.objects.filter(indicator_id__in=indicator_ids).delete()
+                Indicator.objects.filter(id__in=indicator_ids).delete()
+                Region.objects.filter(id__in=[region.id for region in regions]).delete()
+                Sector.objects.filter(id__in=[sector.id for sector in sectors]).delete()
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
+
+    def generate(self, indicators, regions, sectors, rows, seed):
+        """
+        Insert rows values spread over every (indicator, region, sector)
+        series, one value per day and series, ending at the same date.
+        """
+        rng = random.Random(seed)
+        series = [
+            (indicator.id, region.id if region else None, sector.id if sector else None)
+            for indicator in indicators
+            for region in [None] + regions
+            for sector in [None] + sectors
+        ]
+        days = -(-rows // len(series))
+        first_date = date(2024, 12, 31) - timedelta(days=days - 1)
+        self.stdout.write(f'Generating {rows} values: {len(series)} series of up to {days} days')
+
+        batch = []
+        for position in range(rows):
+            indicator_id, region_id, sector_id = series[position % len(series)]
+            batch.append(IndicatorValue(
+                indicator_id=indicator_id,
+                region_id=region_id,
+                sector_id=sector_id,
+                value=round(rng.uniform(0, 1000), 2),
+                change_percent=round(rng.uniform(-10, 10), 2),
+                date=first_date + timedelta(days=position // len(series)),
+            ))
+            if len(batch) >= 10000:
+                IndicatorValue.objects.bulk_create(batch)
+                batch = []
+        IndicatorValue.objects.bulk_create(batch)
+
+    def analyze(self):
+        """
+        Refresh planner statistics after generating data.
+        """
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'ANALYZE {IndicatorValue._meta.db_table}')
+            elif connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+
+    def queries(self, indicator, region, sector):
+        """
+        The queries issued by time_series, key_stats and list, by name, with
+        the form they took before the current ordering where it differed.
+        """
+        latest_date = IndicatorValue.objects.filter(indicator=indicator).order_by('-date').values_list(
+            'date', flat=True
+        ).first()
+        year_ago = latest_date - timedelta(days=365)
+        values = IndicatorValue.objects.select_related('indicator', 'region', 'sector')
+
+        def series(**filters):
+            return IndicatorValue.objects.filter(**filters).order_by('date').values_list(
+                'date', 'value', 'change_percent'
+            )
+
+        return {
+            'time_series indicator': (lambda: series(indicator__code=indicator.code), None),
+            'time_series indicator, last year': (
+                lambda: series(indicator__code=indicator.code, date__gte=year_ago), None
+            ),
+            'time_series indicator+region': (
+                lambda: series(indicator__code=indicator.code, region__code=region.code), None
+            ),
+            'time_series indicator+region+sector': (
+                lambda: series(indicator__code=indicator.code, region__code=region.code, sector__code=sector.code),
+                None
+            ),
+            'key_stats national': (
+                lambda: LatestIndicatorValue.objects.select_related('indicator').filter(
+                    indicator__code__startswith=BENCH_PREFIX, region__isnull=True, sector__isnull=True
+                ),
+                None
+            ),
+            'list first page': (
+                lambda: values.order_by('-date', '-id')[:20],
+                lambda: values.order_by('-date', 'indicator__name')[:20]
+            ),
+            'list by indicator': (
+                lambda: values.filter(indicator__code=indicator.code).order_by('-date', '-id')[:20],
+                lambda: values.filter(indicator__code=indicator.code).order_by('-date', 'indicator__name')[:20]
+            ),
+            'list by region': (
+                lambda: values.filter(region__code=region.code).order_by('-date', '-id')[:20],
+                lambda: values.filter(region__code=region.code).order_by('-date', 'indicator__name')[:20]
+            ),
+            'list by sector': (
+                lambda: values.filter(sector__code=sector.code).order_by('-date', '-id')[:20],
+                lambda: values.filter(sector__code=sector.code).order_by('-date', 'indicator__name')[:20]
+            ),
+            'list by region, a year back': (
+                lambda: values.filter(region__code=region.code, date__lt=year_ago).order_by('-date', '-id')[:20],
+                lambda: values.filter(
+                    region__code=region.code, date__lt=year_ago
+                ).order_by('-date', 'indicator__name')[:20]
+            ),
+        }
+
+    @contextmanager
+    def previous_indexes(self):
+        """
+        Swap the access path indexes for the foreign key indexes they
+        replaced, and back on exit.
+        """
+        self.swap_indexes(previous=True)
+        try:
+            yield
+        finally:
+            self.swap_indexes(previous=False)
+
+    def swap_indexes(self, previous):
+        """
+        Drop the current or previous set of indexes and create the other.
+        """
+        current = [index for index in IndicatorValue._meta.indexes if index.name in ACCESS_PATH_INDEXES]
+        drop, create = (current, FOREIGN_KEY_INDEXES) if previous else (FOREIGN_KEY_INDEXES, current)
+        with connection.schema_editor() as schema_editor:
+            for index in drop:
+                schema_editor.remove_index(IndicatorValue, index)
+            for index in create:
+                schema_editor.add_index(IndicatorValue, index)
+        self.analyze()
+
+    def time_query(self, query, repeat):
+        """
+        Median wall time of a query in milliseconds.
+        """
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(query())
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,143 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from api_service.indicators.fast_serializers import (
+    KEY_STAT_FIELDS, VALUE_DETAIL_FIELDS, VALUE_FIELDS,
+    serialize_key_stats, serialize_value_details, serialize_values
+)
+from api_service.indicators.latest import refresh_latest_values
+from api_service.indicators.models import Indicator, IndicatorValue, LatestIndicatorValue
+from api_service.indicators.serializers import (
+    IndicatorValueSerializer, IndicatorValueDetailSerializer, KeyStatIndicatorSerializer
+)
+from api_service.regions.models import Region
+from api_service.sectors.models import Sector
+
+BENCH_PREFIX = 'bench_serializers'
+
+UNITS = ('%', '$', 'tonnes', '')
+
+class Command(BaseCommand):
+    help = 'Benchmark the per-row cost of the model serializers and the fast-path serializers of indicator values'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1000,
+            help='Indicator values serialized per run',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=10,
+            help='Runs per serializer; the median is reported',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Seed of the generated values',
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        indicators = [
+            Indicator.objects.get_or_create(
+                code=f'{BENCH_PREFIX}_{i}',
+                defaults={'name': f'Benchmark indicator {i}', 'unit': UNITS[i % len(UNITS)]}
+            )[0]
+            for i in range(len(UNITS) * 2)
+        ]
+        region = Region.objects.get_or_create(code='BSR', defaults={'name': 'Benchmark region'})[0]
+        sector = Sector.objects.get_or_create(code='BSS', defaults={'name': 'Benchmark sector'})[0]
+        indicator_ids = [indicator.id for indicator in indicators]
+
+        try:
+            self.generate(indicators, region, sector, rows, options['seed'])
+            refresh_latest_values(indicator_ids=indicator_ids)
+
+            values = IndicatorValue.objects.filter(indicator_id__in=indicator_ids).order_by('-date', '-id')
+            latest_values = LatestIndicatorValue.objects.filter(indicator_id__in=indicator_ids)
+            # Each case: (rows serialized, model serializer run, fast path run)
+            cases = {
+                'list': (
+                    rows,
+                    lambda: IndicatorValueSerializer(values.select_related('indicator'), many=True).data,
+                    lambda: serialize_values(values.values(*VALUE_FIELDS)),
+                ),
+                'list_detail': (
+                    rows,
+                    lambda: IndicatorValueDetailSerializer(
+                        values.select_related('indicator', 'region', 'sector'), many=True
+                    ).data,
+                    lambda: serialize_value_details(values.values(*VALUE_DETAIL_FIELDS)),
+                ),
+                'key_stats': (
+                    latest_values.count(),
+                    lambda: KeyStatIndicatorSerializer(latest_values.select_related('indicator'), many=True).data,
+                    lambda: serialize_key_stats(latest_values.values(*KEY_STAT_FIELDS)),
+                ),
+            }
+
+            renderer = JSONRenderer()
+            self.stdout.write(f'{"endpoint":<14} {"rows":>6} {"model (us/row)":>15} {"fast (us/row)":>14} {"speedup":>8}')
+            for name, (count, model_run, fast_run) in cases.items():
+                if renderer.render(model_run()) != renderer.render(fast_run()):
+                    raise CommandError(f'{name}: fast-path output differs from the model serializer')
+                model_time = self.time_run(model_run, options['repeat']) / max(count, 1)
+                fast_time = self.time_run(fast_run, options['repeat']) / max(count, 1)
+                self.stdout.write(
+                    f'{name:<14} {count:>6} {model_time:>15.1f} {fast_time:>14.1f} {model_time / fast_time:>7.1f}x'
+                )
+        finally:
+            LatestIndicatorValue.objects.filter(indicator_id__in=indicator_ids).delete()
+            IndicatorValue.objects.filter(indicator_id__in=indicator_ids).delete()
+            Indicator.objects.filter(id__in=indicator_ids).delete()
+            region.delete()
+            sector.delete()
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
+
+    def generate(self, indicators, region, sector, rows, seed):
+        """
+        Insert rows values cycling through national, regional and sectoral
+        series of every indicator, with and without optional fields.
+        """
+        rng = random.Random(seed)
+        series = [
+            (indicator, series_region, series_sector)
+            for indicator in indicators
+            for series_region, series_sector in ((None, None), (region, None), (region, sector))
+        ]
+        batch = []
+        for position in range(rows):
+            indicator, series_region, series_sector = series[position % len(series)]
+            batch.append(IndicatorValue(
+                indicator=indicator,
+                region=series_region,
+                sector=series_sector,
+                value=round(rng.uniform(0, 100000), 2),
+                previous_value=round(rng.uniform(0, 100000), 2) if position % 3 else None,
+                change_percent=round(rng.uniform(-10, 10), 2) if position % 5 else None,
+                date=date(2024, 12, 31) - timedelta(days=position // len(series)),
+                source_url=f'https://example.org/{position}' if position % 2 else None,
+                confidence_level=rng.random() if position % 4 else None,
+                is_estimate=position % 7 == 0,
+                metadata={'benchmark': position} if position % 2 else {},
+            ))
+        IndicatorValue.objects.bulk_create(batch, batch_size=5000)
+
+    def time_run(self, run, repeat):
+        """
+        Median wall time of a run in microseconds.
+        """
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) * 1000000)
+        return statistics.median(timings)
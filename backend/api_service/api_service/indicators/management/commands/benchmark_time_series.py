@@ -0,0 +1,119 @@
+import time
+import uuid
+from datetime import date, timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+from api_service.indicators.models import Indicator, IndicatorValue
+from api_service.indicators.views import IndicatorValueViewSet
+
+BENCH_CODE = 'bench_time_series'
+
+class Command(BaseCommand):
+    help = 'Compare time-to-first-byte and payload size of the time_series layouts with the ORM implementation they replaced'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--points',
+            type=int,
+            default=200000,
+            help='Number of daily values in the synthetic series',
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the synthetic series instead of deleting it afterwards',
+        )
+
+    def handle(self, *args, **options):
+        indicator, _ = Indicator.objects.get_or_create(
+            code=BENCH_CODE, defaults={'name': 'Benchmark time series', 'unit': '%'}
+        )
+        points = options['points']
+
+        try:
+            existing = IndicatorValue.objects.filter(indicator=indicator).count()
+            start_date = date(1900, 1, 1)
+            IndicatorValue.objects.bulk_create([
+                IndicatorValue(
+                    indicator=indicator,
+                    value=(offset * 7) % 1000 / 10,
+                    date=start_date + timedelta(days=offset),
+                    previous_value=((offset - 1) * 7) % 1000 / 10 if offset else None,
+                    change_percent=1.5 if offset else None,
+                )
+                for offset in range(existing, points)
+            ], batch_size=10000)
+
+            self.stdout.write(f'Series of {points} daily values')
+            self.stdout.write(f'{"":<22} {"first byte (ms)":>16} {"total (ms)":>11} {"bytes":>12}')
+            self.report('ORM objects (before)', self.legacy_response)
+            self.report('rows layout', lambda: self.view_response('rows'))
+            self.report('columnar layout', lambda: self.view_response('columnar'))
+        finally:
+            if not options['keep']:
+                IndicatorValue.objects.filter(indicator=indicator).delete()
+                indicator.delete()
+
+    def report(self, label, respond):
+        """
+        Time a response until its first byte and until its last byte.
+        """
+        start = time.perf_counter()
+        response = respond()
+        if response.streaming:
+            content = iter(response.streaming_content)
+            first = next(content)
+            first_byte = time.perf_counter() - start
+            size = len(first) + sum(len(chunk) for chunk in content)
+        else:
+            size = len(response.render().content)
+            first_byte = time.perf_counter() - start
+        total = time.perf_counter() - start
+        self.stdout.write(f'{label:<22} {first_byte * 1000:>16.1f} {total * 1000:>11.1f} {size:>12}')
+
+    def view_response(self, layout):
+        """
+        Call the time_series endpoint, bypassing its response cache.
+        """
+        request = APIRequestFactory().get('/time_series/', {
+            'indicator': BENCH_CODE, 'layout': layout, 'nocache': uuid.uuid4().hex
+        })
+        force_authenticate(request, user=User(username='benchmark'))
+        return IndicatorValueViewSet.as_view({'get': 'time_series'})(request)
+
+    def legacy_response(self):
+        """
+        The time_series implementation before the values_list layouts.
+        """
+        queryset = IndicatorValue.objects.all().select_related('indicator', 'region', 'sector').filter(
+            indicator__code=BENCH_CODE
+        ).order_by('date')
+
+        values = []
+        indicator_name = None
+        indicator_unit = None
+        for value in queryset:
+            if not indicator_name:
+                indicator_name = value.indicator.name
+                indicator_unit = value.indicator.unit
+            values.append({
+                'date': value.date,
+                'value': value.value,
+                'change_percent': value.change_percent
+            })
+
+        data = {
+            'indicator_code': BENCH_CODE,
+            'indicator_name': indicator_name,
+            'indicator_unit': indicator_unit,
+            'values': values
+        }
+
+        class Rendered:
+            streaming = False
+            def render(self):
+                self.content = JSONRenderer().render(data)
+                return self
+        return Rendered()
@@ -0,0 +1,21 @@
+import logging
+from django.core.management.base import BaseCommand, CommandError
+from django.core.exceptions import ImproperlyConfigured
+from api_service.indicators.snapshots import build_snapshots, snapshot_path, SNAPSHOT_FORMATS
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Build the Arrow IPC and Parquet snapshots of all indicator values'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Building indicator snapshots...'))
+        
+        try:
+            result = build_snapshots()
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+        
+        for snapshot_format in SNAPSHOT_FORMATS:
+            self.stdout.write(f'{snapshot_path(snapshot_format)}: {result[snapshot_format]} bytes')
+        self.stdout.write(self.style.SUCCESS(f'Wrote {result["rows"]} indicator values'))
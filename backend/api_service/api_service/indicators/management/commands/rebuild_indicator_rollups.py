@@ -0,0 +1,41 @@
+import logging
+from django.core.management.base import BaseCommand, CommandError
+from api_service.indicators.models import Indicator
+from api_service.indicators.rollups import refresh_rollups
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Rebuild monthly, quarterly and annual rollups of indicator values'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--indicators',
+            nargs='+',
+            help='Indicator codes to rebuild (default: all indicators)',
+        )
+        
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of rows written per bulk insert',
+        )
+
+    def handle(self, *args, **options):
+        indicator_ids = None
+        
+        if options.get('indicators'):
+            indicators = dict(
+                Indicator.objects.filter(code__in=options['indicators']).values_list('code', 'id')
+            )
+            unknown = set(options['indicators']) - set(indicators)
+            if unknown:
+                raise CommandError(f'Unknown indicator codes: {", ".join(sorted(unknown))}')
+            indicator_ids = list(indicators.values())
+        
+        self.stdout.write(self.style.SUCCESS('Rebuilding indicator rollups...'))
+        
+        written = refresh_rollups(indicator_ids=indicator_ids, batch_size=options['batch_size'])
+        
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} rollups'))
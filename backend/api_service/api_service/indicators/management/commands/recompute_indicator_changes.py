@@ -0,0 +1,41 @@
+import logging
+from django.core.management.base import BaseCommand, CommandError
+from api_service.indicators.changes import recompute_changes
+from api_service.indicators.models import Indicator
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Recompute previous_value and change_percent for indicator value series'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--indicators',
+            nargs='+',
+            help='Indicator codes to recompute (default: all indicators)',
+        )
+        
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of rows written per bulk update',
+        )
+
+    def handle(self, *args, **options):
+        indicator_ids = None
+        
+        if options.get('indicators'):
+            indicators = dict(
+                Indicator.objects.filter(code__in=options['indicators']).values_list('code', 'id')
+            )
+            unknown = set(options['indicators']) - set(indicators)
+            if unknown:
+                raise CommandError(f'Unknown indicator codes: {", ".join(sorted(unknown))}')
+            indicator_ids = list(indicators.values())
+        
+        self.stdout.write(self.style.SUCCESS('Recomputing indicator value changes...'))
+        
+        updated = recompute_changes(indicator_ids=indicator_ids, batch_size=options['batch_size'])
+        
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} indicator values'))
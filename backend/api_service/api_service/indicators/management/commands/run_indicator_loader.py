@@ -0,0 +1,43 @@
+import logging
+from django.core.management.base import BaseCommand
+from api_service.indicators.consumer import IndicatorLoaderConsumer
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Bulk-load processed scraper records from the message queue into indicator values'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--drain',
+            action='store_true',
+            help='Exit once the queue is empty instead of waiting for new messages',
+        )
+        
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Number of indicator values written per bulk statement',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Starting indicator loader...'))
+        
+        consumer = IndicatorLoaderConsumer(
+            drain=options['drain'],
+            batch_size=options['batch_size']
+        )
+        
+        try:
+            consumer.consume()
+            
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS('Received keyboard interrupt, stopping indicator loader'))
+            consumer.stop()
+            
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Error running indicator loader: {str(e)}'))
+            logger.exception('Error in run_indicator_loader command')
+            
+        self.stdout.write(self.style.SUCCESS('Indicator loader finished'))
@@ -30,24 +30,29 @@ class IndicatorValue(models.Model):
     Individual indicator value model.
     Associates a value with an indicator for a specific region, sector, and date.
     """
+    # The foreign keys lead the composite indexes below, which replace
+    # their single-column indexes
     indicator = models.ForeignKey(
         Indicator, 
         on_delete=models.CASCADE,
-        related_name='values'
+        related_name='values',
+        db_index=False
     )
     region = models.ForeignKey(
         Region, 
         on_delete=models.CASCADE,
         related_name='indicator_values',
         null=True, 
-        blank=True
+        blank=True,
+        db_index=False
     )
     sector = models.ForeignKey(
         Sector,
         on_delete=models.CASCADE,
         related_name='indicator_values',
         null=True,
-        blank=True
+        blank=True,
+        db_index=False
     )
     value = models.FloatField()
     date = models.DateField()
@@ -73,9 +78,27 @@ class IndicatorValue(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
-        ordering = ['-date', 'indicator__name']
-        # Ensure uniqueness for indicator-region-sector-date combination
+        # Newest first, in the keyset pagination order; sorting by indicator
+        # name needed a join on every query without an explicit order
+        ordering = ['-date', '-id']
+        # Ensure uniqueness for indicator-region-sector-date combination.
+        # Also serves lookups of a single series and the loader's upserts.
         unique_together = ['indicator', 'region', 'sector', 'date']
+        indexes = [
+            # Keyset pagination order
+            models.Index(fields=['date', 'id']),
+            # time_series of an indicator across regions and sectors, covering
+            # its (date, value, change_percent) rows on PostgreSQL; list
+            # filtered by indicator
+            models.Index(
+                fields=['indicator', 'date', 'id'],
+                include=['value', 'change_percent'],
+                name='indval_indicator_date_idx'
+            ),
+            # list filtered by region or sector, dashboard payloads by region
+            models.Index(fields=['region', 'date', 'id'], name='indval_region_date_idx'),
+            models.Index(fields=['sector', 'date', 'id'], name='indval_sector_date_idx'),
+        ]
         
     def __str__(self):
         region_name = self.region.name if self.region else "National"
@@ -89,3 +112,125 @@ class IndicatorValue(models.Model):
         if self.previous_value is not None and self.previous_value != 0:
             self.change_percent = ((self.value - self.previous_value) / self.previous_value) * 100
         super().save(*args, **kwargs)
+
+class LatestIndicatorValue(models.Model):
+    """
+    Latest value of each (indicator, region, sector) series.
+    Maintained by the indicator loader so key stats are a single indexed lookup.
+    """
+    indicator = models.ForeignKey(
+        Indicator,
+        on_delete=models.CASCADE,
+        related_name='latest_values'
+    )
+    region = models.ForeignKey(
+        Region,
+        on_delete=models.CASCADE,
+        related_name='latest_indicator_values',
+        null=True,
+        blank=True
+    )
+    sector = models.ForeignKey(
+        Sector,
+        on_delete=models.CASCADE,
+        related_name='latest_indicator_values',
+        null=True,
+        blank=True
+    )
+    indicator_value = models.OneToOneField(
+        IndicatorValue,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    value = models.FloatField()
+    date = models.DateField()
+    previous_value = models.FloatField(null=True, blank=True)
+    change_percent = models.FloatField(null=True, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['indicator__name']
+        indexes = [
+            models.Index(fields=['indicator', 'region', 'sector']),
+        ]
+        
+    def __str__(self):
+        region_name = self.region.name if self.region else "National"
+        sector_name = self.sector.name if self.sector else "All Sectors"
+        return f"{self.indicator.name} - {region_name} - {sector_name} - {self.date}"
+
+class IndicatorRollup(models.Model):
+    """
+    Aggregate of a series' values over a month, quarter or year.
+    Maintained by the indicator loader so aggregated views never scan raw values.
+    """
+    GRANULARITY_MONTH = 'month'
+    GRANULARITY_QUARTER = 'quarter'
+    GRANULARITY_YEAR = 'year'
+    
+    GRANULARITY_CHOICES = [
+        (GRANULARITY_MONTH, 'Monthly'),
+        (GRANULARITY_QUARTER, 'Quarterly'),
+        (GRANULARITY_YEAR, 'Annual'),
+    ]
+    
+    indicator = models.ForeignKey(
+        Indicator,
+        on_delete=models.CASCADE,
+        related_name='rollups'
+    )
+    region = models.ForeignKey(
+        Region,
+        on_delete=models.CASCADE,
+        related_name='indicator_rollups',
+        null=True,
+        blank=True
+    )
+    sector = models.ForeignKey(
+        Sector,
+        on_delete=models.CASCADE,
+        related_name='indicator_rollups',
+        null=True,
+        blank=True
+    )
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES)
+    # First day of the period
+    period_start = models.DateField()
+    
+    count = models.IntegerField()
+    sum = models.FloatField()
+    mean = models.FloatField()
+    min = models.FloatField()
+    max = models.FloatField()
+    # Value on the latest date within the period
+    last = models.FloatField()
+    last_date = models.DateField()
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['period_start']
+        indexes = [
+            models.Index(fields=['indicator', 'granularity', 'region', 'sector', 'period_start']),
+        ]
+        
+    def __str__(self):
+        return f"{self.indicator.name} - {self.granularity} - {self.period_start}"
+
+class DatasetVersion(models.Model):
+    """
+    Counter bumped whenever the data in its scope changes.
+    Scopes are 'global', 'metadata', 'indicator:<code>' and 'region:<code>';
+    response ETags are derived from them.
+    """
+    scope = models.CharField(max_length=100, unique=True)
+    version = models.BigIntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['scope']
+        
+    def __str__(self):
+        return f"{self.scope}: {self.version}"
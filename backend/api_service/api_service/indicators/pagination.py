@@ -0,0 +1,22 @@
+from rest_framework.pagination import CursorPagination
+
+class IndicatorValueCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the (date, id) index of indicator values.
+    
+    Every page is a range scan from the cursor position, so deep pages cost
+    the same as the first and no COUNT(*) is run. Other endpoints keep the
+    global LimitOffsetPagination.
+    """
+    ordering = ('-date', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    
+    def get_ordering(self, request, queryset, view):
+        """
+        Requested ordering with id appended, so the cursor position is unique.
+        """
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip('-') == 'id' for field in ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
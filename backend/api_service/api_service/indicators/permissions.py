@@ -0,0 +1,21 @@
+from django.conf import settings
+from rest_framework import permissions
+
+class CanExportData(permissions.BasePermission):
+    """
+    Allows access to users whose token role grants the export_data permission.
+    
+    Roles are issued by the auth service as the 'role' claim of the JWT.
+    """
+    message = 'Exporting data requires the export_data permission.'
+    
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return False
+        if request.user.is_superuser:
+            return True
+        
+        roles = getattr(settings, 'INDICATOR_EXPORT', {}).get('roles', [])
+        token = request.auth
+        role = token.get('role') if hasattr(token, 'get') else None
+        return role in roles
@@ -0,0 +1,142 @@
+"""
+Maintenance of IndicatorRollup.
+
+After a load the rollups of every touched series are rebuilt for the years
+the loaded values fall in, the coarsest period any granularity covers, from
+the raw values of those years only.
+"""
+import logging
+from datetime import date
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q
+
+from .changes import compute_change_percent
+from .models import IndicatorRollup, IndicatorValue
+
+logger = logging.getLogger(__name__)
+
+# Number of series whose rollups are rebuilt together
+SERIES_PER_QUERY = 200
+
+AGGREGATES = ('count', 'sum', 'mean', 'min', 'max', 'last')
+
+
+def period_start(value_date, granularity):
+    """
+    First day of the period of a granularity containing a date.
+    """
+    if granularity == IndicatorRollup.GRANULARITY_MONTH:
+        return value_date.replace(day=1)
+    if granularity == IndicatorRollup.GRANULARITY_QUARTER:
+        return date(value_date.year, (value_date.month - 1) // 3 * 3 + 1, 1)
+    return date(value_date.year, 1, 1)
+
+
+def _rollup_filters(series=None, indicator_ids=None):
+    """
+    Pairs of (values filter, rollups filter) covering the periods to rebuild.
+    """
+    if series is None:
+        if indicator_ids is None:
+            indicator_ids = IndicatorValue.objects.order_by().values_list('indicator_id', flat=True).distinct()
+        return [(Q(indicator_id=indicator_id), Q(indicator_id=indicator_id)) for indicator_id in indicator_ids]
+
+    items = list(series.items())
+    filters = []
+    for start in range(0, len(items), SERIES_PER_QUERY):
+        values_filters = []
+        rollups_filters = []
+        for (indicator_id, region_id, sector_id), (min_date, max_date) in items[start:start + SERIES_PER_QUERY]:
+            first_day = date(min_date.year, 1, 1)
+            last_day = date(max_date.year, 12, 31)
+            key = {'indicator_id': indicator_id, 'region_id': region_id, 'sector_id': sector_id}
+            values_filters.append(Q(date__gte=first_day, date__lte=last_day, **key))
+            rollups_filters.append(Q(period_start__gte=first_day, period_start__lte=last_day, **key))
+        filters.append((reduce(or_, values_filters), reduce(or_, rollups_filters)))
+    return filters
+
+
+def _aggregate(rows):
+    """
+    Build rollups of every granularity from (indicator_id, region_id,
+    sector_id, date, value) rows ordered by date.
+    """
+    totals = {}
+    for indicator_id, region_id, sector_id, value_date, value in rows:
+        for granularity, _ in IndicatorRollup.GRANULARITY_CHOICES:
+            key = (indicator_id, region_id, sector_id, granularity, period_start(value_date, granularity))
+            total = totals.get(key)
+            if total is None:
+                totals[key] = [1, value, value, value, value, value_date]
+            else:
+                total[0] += 1
+                total[1] += value
+                total[2] = min(total[2], value)
+                total[3] = max(total[3], value)
+                total[4] = value
+                total[5] = value_date
+
+    return [
+        IndicatorRollup(
+            indicator_id=indicator_id,
+            region_id=region_id,
+            sector_id=sector_id,
+            granularity=granularity,
+            period_start=start,
+            count=count,
+            sum=total_sum,
+            mean=total_sum / count,
+            min=minimum,
+            max=maximum,
+            last=last,
+            last_date=last_date,
+        )
+        for (indicator_id, region_id, sector_id, granularity, start), (count, total_sum, minimum, maximum, last, last_date)
+        in totals.items()
+    ]
+
+
+def refresh_rollups(series=None, indicator_ids=None, batch_size=5000):
+    """
+    Rebuild rollups for the periods touched by a load.
+
+    Args:
+        series: {(indicator_id, region_id, sector_id): [min_date, max_date]},
+            or None to rebuild every period
+        indicator_ids: Restrict a full rebuild to these indicators
+        batch_size: Rows per bulk_create statement
+
+    Returns:
+        int: Number of rollups written
+    """
+    written = 0
+
+    for values_filter, rollups_filter in _rollup_filters(series, indicator_ids):
+        rows = IndicatorValue.objects.filter(values_filter).order_by('date').values_list(
+            'indicator_id', 'region_id', 'sector_id', 'date', 'value'
+        )
+        rollups = _aggregate(rows.iterator(chunk_size=batch_size))
+
+        with transaction.atomic():
+            IndicatorRollup.objects.filter(rollups_filter).delete()
+            IndicatorRollup.objects.bulk_create(rollups, batch_size=batch_size)
+        written += len(rollups)
+
+    logger.info(f"Refreshed rollups: {written} periods")
+    return written
+
+
+def rollup_rows(queryset, aggregate):
+    """
+    (period_start, value, change_percent) rows of a rollup queryset, with the
+    change computed against the previous period.
+    """
+    previous = None
+    rows = []
+    for start, value in queryset.order_by('period_start').values_list('period_start', aggregate):
+        rows.append((start, value, compute_change_percent(value, previous)))
+        previous = value
+    return rows
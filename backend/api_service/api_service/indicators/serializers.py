@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Indicator, IndicatorValue
+from .models import Indicator, IndicatorValue, LatestIndicatorValue
 from api_service.regions.serializers import RegionSerializer
 from api_service.sectors.serializers import SectorSerializer
 
@@ -65,6 +65,7 @@ class KeyStatIndicatorSerializer(serializers.ModelSerializer):
     Serializer for key statistical indicators table shown on the dashboard.
     Formatted for easy consumption by the frontend.
     """
+    id = serializers.ReadOnlyField(source='indicator_value_id')
     indicator_name = serializers.ReadOnlyField(source='indicator.name')
     indicator_unit = serializers.ReadOnlyField(source='indicator.unit')
     formatted_value = serializers.SerializerMethodField()
@@ -72,9 +73,9 @@ class KeyStatIndicatorSerializer(serializers.ModelSerializer):
     last_updated = serializers.SerializerMethodField()
     
     class Meta:
-        model = IndicatorValue
+        model = LatestIndicatorValue
         fields = [
-            'id', 'indicator_name', 'formatted_value', 
+            'id', 'indicator_name', 'indicator_unit', 'formatted_value', 
             'change_percent', 'trend', 'last_updated'
         ]
     
@@ -0,0 +1,278 @@
+"""
+Time series responses built from values_list rows.
+
+Series are read as (date, value, change_percent) tuples without instantiating
+models and rendered in one of two layouts:
+
+    rows      {"values": [{"date", "value", "change_percent"}, ...]}
+    columnar  {"dates": [...], "values": [...], "change_percents": [...]}
+
+Series longer than TIME_SERIES['stream_threshold'] points are streamed, with
+the JSON encoded chunk by chunk while the rows are read from the database.
+
+Batches of series are read in one grouped query and cached per series, so a
+batch only queries the series missing from the cache. Cache keys include the
+dataset versions of the indicators (see versions.py), so a load touching an
+indicator invalidates its cached series.
+
+With max_points a series is downsampled with LTTB (see downsample.py) and the
+kept rows are cached per series, range and max_points.
+"""
+import json
+import math
+from functools import reduce
+from itertools import chain, islice
+from operator import or_
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from rest_framework.response import Response
+
+from .downsample import downsample_rows
+from .export import _chunks
+from .models import Indicator, IndicatorValue
+from .versions import METADATA_SCOPE, get_versions, indicator_scope
+
+LAYOUT_ROWS = 'rows'
+LAYOUT_COLUMNAR = 'columnar'
+LAYOUTS = (LAYOUT_ROWS, LAYOUT_COLUMNAR)
+
+
+def series_config():
+    """
+    Time series response settings.
+    """
+    return getattr(settings, 'TIME_SERIES', {})
+
+
+def series_metadata(indicator_code):
+    """
+    Leading fields of a time series response.
+    """
+    name, unit = Indicator.objects.filter(code=indicator_code).values_list('name', 'unit').first() or (None, None)
+    return {
+        'indicator_code': indicator_code,
+        'indicator_name': name,
+        'indicator_unit': unit,
+    }
+
+
+def series_rows(queryset):
+    """
+    (date, value, change_percent) rows of a series queryset, ordered by date.
+    """
+    return queryset.order_by('date').values_list('date', 'value', 'change_percent')
+
+
+def build_series(metadata, rows, layout=LAYOUT_ROWS):
+    """
+    Response data of a series in the given layout.
+    """
+    data = dict(metadata)
+    if layout == LAYOUT_COLUMNAR:
+        rows = list(rows)
+        data['dates'] = [row[0] for row in rows]
+        data['values'] = [row[1] for row in rows]
+        data['change_percents'] = [row[2] for row in rows]
+    else:
+        data['values'] = [
+            {'date': value_date, 'value': value, 'change_percent': change_percent}
+            for value_date, value, change_percent in rows
+        ]
+    return data
+
+
+def _encode(value):
+    """
+    Compact JSON of a scalar; NaN and infinities are null, as orjson renders them.
+    """
+    if isinstance(value, float) and not math.isfinite(value):
+        return 'null'
+    return json.dumps(value)
+
+
+def _metadata_prefix(metadata):
+    """
+    Opening of a streamed response up to the first array.
+    """
+    return json.dumps(metadata, separators=(',', ':'))[:-1]
+
+
+def stream_series(metadata, rows, layout=LAYOUT_ROWS, chunk_size=2000):
+    """
+    Yield the JSON of a series in chunks of rows.
+
+    The columnar layout streams the dates as they are read and keeps the
+    values and changes as encoded strings until the dates are complete.
+    """
+    yield _metadata_prefix(metadata)
+
+    if layout == LAYOUT_COLUMNAR:
+        values = []
+        change_percents = []
+        yield ',"dates":['
+        separator = ''
+        for chunk in _chunks(rows, chunk_size):
+            yield separator + ','.join(f'"{value_date.isoformat()}"' for value_date, _, _ in chunk)
+            separator = ','
+            values.extend(_encode(value) for _, value, _ in chunk)
+            change_percents.extend(_encode(change_percent) for _, _, change_percent in chunk)
+        yield '],"values":[' + ','.join(values)
+        yield '],"change_percents":[' + ','.join(change_percents) + ']}'
+        return
+
+    yield ',"values":['
+    separator = ''
+    for chunk in _chunks(rows, chunk_size):
+        yield separator + ','.join(
+            f'{{"date":"{value_date.isoformat()}","value":{_encode(value)},'
+            f'"change_percent":{_encode(change_percent)}}}'
+            for value_date, value, change_percent in chunk
+        )
+        separator = ','
+    yield ']}'
+
+
+def series_response(metadata, rows, layout=LAYOUT_ROWS):
+    """
+    Response for a series: rendered normally when short, streamed when the
+    series has more than TIME_SERIES['stream_threshold'] points.
+
+    Args:
+        metadata: Leading fields of the response
+        rows: Queryset or iterable of (date, value, change_percent) rows
+        layout: LAYOUT_ROWS or LAYOUT_COLUMNAR
+    """
+    config = series_config()
+    threshold = config.get('stream_threshold', 5000)
+    chunk_size = config.get('stream_chunk_size', 2000)
+
+    if hasattr(rows, 'iterator'):
+        rows = rows.iterator(chunk_size=chunk_size)
+    rows = iter(rows)
+
+    head = list(islice(rows, threshold + 1))
+    if len(head) <= threshold:
+        return Response(build_series(metadata, head, layout))
+
+    return StreamingHttpResponse(
+        stream_series(metadata, chain(head, rows), layout, chunk_size),
+        content_type='application/json'
+    )
+
+
+def _selector_filter(selector):
+    """
+    Filter matching the values of a batch selector.
+    """
+    selector_filter = Q(indicator__code=selector['indicator'])
+    if selector.get('region'):
+        selector_filter &= Q(region__code=selector['region'])
+    if selector.get('sector'):
+        selector_filter &= Q(sector__code=selector['sector'])
+    return selector_filter
+
+
+def series_cache_key(prefix, *parts):
+    """
+    Cache key of a series; empty or missing parts are left blank.
+    """
+    return ':'.join([prefix] + [str(part) if part is not None else '' for part in parts])
+
+
+def _selector_cache_key(selector, from_date, to_date, layout, versions):
+    """
+    Cache key of one series of a batch at the current dataset versions.
+    """
+    return series_cache_key(
+        'time_series_batch', versions[METADATA_SCOPE], versions[indicator_scope(selector['indicator'])],
+        layout, selector['indicator'], selector.get('region'), selector.get('sector'), from_date, to_date,
+    )
+
+
+def downsampled_rows(queryset, max_points, cache_key):
+    """
+    Rows of a series downsampled to at most max_points, cached under cache_key.
+    """
+    rows = cache.get(cache_key)
+    if rows is None:
+        rows = downsample_rows(series_rows(queryset), max_points)
+        cache.set(cache_key, rows, getattr(settings, 'CACHE_TTL', {}).get('indicators', 600))
+    return rows
+
+
+def build_series_batch(selectors, from_date=None, to_date=None, layout=LAYOUT_ROWS):
+    """
+    Build several series with a single grouped query.
+
+    A selector without a region or sector matches the values of every
+    region or sector, as time_series does. Series found in the cache are
+    reused and only the others are queried.
+
+    Args:
+        selectors: List of {'indicator', 'region', 'sector'} dicts
+        from_date, to_date: Optional ISO date range applied to every series
+        layout: LAYOUT_ROWS or LAYOUT_COLUMNAR
+
+    Returns:
+        list: Series data in selector order
+    """
+    timeout = getattr(settings, 'CACHE_TTL', {}).get('indicators', 600)
+    versions = get_versions(
+        {METADATA_SCOPE} | {indicator_scope(selector['indicator']) for selector in selectors}
+    )
+    keys = [_selector_cache_key(selector, from_date, to_date, layout, versions) for selector in selectors]
+    cached = cache.get_many(keys)
+
+    missing = [
+        (index, selector)
+        for index, (key, selector) in enumerate(zip(keys, selectors))
+        if key not in cached
+    ]
+
+    built = {}
+    if missing:
+        queryset = IndicatorValue.objects.filter(
+            reduce(or_, (_selector_filter(selector) for _, selector in missing))
+        )
+        if from_date:
+            queryset = queryset.filter(date__gte=from_date)
+        if to_date:
+            queryset = queryset.filter(date__lte=to_date)
+
+        # Selectors by indicator, to assign each row to the series it belongs to
+        by_indicator = {}
+        for index, selector in missing:
+            by_indicator.setdefault(selector['indicator'], []).append((index, selector))
+
+        rows = {index: [] for index, _ in missing}
+        for code, region_code, sector_code, value_date, value, change_percent in queryset.order_by('date').values_list(
+            'indicator__code', 'region__code', 'sector__code', 'date', 'value', 'change_percent'
+        ):
+            for index, selector in by_indicator[code]:
+                if selector.get('region') and selector['region'] != region_code:
+                    continue
+                if selector.get('sector') and selector['sector'] != sector_code:
+                    continue
+                rows[index].append((value_date, value, change_percent))
+
+        indicators = {
+            code: (name, unit)
+            for code, name, unit in Indicator.objects.filter(code__in=by_indicator).values_list('code', 'name', 'unit')
+        }
+        for index, selector in missing:
+            name, unit = indicators.get(selector['indicator'], (None, None))
+            metadata = {
+                'indicator_code': selector['indicator'],
+                'indicator_name': name,
+                'indicator_unit': unit,
+                'region': selector.get('region'),
+                'sector': selector.get('sector'),
+            }
+            built[keys[index]] = build_series(metadata, rows[index], layout)
+
+        cache.set_many(built, timeout)
+
+    return [cached.get(key) or built[key] for key in keys]
@@ -0,0 +1,287 @@
+"""
+Apache Arrow IPC and Parquet snapshots of all indicator values.
+
+Values are written with their indicator, region and sector codes as
+dictionary-encoded columns, so each code is stored once per file rather than
+once per row. The dictionaries are built up front from the dimension tables
+and value rows are read without joins, in batches from a server-side cursor.
+Files are written next to the published ones and swapped in atomically.
+
+The loader requests a rebuild after every load. Rebuilds run on a background
+thread, one at a time, and start at most once per rebuild_interval seconds;
+loads finishing during a rebuild or the wait before it are covered by the
+next one.
+
+pyarrow is imported when a snapshot is built, so the service runs without it
+as long as snapshots are not used.
+"""
+import logging
+import os
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import http_date, parse_http_date_safe
+
+from api_service.regions.models import Region
+from api_service.sectors.models import Sector
+from .export import _chunks
+from .models import Indicator, IndicatorValue
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_ARROW = 'arrow'
+SNAPSHOT_PARQUET = 'parquet'
+SNAPSHOT_FORMATS = (SNAPSHOT_ARROW, SNAPSHOT_PARQUET)
+
+CONTENT_TYPES = {
+    SNAPSHOT_ARROW: 'application/vnd.apache.arrow.file',
+    SNAPSHOT_PARQUET: 'application/vnd.apache.parquet',
+}
+
+# Bytes read per chunk when serving a range
+RANGE_CHUNK_SIZE = 64 * 1024
+
+_rebuild_lock = threading.Lock()
+_rebuild_state = {'running': False, 'pending': False, 'last_started': None}
+
+
+def snapshot_config():
+    """
+    Snapshot settings.
+    """
+    return getattr(settings, 'INDICATOR_SNAPSHOTS', {})
+
+
+def snapshot_path(snapshot_format):
+    """
+    Path of the published snapshot file of a format.
+    """
+    return os.path.join(snapshot_config().get('directory', 'snapshots'), f'indicator_values.{snapshot_format}')
+
+
+def _pyarrow():
+    """
+    Import pyarrow and pyarrow.parquet.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImproperlyConfigured('pyarrow is required to build indicator snapshots')
+    return pyarrow, pyarrow.parquet
+
+
+def _dimension(pa, model):
+    """
+    Dictionary of a dimension's codes and the position of each id in it.
+    """
+    ids, codes = [], []
+    for pk, code in model.objects.order_by('id').values_list('id', 'code'):
+        ids.append(pk)
+        codes.append(code)
+    return pa.array(codes, pa.string()), {pk: position for position, pk in enumerate(ids)}
+
+
+def build_snapshots():
+    """
+    Write the Arrow IPC and Parquet snapshots of all indicator values.
+
+    Returns:
+        dict: Row count and file size per format
+    """
+    pa, pq = _pyarrow()
+    config = snapshot_config()
+    batch_size = config.get('batch_size', 100000)
+    compression = config.get('compression', 'zstd')
+    os.makedirs(config.get('directory', 'snapshots'), exist_ok=True)
+
+    dimension_type = pa.dictionary(pa.int32(), pa.string())
+    schema = pa.schema([
+        ('indicator_code', dimension_type),
+        ('region_code', dimension_type),
+        ('sector_code', dimension_type),
+        ('date', pa.date32()),
+        ('value', pa.float64()),
+        ('previous_value', pa.float64()),
+        ('change_percent', pa.float64()),
+        ('is_estimate', pa.bool_()),
+        ('is_preliminary', pa.bool_()),
+    ])
+    dimensions = [_dimension(pa, model) for model in (Indicator, Region, Sector)]
+
+    # Series order keeps each series' values together, which compresses well
+    rows = IndicatorValue.objects.order_by('indicator_id', 'region_id', 'sector_id', 'date').values_list(
+        'indicator_id', 'region_id', 'sector_id', 'date', 'value',
+        'previous_value', 'change_percent', 'is_estimate', 'is_preliminary'
+    ).iterator(chunk_size=batch_size)
+
+    arrow_path = snapshot_path(SNAPSHOT_ARROW)
+    parquet_path = snapshot_path(SNAPSHOT_PARQUET)
+    arrow_tmp = f'{arrow_path}.tmp'
+    parquet_tmp = f'{parquet_path}.tmp'
+
+    count = 0
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.OSFile(arrow_tmp, 'wb') as sink, \
+            pa.ipc.new_file(sink, schema, options=options) as arrow_writer, \
+            pq.ParquetWriter(parquet_tmp, schema, compression=compression) as parquet_writer:
+        for chunk in _chunks(rows, batch_size):
+            columns = list(zip(*chunk))
+            arrays = [
+                pa.DictionaryArray.from_arrays(
+                    pa.array([positions.get(pk) for pk in ids], pa.int32()), dictionary
+                )
+                for ids, (dictionary, positions) in zip(columns[:3], dimensions)
+            ]
+            arrays += [
+                pa.array(column, field.type)
+                for column, field in zip(columns[3:], list(schema)[3:])
+            ]
+            batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+            arrow_writer.write_batch(batch)
+            parquet_writer.write_batch(batch)
+            count += len(chunk)
+
+    os.replace(arrow_tmp, arrow_path)
+    os.replace(parquet_tmp, parquet_path)
+
+    result = {
+        'rows': count,
+        SNAPSHOT_ARROW: os.path.getsize(arrow_path),
+        SNAPSHOT_PARQUET: os.path.getsize(parquet_path),
+    }
+    logger.info(f"Built indicator snapshots: {result}")
+    return result
+
+
+def request_rebuild():
+    """
+    Rebuild the snapshots in the background after a load.
+    """
+    if not snapshot_config().get('rebuild_on_load', True):
+        return
+
+    with _rebuild_lock:
+        if _rebuild_state['running']:
+            _rebuild_state['pending'] = True
+            return
+        _rebuild_state['running'] = True
+
+    threading.Thread(target=_rebuild_until_current, name='indicator-snapshots', daemon=True).start()
+
+
+def _rebuild_until_current():
+    """
+    Rebuild until no load has finished since the last rebuild started.
+    """
+    try:
+        while True:
+            # Loads finishing while waiting are covered by this rebuild
+            interval = snapshot_config().get('rebuild_interval', 300)
+            last_started = _rebuild_state['last_started']
+            if last_started is not None:
+                wait = last_started + interval - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+
+            with _rebuild_lock:
+                _rebuild_state['pending'] = False
+                _rebuild_state['last_started'] = time.monotonic()
+
+            try:
+                build_snapshots()
+            except Exception as e:
+                logger.error(f"Error building indicator snapshots: {str(e)}")
+
+            with _rebuild_lock:
+                if not _rebuild_state['pending']:
+                    _rebuild_state['running'] = False
+                    return
+    finally:
+        connection.close()
+
+
+def _read_range(file, length):
+    """
+    Yield length bytes of an open file from its current position, then close it.
+    """
+    try:
+        while length > 0:
+            data = file.read(min(RANGE_CHUNK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+    finally:
+        file.close()
+
+
+def _if_range_matches(request, etag, last_modified):
+    """
+    Whether a range request may be served as a range: it has no If-Range, or
+    its If-Range is the current (strong) ETag or exact modification time.
+    """
+    if_range = request.META.get('HTTP_IF_RANGE', '').strip()
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def snapshot_response(request, snapshot_format):
+    """
+    Serve a snapshot file, honouring a single byte range unless If-Range
+    names an older version of the file.
+
+    Returns:
+        HttpResponse: The file, a 206 partial response, a 416 for an
+            unsatisfiable range, or None if the snapshot has not been built
+    """
+    path = snapshot_path(snapshot_format)
+    try:
+        file = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+
+    stat = os.fstat(file.fileno())
+    size = stat.st_size
+    filename = os.path.basename(path)
+    content_type = CONTENT_TYPES[snapshot_format]
+    last_modified = int(stat.st_mtime)
+    etag = f'"{int(stat.st_mtime_ns):x}-{size:x}"'
+
+    match = re.fullmatch(r'bytes=(\d*)-(\d*)', request.META.get('HTTP_RANGE', '').strip())
+    if match and any(match.groups()) and _if_range_matches(request, etag, last_modified):
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+
+        if start >= size or start > end:
+            file.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        file.seek(start)
+        response = StreamingHttpResponse(_read_range(file, end - start + 1), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    else:
+        response = FileResponse(file, as_attachment=True, filename=filename, content_type=content_type)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['Last-Modified'] = http_date(last_modified)
+    response['ETag'] = etag
+    return response
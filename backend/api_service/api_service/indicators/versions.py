@@ -0,0 +1,233 @@
+"""
+Dataset version counters and the response ETags derived from them.
+
+DatasetVersion keeps one counter per scope:
+
+    global              Bumped by every load and every edit
+    metadata            Bumped when an indicator, region or sector is edited
+    indicator:<code>    Bumped when values of the indicator change
+    region:<code>       Bumped when values of the region change
+    sector:<code>       Bumped when values of the sector change
+
+The loader bumps the counters of the series it wrote once all derived tables
+are refreshed. Edits of indicators, regions and sectors made through the ORM
+(e.g. the admin) bump them through model signals, which also covers the
+values deleted along with them. Values have no signal receivers, so that
+their deletes stay fast bulk deletes: code writing or deleting values outside
+the loader calls bump_after_load (or bump_versions) once per operation.
+
+A read request depends on the indicator, region and sector counters named by
+its query parameters, or on the global counter when it names none, and on the
+metadata counter. Counters are keyed on codes; a parameter that names rows by
+id on some endpoint (see ID_PARAMS) depends on the global counter when its
+value is numeric. The indicators.E001 system check keeps the filters of the
+API in line with these parameters. Its ETag and the keys of its cached responses (see
+api_service/caching.py) hash these counters. Counters are read through the
+cache, once per request, and fall back to the table on a miss.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from api_service.regions.models import Region
+from api_service.sectors.models import Sector
+from .models import DatasetVersion, Indicator
+
+GLOBAL_SCOPE = 'global'
+METADATA_SCOPE = 'metadata'
+
+# Query parameters naming the indicators, regions and sectors a response reads
+INDICATOR_PARAMS = ('indicator', 'indicator_code')
+REGION_PARAMS = ('region',)
+SECTOR_PARAMS = ('sector',)
+
+# Parameters holding a code on some endpoints and an id on others
+# (IndicatorValueFilter filters indicator by id, time_series by code)
+ID_PARAMS = ('indicator',)
+
+
+def version_config():
+    """
+    Dataset version settings.
+    """
+    return getattr(settings, 'DATASET_VERSIONS', {})
+
+
+def indicator_scope(code):
+    return f'indicator:{code}'
+
+
+def region_scope(code):
+    return f'region:{code}'
+
+
+def sector_scope(code):
+    return f'sector:{code}'
+
+
+def _cache_key(scope):
+    return f'dataset_version:{scope}'
+
+
+def bump_versions(scopes):
+    """
+    Increment the counters of the given scopes, creating missing ones.
+    """
+    scopes = set(scopes)
+    if not scopes:
+        return
+
+    with transaction.atomic():
+        DatasetVersion.objects.bulk_create(
+            [DatasetVersion(scope=scope) for scope in scopes],
+            ignore_conflicts=True
+        )
+        DatasetVersion.objects.filter(scope__in=scopes).update(
+            version=F('version') + 1,
+            updated_at=timezone.now()
+        )
+        transaction.on_commit(lambda: _cache_versions(scopes))
+
+
+def _cache_versions(scopes):
+    """
+    Write the committed counters of some scopes to the cache.
+
+    Set rather than deleted: a request that read a counter from the table
+    before the bump committed only adds it to the cache (see get_versions),
+    so it cannot put the old counter back after this write.
+    """
+    stored = dict(DatasetVersion.objects.filter(scope__in=scopes).values_list('scope', 'version'))
+    cache.set_many(
+        {_cache_key(scope): stored.get(scope, 0) for scope in scopes},
+        version_config().get('cache_timeout', 300)
+    )
+
+
+def get_versions(scopes):
+    """
+    Current counters of the given scopes; scopes never bumped are at 0.
+    """
+    keys = {scope: _cache_key(scope) for scope in scopes}
+    cached = cache.get_many(list(keys.values()))
+    versions = {scope: cached[key] for scope, key in keys.items() if key in cached}
+
+    missing = [scope for scope in keys if scope not in versions]
+    if missing:
+        stored = dict(DatasetVersion.objects.filter(scope__in=missing).values_list('scope', 'version'))
+        fetched = {scope: stored.get(scope, 0) for scope in missing}
+        timeout = version_config().get('cache_timeout', 300)
+        for scope, version in fetched.items():
+            # Added, not set: a bump committing after the read above has
+            # already cached its newer counter
+            cache.add(keys[scope], version, timeout)
+        versions.update(fetched)
+
+    return versions
+
+
+def bump_after_load(series):
+    """
+    Bump the global counter and those of the indicators, regions and sectors
+    loaded.
+
+    Args:
+        series: {(indicator_id, region_id, sector_id): [min_date, max_date]}
+    """
+    indicator_ids = {indicator_id for indicator_id, _, _ in series}
+    region_ids = {region_id for _, region_id, _ in series if region_id is not None}
+    sector_ids = {sector_id for _, _, sector_id in series if sector_id is not None}
+
+    scopes = [GLOBAL_SCOPE]
+    scopes += [
+        indicator_scope(code)
+        for code in Indicator.objects.filter(id__in=indicator_ids).values_list('code', flat=True)
+    ]
+    scopes += [
+        region_scope(code)
+        for code in Region.objects.filter(id__in=region_ids).values_list('code', flat=True)
+    ]
+    scopes += [
+        sector_scope(code)
+        for code in Sector.objects.filter(id__in=sector_ids).values_list('code', flat=True)
+    ]
+    bump_versions(scopes)
+
+
+def _param_scopes(request, params, scope):
+    """
+    Scopes named by the values of some query parameters.
+    """
+    scopes = []
+    for param in params:
+        for value in request.GET.getlist(param):
+            if not value:
+                continue
+            if param in ID_PARAMS and value.isdecimal():
+                # Possibly an id, whose code is not known without a query
+                scopes.append(GLOBAL_SCOPE)
+            else:
+                scopes.append(scope(value))
+    return scopes
+
+
+def request_scopes(request):
+    """
+    Scopes whose counters a read request's response depends on.
+    """
+    scopes = _param_scopes(request, INDICATOR_PARAMS, indicator_scope)
+    scopes += _param_scopes(request, REGION_PARAMS, region_scope)
+    scopes += _param_scopes(request, SECTOR_PARAMS, sector_scope)
+    return [METADATA_SCOPE] + sorted(set(scopes) or {GLOBAL_SCOPE})
+
+
+def request_versions(request):
+    """
+    Counters of a read request's scopes, read once per request.
+    """
+    versions = getattr(request, '_dataset_versions', None)
+    if versions is None:
+        versions = request._dataset_versions = get_versions(request_scopes(request))
+    return versions
+
+
+def versions_digest(versions):
+    """
+    Short hash identifying a set of counters.
+    """
+    digest = hashlib.sha1()
+    for scope in sorted(versions):
+        digest.update(f'|{scope}={versions[scope]}'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def dataset_etag(request):
+    """
+    Weak ETag of a read request at the current dataset versions.
+    """
+    digest = hashlib.sha1()
+    digest.update(request.get_full_path().encode('utf-8'))
+    digest.update(request.META.get('HTTP_ACCEPT', '').encode('utf-8'))
+    digest.update(versions_digest(request_versions(request)).encode('utf-8'))
+    return f'W/"{digest.hexdigest()}"'
+
+
+@receiver([post_save, post_delete], sender=Indicator)
+def _indicator_changed(sender, instance, **kwargs):
+    bump_versions([GLOBAL_SCOPE, METADATA_SCOPE, indicator_scope(instance.code)])
+
+
+@receiver([post_save, post_delete], sender=Region)
+def _region_changed(sender, instance, **kwargs):
+    bump_versions([GLOBAL_SCOPE, METADATA_SCOPE, region_scope(instance.code)])
+
+
+@receiver([post_save, post_delete], sender=Sector)
+def _sector_changed(sender, instance, **kwargs):
+    bump_versions([GLOBAL_SCOPE, METADATA_SCOPE, sector_scope(instance.code)])
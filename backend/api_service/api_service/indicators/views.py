@@ -1,18 +1,32 @@
-from django.conf import settings
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from django.utils.dateparse import parse_date
 from rest_framework import viewsets, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 import django_filters
 
-from .models import Indicator, IndicatorValue
+from api_service.caching import versioned_cache
+from .downsample import downsample_rows
+from .export import EXPORT_CSV, EXPORT_FORMATS, export_response
+from .fast_serializers import (
+    KEY_STAT_FIELDS, VALUE_DETAIL_FIELDS, VALUE_FIELDS,
+    serialize_key_stats, serialize_value_details, serialize_values
+)
+from .models import Indicator, IndicatorRollup, IndicatorValue, LatestIndicatorValue
+from .pagination import IndicatorValueCursorPagination
+from .permissions import CanExportData
+from .rollups import AGGREGATES, rollup_rows
 from .serializers import (
     IndicatorSerializer, IndicatorDetailSerializer,
     IndicatorValueSerializer, IndicatorValueDetailSerializer,
     KeyStatIndicatorSerializer
 )
+from .series import (
+    LAYOUT_ROWS, LAYOUTS, build_series, build_series_batch, downsampled_rows,
+    series_cache_key, series_config, series_metadata, series_response, series_rows
+)
+from .snapshots import SNAPSHOT_FORMATS, SNAPSHOT_PARQUET, snapshot_response
+from .versions import request_versions, versions_digest
 
 class IndicatorFilter(django_filters.FilterSet):
     """Filter for Indicator model"""
@@ -52,12 +66,12 @@ class IndicatorViewSet(viewsets.ReadOnlyModelViewSet):
             return IndicatorDetailSerializer
         return IndicatorSerializer
     
-    @method_decorator(cache_page(settings.CACHE_TTL.get('indicators', 600)))  # Cache for 10 minutes by default
+    @versioned_cache('indicators.list', ttl='indicators')
     def list(self, request, *args, **kwargs):
         """List all indicators (cached)"""
         return super().list(request, *args, **kwargs)
     
-    @method_decorator(cache_page(settings.CACHE_TTL.get('indicators', 600)))  # Cache for 10 minutes by default
+    @versioned_cache('indicators.retrieve', ttl='indicators')
     def retrieve(self, request, *args, **kwargs):
         """Get details for a specific indicator (cached)"""
         return super().retrieve(request, *args, **kwargs)
@@ -66,10 +80,14 @@ class IndicatorValueViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for indicator values.
     Supports filtering by region, sector, date range, and indicator.
+    Lists are paginated with a cursor, newest values first.
     """
     queryset = IndicatorValue.objects.all().select_related('indicator', 'region', 'sector')
     serializer_class = IndicatorValueSerializer
     filterset_class = IndicatorValueFilter
+    pagination_class = IndicatorValueCursorPagination
+    ordering = ('-date', '-id')
+    ordering_fields = ['date', 'id']
     
     def get_serializer_class(self):
         if self.action == 'retrieve' or self.action == 'list_detail':
@@ -78,18 +96,30 @@ class IndicatorValueViewSet(viewsets.ReadOnlyModelViewSet):
             return KeyStatIndicatorSerializer
         return IndicatorValueSerializer
     
-    @method_decorator(cache_page(settings.CACHE_TTL.get('indicators', 600)))  # Cache for 10 minutes by default
+    def get_permissions(self):
+        if self.action in ('export', 'snapshot'):
+            return [CanExportData()]
+        return super().get_permissions()
+    
+    @versioned_cache('indicator_values.list', ttl='indicators')
     def list(self, request, *args, **kwargs):
         """List indicator values with filtering (cached)"""
-        return super().list(request, *args, **kwargs)
+        # Rows are projected with values() and serialized as plain dicts
+        queryset = self.filter_queryset(self.get_queryset()).values(*VALUE_FIELDS)
+        page = self.paginate_queryset(queryset)
+        
+        if page is not None:
+            return self.get_paginated_response(serialize_values(page))
+            
+        return Response(serialize_values(queryset))
     
-    @method_decorator(cache_page(settings.CACHE_TTL.get('indicators', 600)))  # Cache for 10 minutes by default
+    @versioned_cache('indicator_values.retrieve', ttl='indicators')
     def retrieve(self, request, *args, **kwargs):
         """Get details for a specific indicator value (cached)"""
         return super().retrieve(request, *args, **kwargs)
     
     @action(detail=False, methods=['get'])
-    @method_decorator(cache_page(settings.CACHE_TTL.get('key_stats', 300)))  # Cache for 5 minutes by default
+    @versioned_cache('indicator_values.key_stats', ttl='key_stats', stale_while_revalidate=True)
     def key_stats(self, request):
         """
         Return the latest key statistical indicators.
@@ -99,77 +129,106 @@ class IndicatorValueViewSet(viewsets.ReadOnlyModelViewSet):
         region_code = request.query_params.get('region')
         sector_code = request.query_params.get('sector')
         
-        # Start with all values
-        queryset = self.get_queryset()
-        
-        # Apply region and sector filters if provided
-        if region_code:
-            queryset = queryset.filter(region__code=region_code)
-        if sector_code:
-            queryset = queryset.filter(sector__code=sector_code)
-            
-        # Get the most recent value for each indicator
-        # This requires a bit of raw SQL or complex query to be efficient
-        from django.db.models import Max, Subquery, OuterRef
-        
-        # Get the latest date for each indicator
-        latest_dates = IndicatorValue.objects.filter(
-            indicator=OuterRef('indicator')
-        ).values('indicator').annotate(
-            max_date=Max('date')
-        ).values('max_date')
-        
-        # Get the values for those latest dates
-        latest_values = queryset.filter(
-            date=Subquery(latest_dates)
-        )
-        
         # We want to focus on the key indicators specified in requirements
         key_indicator_codes = [
             'gdp_growth', 'inflation', 'foreign_investment', 
             'urban_population', 'unemployment', 'primary_enrollment'
         ]
         
-        latest_values = latest_values.filter(indicator__code__in=key_indicator_codes)
+        # Latest values are maintained per series at load time, so this is a
+        # single indexed lookup however long the series' history is.
+        # Without a region or sector the national, all-sector series is used.
+        latest_values = LatestIndicatorValue.objects.filter(
+            indicator__code__in=key_indicator_codes
+        )
         
-        serializer = self.get_serializer(latest_values, many=True)
-        return Response(serializer.data)
+        if region_code:
+            latest_values = latest_values.filter(region__code=region_code)
+        else:
+            latest_values = latest_values.filter(region__isnull=True)
+        if sector_code:
+            latest_values = latest_values.filter(sector__code=sector_code)
+        else:
+            latest_values = latest_values.filter(sector__isnull=True)
+        
+        return Response(serialize_key_stats(latest_values.values(*KEY_STAT_FIELDS)))
     
     @action(detail=False, methods=['get'])
-    @method_decorator(cache_page(settings.CACHE_TTL.get('indicators', 600)))  # Cache for 10 minutes by default
+    @versioned_cache('indicator_values.list_detail', ttl='indicators')
     def list_detail(self, request):
         """
         Return detailed indicator values with filtering.
         Includes full related entity information.
         """
-        queryset = self.filter_queryset(self.get_queryset())
+        queryset = self.filter_queryset(self.get_queryset()).values(*VALUE_DETAIL_FIELDS)
         page = self.paginate_queryset(queryset)
         
         if page is not None:
-            serializer = IndicatorValueDetailSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response(serialize_value_details(page))
             
-        serializer = IndicatorValueDetailSerializer(queryset, many=True)
-        return Response(serializer.data)
+        return Response(serialize_value_details(queryset))
         
     @action(detail=False, methods=['get'])
-    @method_decorator(cache_page(settings.CACHE_TTL.get('indicators', 600)))  # Cache for 10 minutes by default
+    @versioned_cache('indicator_values.time_series', ttl='indicators')
     def time_series(self, request):
         """
         Return time series data for a specific indicator.
         Optimized for charts and graphs.
+        
+        Parameters:
+        - indicator: Indicator code (required)
+        - region, sector: Optional region and sector codes. Without them, raw
+          values of every region and sector are returned, while rollups
+          (granularity) default to the national series and the all-sector
+          series: pass region and sector to get the same series both ways
+        - from_date, to_date: Optional date range
+        - layout: 'rows' (default) for a list of points, or 'columnar' for
+          parallel arrays of dates, values and changes
+        - max_points: Optional number of points to downsample the series to,
+          keeping its shape (at least 3)
+        - granularity: Optional 'month', 'quarter' or 'year' to return one
+          precomputed rollup per period instead of raw values. Rollups are
+          kept per series, so without a region or sector they cover only the
+          national (region-less), all-sector (sector-less) series
+        - aggregate: Rollup statistic returned with granularity: 'mean'
+          (default), 'sum', 'min', 'max', 'last' or 'count'
+        
+        Long series are streamed unless downsampled.
         """
         indicator_code = request.query_params.get('indicator')
         region_code = request.query_params.get('region')
         sector_code = request.query_params.get('sector')
         from_date = request.query_params.get('from_date')
         to_date = request.query_params.get('to_date')
+        layout = request.query_params.get('layout', LAYOUT_ROWS)
+        max_points = request.query_params.get('max_points')
+        granularity = request.query_params.get('granularity')
+        aggregate = request.query_params.get('aggregate', 'mean')
         
         if not indicator_code:
             return Response({"error": "indicator parameter is required"}, status=400)
+        if layout not in LAYOUTS:
+            return Response({"error": f"layout must be one of: {', '.join(LAYOUTS)}"}, status=400)
+        if max_points is not None:
+            try:
+                max_points = int(max_points)
+            except ValueError:
+                max_points = 0
+            if max_points < 3:
+                return Response({"error": "max_points must be an integer of at least 3"}, status=400)
+        if granularity is not None:
+            granularities = [choice for choice, _ in IndicatorRollup.GRANULARITY_CHOICES]
+            if granularity not in granularities:
+                return Response({"error": f"granularity must be one of: {', '.join(granularities)}"}, status=400)
+            if aggregate not in AGGREGATES:
+                return Response({"error": f"aggregate must be one of: {', '.join(AGGREGATES)}"}, status=400)
+            return self._rollup_series(
+                indicator_code, region_code, sector_code, from_date, to_date,
+                granularity, aggregate, layout, max_points
+            )
             
         # Start with all values for this indicator
-        queryset = self.get_queryset().filter(indicator__code=indicator_code)
+        queryset = IndicatorValue.objects.filter(indicator__code=indicator_code)
         
         # Apply additional filters if provided
         if region_code:
@@ -180,31 +239,140 @@ class IndicatorValueViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(date__gte=from_date)
         if to_date:
             queryset = queryset.filter(date__lte=to_date)
-            
-        # Order by date
-        queryset = queryset.order_by('date')
-        
-        # Format response for easy chart consumption
-        values = []
-        indicator_name = None
-        indicator_unit = None
-        
-        for value in queryset:
-            if not indicator_name:
-                indicator_name = value.indicator.name
-                indicator_unit = value.indicator.unit
-                
-            values.append({
-                'date': value.date,
-                'value': value.value,
-                'change_percent': value.change_percent
-            })
-            
-        data = {
-            'indicator_code': indicator_code,
-            'indicator_name': indicator_name,
-            'indicator_unit': indicator_unit,
-            'values': values
-        }
         
-        return Response(data)
+        if max_points:
+            cache_key = series_cache_key(
+                'time_series_lttb', versions_digest(request_versions(request)),
+                indicator_code, region_code, sector_code, from_date, to_date, max_points
+            )
+            rows = downsampled_rows(queryset, max_points, cache_key)
+            return Response(build_series(series_metadata(indicator_code), rows, layout))
+        
+        # Rows are read as tuples, without instantiating models
+        return series_response(series_metadata(indicator_code), series_rows(queryset), layout)
+    
+    def _rollup_series(self, indicator_code, region_code, sector_code, from_date, to_date,
+                       granularity, aggregate, layout, max_points):
+        """
+        time_series response built from precomputed rollups.
+        
+        A missing region or sector selects the national or all-sector
+        series, not every series as the raw path does; the rollups of
+        different series are not combined.
+        """
+        queryset = IndicatorRollup.objects.filter(indicator__code=indicator_code, granularity=granularity)
+        
+        if region_code:
+            queryset = queryset.filter(region__code=region_code)
+        else:
+            queryset = queryset.filter(region__isnull=True)
+        if sector_code:
+            queryset = queryset.filter(sector__code=sector_code)
+        else:
+            queryset = queryset.filter(sector__isnull=True)
+        if from_date:
+            queryset = queryset.filter(period_start__gte=from_date)
+        if to_date:
+            queryset = queryset.filter(period_start__lte=to_date)
+        
+        rows = rollup_rows(queryset, aggregate)
+        if max_points:
+            rows = downsample_rows(rows, max_points)
+        
+        metadata = series_metadata(indicator_code)
+        metadata['granularity'] = granularity
+        metadata['aggregate'] = aggregate
+        return Response(build_series(metadata, rows, layout))
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream the filtered indicator values as a file.
+        
+        Accepts the same filters as the list endpoint, plus:
+        - export_format: 'csv' (default) or 'ndjson'
+        - compress: 'true' to gzip the file
+        """
+        export_format = request.query_params.get('export_format', EXPORT_CSV)
+        compress = request.query_params.get('compress', '').lower() in ('1', 'true', 'yes')
+        
+        if export_format not in EXPORT_FORMATS:
+            return Response({"error": f"export_format must be one of: {', '.join(EXPORT_FORMATS)}"}, status=400)
+        
+        queryset = self.filter_queryset(IndicatorValue.objects.all())
+        return export_response(queryset, export_format, compress)
+    
+    @action(detail=False, methods=['get'])
+    def snapshot(self, request):
+        """
+        Download the latest snapshot of all indicator values.
+        
+        Parameters:
+        - snapshot_format: 'parquet' (default) or 'arrow' (Arrow IPC file)
+        
+        Snapshots are rebuilt after every load and support Range requests.
+        """
+        snapshot_format = request.query_params.get('snapshot_format', SNAPSHOT_PARQUET)
+        
+        if snapshot_format not in SNAPSHOT_FORMATS:
+            return Response({"error": f"snapshot_format must be one of: {', '.join(SNAPSHOT_FORMATS)}"}, status=400)
+        
+        response = snapshot_response(request, snapshot_format)
+        if response is None:
+            return Response({"error": "The snapshot has not been built yet"}, status=404)
+        return response
+    
+    @action(detail=False, methods=['post'])
+    def time_series_batch(self, request):
+        """
+        Return several time series in one response.
+        
+        Body:
+        - series: List of {"indicator", "region", "sector"} selectors, with
+          optional region and sector codes
+        - from_date, to_date: Optional date range applied to every series
+        - layout: 'rows' (default) or 'columnar', as for time_series
+        
+        All series are read with one grouped query; series already cached
+        by an earlier batch are not queried again.
+        """
+        if not isinstance(request.data, dict):
+            return Response({"error": "series must be a non-empty list of selectors"}, status=400)
+        
+        selectors = request.data.get('series')
+        from_date = request.data.get('from_date')
+        to_date = request.data.get('to_date')
+        layout = request.data.get('layout', LAYOUT_ROWS)
+        max_series = series_config().get('batch_max_series', 50)
+        
+        if not selectors or not isinstance(selectors, list):
+            return Response({"error": "series must be a non-empty list of selectors"}, status=400)
+        if len(selectors) > max_series:
+            return Response({"error": f"At most {max_series} series can be requested at once"}, status=400)
+        if any(not isinstance(selector, dict) or not selector.get('indicator') for selector in selectors):
+            return Response({"error": "Every selector requires an indicator code"}, status=400)
+        if any(
+            not isinstance(selector['indicator'], str)
+            or any(selector.get(key) is not None and not isinstance(selector[key], str) for key in ('region', 'sector'))
+            for selector in selectors
+        ):
+            return Response({"error": "indicator, region and sector must be codes (strings)"}, status=400)
+        if layout not in LAYOUTS:
+            return Response({"error": f"layout must be one of: {', '.join(LAYOUTS)}"}, status=400)
+        for name, value in (('from_date', from_date), ('to_date', to_date)):
+            if value and not self._valid_date(value):
+                return Response({"error": f"{name} must be a date in YYYY-MM-DD format"}, status=400)
+        
+        series = build_series_batch(selectors, from_date, to_date, layout)
+        
+        return Response({'series': series})
+    
+    @staticmethod
+    def _valid_date(value):
+        """
+        Whether a request value is an ISO date.
+        """
+        try:
+            return parse_date(value) is not None
+        except (TypeError, ValueError):
+            return False
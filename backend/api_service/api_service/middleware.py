@@ -0,0 +1,80 @@
+"""
+Middleware for the API microservice.
+"""
+from django.utils.cache import get_conditional_response
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import AllowAny
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from api_service.indicators.versions import dataset_etag, version_config
+
+
+class DatasetETagMiddleware:
+    """
+    Tag read responses with an ETag derived from the dataset versions and
+    answer a matching If-None-Match with a 304 before the view runs.
+
+    The ETag is computed before the view reads any data, so a load finishing
+    while the view runs leaves the response with the older tag and the next
+    poll fetches it again. Only requests with a valid token get a 304, and
+    only from views checking nothing beyond the default permissions; other
+    requests go through to the view and its permission checks.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.paths = tuple(version_config().get('paths', ()))
+        self.authentication = JWTAuthentication()
+        self._default_permissions = {}
+
+    def __call__(self, request):
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(self.paths):
+            return self.get_response(request)
+
+        etag = dataset_etag(request)
+        response = self.get_response(request)
+        # Responses tagging themselves (e.g. snapshot files) keep their own ETag,
+        # stale responses served during a cache fill get none
+        if response.status_code == 200 and not response.has_header('ETag') \
+                and not getattr(response, 'dataset_stale', False):
+            response['ETag'] = etag
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(self.paths):
+            return None
+        if not request.META.get('HTTP_IF_NONE_MATCH') or not self._has_default_permissions(request, view_func):
+            return None
+
+        # A missing, invalid or expired token is left for the view to reject
+        try:
+            if self.authentication.authenticate(request) is None:
+                return None
+        except AuthenticationFailed:
+            return None
+
+        etag = dataset_etag(request)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+        return not_modified
+
+    def _has_default_permissions(self, request, view_func):
+        """
+        Whether a view's handler for the request method checks only the
+        default permissions, which a valid token satisfies.
+        """
+        key = (view_func, request.method)
+        if key not in self._default_permissions:
+            view_class = getattr(view_func, 'cls', None)
+            allowed = False
+            if view_class is not None:
+                view = view_class(**getattr(view_func, 'initkwargs', {}))
+                # Viewsets choose permissions per action, e.g. export and snapshot
+                actions = getattr(view_func, 'actions', None)
+                if actions is not None:
+                    view.action = actions.get(request.method.lower())
+                defaults = set(api_settings.DEFAULT_PERMISSION_CLASSES) | {AllowAny}
+                allowed = all(type(permission) in defaults for permission in view.get_permissions())
+            self._default_permissions[key] = allowed
+        return self._default_permissions[key]
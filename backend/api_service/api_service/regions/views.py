@@ -1,10 +1,8 @@
-from django.conf import settings
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 
+from api_service.caching import versioned_cache
 from .models import Region
 from .serializers import RegionSerializer, RegionDetailSerializer
 
@@ -24,18 +22,18 @@ class RegionViewSet(viewsets.ReadOnlyModelViewSet):
             return RegionDetailSerializer
         return RegionSerializer
     
-    @method_decorator(cache_page(settings.CACHE_TTL.get('regions', 86400)))  # Cache for 24 hours by default
+    @versioned_cache('regions.list', ttl='regions')
     def list(self, request, *args, **kwargs):
         """List all regions (cached)"""
         return super().list(request, *args, **kwargs)
     
-    @method_decorator(cache_page(settings.CACHE_TTL.get('regions', 86400)))  # Cache for 24 hours by default
+    @versioned_cache('regions.retrieve', ttl='regions')
     def retrieve(self, request, *args, **kwargs):
         """Get details for a specific region (cached)"""
         return super().retrieve(request, *args, **kwargs)
     
     @action(detail=False, methods=['get'])
-    @method_decorator(cache_page(settings.CACHE_TTL.get('regions', 86400)))  # Cache for 24 hours by default
+    @versioned_cache('regions.geojson', ttl='regions', stale_while_revalidate=True)
     def geojson(self, request):
         """
         Return GeoJSON for all regions for map rendering.
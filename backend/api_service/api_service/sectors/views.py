@@ -1,9 +1,7 @@
-from django.conf import settings
 from rest_framework import viewsets
 from rest_framework.response import Response
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 
+from api_service.caching import versioned_cache
 from .models import Sector
 from .serializers import SectorSerializer, SectorDetailSerializer
 
@@ -23,12 +21,12 @@ class SectorViewSet(viewsets.ReadOnlyModelViewSet):
             return SectorDetailSerializer
         return SectorSerializer
     
-    @method_decorator(cache_page(settings.CACHE_TTL.get('sectors', 86400)))  # Cache for 24 hours by default
+    @versioned_cache('sectors.list', ttl='sectors')
     def list(self, request, *args, **kwargs):
         """List all sectors (cached)"""
         return super().list(request, *args, **kwargs)
     
-    @method_decorator(cache_page(settings.CACHE_TTL.get('sectors', 86400)))  # Cache for 24 hours by default
+    @versioned_cache('sectors.retrieve', ttl='sectors')
     def retrieve(self, request, *args, **kwargs):
         """Get details for a specific sector (cached)"""
         return super().retrieve(request, *args, **kwargs)
@@ -25,27 +25,206 @@ INSTALLED_APPS += [
     'api_service.statistics',
 ]
 
+# ETags and 304 responses for read endpoints, derived from dataset versions
+MIDDLEWARE += [
+    'api_service.middleware.DatasetETagMiddleware',
+]
+
 ROOT_URLCONF = 'api_service.urls'
 WSGI_APPLICATION = 'api_service.wsgi.application'
 
-# Define cache settings for API service
+# Define cache settings for API service: Redis behind an in-process L1 cache
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'BACKEND': 'api_service.cache_backends.TwoTierRedisCache',
         'LOCATION': f"redis://{os.environ.get('REDIS_HOST', 'redis')}:{os.environ.get('REDIS_PORT', '6379')}",
         'OPTIONS': {
             'db': '1',
             'parser_class': 'redis.connection.PythonParser',
             'pool_class': 'redis.BlockingConnectionPool',
+            'L1_MAX_ENTRIES': 256,                         # Entries kept in each worker
+            'L1_TIMEOUT': 5,                               # Seconds an entry is kept in a worker
+            'L1_EXCLUDE': ['cache_fill:', 'cache_stats:'],  # Locks and counters always read from Redis
+            'INVALIDATION_CHANNEL': 'api_cache_invalidation',
+            'STATS_INTERVAL': 60,                          # Seconds between flushes of tier hit counts
         }
     }
 }
 
-# Cache timeouts in seconds for different endpoints
+# Cache timeouts in seconds for different endpoints. Cached responses are keyed
+# on dataset versions and invalidated by loads (see api_service/caching.py), so
+# timeouts only bound how long unused entries are kept.
 CACHE_TTL = {
-    'regions': 60 * 60 * 24,  # 24 hours for regions list
-    'sectors': 60 * 60 * 24,  # 24 hours for sectors list
-    'indicators': 60 * 10,    # 10 minutes for indicators
-    'key_stats': 60 * 5,      # 5 minutes for key stats
-    'summary': 60 * 15,       # 15 minutes for summary stats
+    'regions': 60 * 60 * 24 * 30,        # 30 days for regions list
+    'sectors': 60 * 60 * 24 * 30,        # 30 days for sectors list
+    'indicators': 60 * 60 * 24 * 7,      # 7 days for indicators
+    'key_stats': 60 * 60 * 24 * 7,       # 7 days for key stats
+    'summary': 60 * 60 * 24 * 7,         # 7 days for summary stats
+    'recent_updates': 60 * 60 * 24 * 7,  # 7 days for recent updates
+    'dashboard': 60 * 60 * 24 * 7,       # 7 days for dashboard data
+}
+
+# Filling of the versioned response cache
+RESPONSE_CACHE = {
+    'lock_timeout': 30,                  # Seconds a request may hold the fill lock of a response
+    'wait_timeout': 10,                  # Seconds others wait for the fill before computing themselves
+    'poll_interval': 0.05,               # Seconds between checks for the filled response
+    'stale_timeout': 60 * 60 * 24 * 30,  # Seconds a previous response is kept for stale_while_revalidate
+    'stats_interval': 60,                # Seconds between flushes of the endpoint hit counts
+}
+
+# RabbitMQ settings for consuming processed scraper records
+RABBITMQ_CONFIG = {
+    'host': os.environ.get('RABBITMQ_HOST', 'rabbitmq'),
+    'port': int(os.environ.get('RABBITMQ_PORT', '5672')),
+    'virtual_host': os.environ.get('RABBITMQ_VHOST', '/'),
+    'username': os.environ.get('RABBITMQ_USER', 'guest'),
+    'password': os.environ.get('RABBITMQ_PASSWORD', 'guest'),
+    'exchange': 'snbs_data_exchange',
+    'indicator_queue': 'indicator_values',
+}
+
+# Bulk loader settings for processed scraper records
+INDICATOR_LOADER = {
+    'batch_size': 5000,       # Indicator values per bulk statement
+    'prefetch_count': 200,    # Messages loaded together in one batch
+    'flush_interval': 2.0,    # Seconds of queue inactivity before a partial batch is loaded
+}
+
+# Streaming export of indicator values
+INDICATOR_EXPORT = {
+    'roles': ['super_admin', 'admin', 'analyst'],  # Token roles granted export_data
+    'chunk_size': 5000,                            # Rows fetched and encoded per chunk
+}
+
+# Arrow and Parquet snapshots of all indicator values
+INDICATOR_SNAPSHOTS = {
+    'directory': os.environ.get('INDICATOR_SNAPSHOT_DIR', str(BASE_DIR / 'snapshots')),
+    'batch_size': 100000,      # Rows per record batch and Parquet row group
+    'compression': 'zstd',
+    'rebuild_on_load': True,   # Rebuild in the background after every load
+    'rebuild_interval': 300,   # Minimum seconds between the starts of background rebuilds
 }
+
+# Time series responses
+TIME_SERIES = {
+    'stream_threshold': 5000,   # Points above which a series response is streamed
+    'stream_chunk_size': 2000,  # Rows read and encoded per streamed chunk
+    'batch_max_series': 50,     # Series accepted by one time_series_batch request
+}
+
+# Landing page summary: each section field is read from the IndicatorSummary of
+# an indicator code, as 'value', 'previous_value', 'change' or 'change_percent'
+STATISTICS_SUMMARY = {
+    'headlines': {
+        'population': {
+            'total': ('population_total', 'value'),
+            'growth_rate': ('population_growth_rate', 'value'),
+        },
+        'economic': {
+            'gdp': ('gdp', 'value'),
+            'growth_rate': ('gdp_growth_rate', 'value'),
+        },
+        'education': {
+            'literacy_rate': ('literacy_rate', 'value'),
+            'growth': ('literacy_rate', 'change'),
+        },
+        'health': {
+            'life_expectancy': ('life_expectancy', 'value'),
+            'change': ('life_expectancy', 'change'),
+        },
+    },
+    'recent_updates_limit': 10,    # Entries returned by the recent updates endpoint
+    'recent_updates_retain': 500,  # Entries kept in the update log
+}
+
+# Dashboard endpoint payloads by type, materialized per region from indicator
+# values (see api_service.statistics.dashboards for the widget formats)
+STATISTICS_DASHBOARDS = {
+    'overview': {
+        'population_growth': {
+            'series': {'population': 'population_total', 'growthRate': 'population_growth_rate'},
+            'periods': 6,
+        },
+        'literacy_rate': {'series': {'rate': 'literacy_rate'}, 'periods': 6},
+        'cpi_trends': {'series': {'cpi': 'consumer_price_index'}, 'quarterly': True, 'periods': 5},
+        'key_indicators': {
+            'indicators': [
+                'gdp_growth_rate', 'inflation_rate', 'foreign_direct_investment',
+                'urban_population', 'unemployment_rate', 'primary_school_enrollment',
+            ],
+        },
+    },
+    'population': {
+        'population_growth': {
+            'series': {'population': 'population_total', 'growthRate': 'population_growth_rate'},
+        },
+        'population_distribution': {
+            'latest': {'urban': 'urban_population', 'rural': 'rural_population'},
+        },
+        'age_distribution': {
+            'breakdown': {
+                '0-14': 'population_age_0_14',
+                '15-24': 'population_age_15_24',
+                '25-54': 'population_age_25_54',
+                '55-64': 'population_age_55_64',
+                '65+': 'population_age_65_plus',
+            },
+            'label': 'age_group',
+            'value': 'percentage',
+        },
+    },
+    'economic': {
+        'gdp_growth': {'series': {'gdp': 'gdp', 'growth': 'gdp_growth_rate'}},
+        'cpi_trends': {'series': {'cpi': 'consumer_price_index'}, 'quarterly': True, 'periods': 9},
+        'sector_contribution': {
+            'breakdown': {
+                'Agriculture': 'gdp_share_agriculture',
+                'Industry': 'gdp_share_industry',
+                'Services': 'gdp_share_services',
+            },
+            'label': 'sector',
+            'value': 'percentage',
+        },
+    },
+    'social': {
+        'literacy_rate': {'series': {'rate': 'literacy_rate'}},
+        'vaccination_coverage': {'series': {'coverage': 'vaccination_coverage'}},
+        'education_enrollment': {
+            'latest': {
+                'primary': 'primary_school_enrollment',
+                'secondary': 'secondary_school_enrollment',
+                'tertiary': 'tertiary_enrollment',
+            },
+        },
+    },
+    'infrastructure': {
+        'electricity_access': {'series': {'percentage': 'electricity_access'}},
+        'road_network': {
+            'latest': {'paved_km': 'paved_roads', 'unpaved_km': 'unpaved_roads', 'total_km': 'road_network'},
+        },
+        'water_access': {
+            'latest': {'urban': 'water_access_urban', 'rural': 'water_access_rural', 'total': 'water_access'},
+        },
+    },
+}
+
+# Storage of materialized dashboard payloads
+STATISTICS_DASHBOARD_STORE = {
+    'compress_level': 6,  # gzip level of stored payloads
+}
+
+# Dataset version counters behind response ETags
+DATASET_VERSIONS = {
+    'paths': [
+        f'/api/{API_VERSION}/{endpoint}/'
+        for endpoint in ('regions', 'sectors', 'indicators', 'statistics')
+    ],                      # Path prefixes of the tagged read endpoints
+    'cache_timeout': 300,   # Seconds a counter is cached between bumps
+}
+
+# Large responses served pre-compressed (see core/middleware.py)
+RESPONSE_COMPRESSION['paths'] = [
+    f'/api/{API_VERSION}/regions/geojson/',
+    f'/api/{API_VERSION}/statistics/dashboard_data/',
+]
@@ -0,0 +1,294 @@
+"""
+Materialization of dashboard endpoint payloads.
+
+Every dashboard type in STATISTICS_DASHBOARDS is built from IndicatorValue
+for the national figures and for each region, serialized to JSON, gzipped and
+stored in DashboardPayload. The endpoint serves the stored bytes as-is. After
+a load only the payloads of dashboard types that use one of the loaded
+indicators, for the regions that were loaded, are rebuilt.
+
+Each widget of a dashboard type is described by one of:
+    {'series': {field: code}, 'periods': n, 'quarterly': bool}
+        Points {'year', ['quarter'], field: value} ordered by date
+    {'latest': {field: code}}
+        Latest value of each indicator
+    {'breakdown': {label: code}, 'label': key, 'value': key}
+        [{label key: label, value key: latest value}]
+    {'indicators': [code, ...]}
+        [{'name', 'value', 'change', 'lastUpdated'}] for indicators with data
+"""
+import gzip
+import json
+import logging
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from api_service.indicators.models import Indicator, IndicatorValue
+from api_service.regions.models import Region
+from .models import DashboardPayload
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DASHBOARD = 'overview'
+
+
+def dashboard_types():
+    """
+    Configured dashboard definitions by type.
+    """
+    return getattr(settings, 'STATISTICS_DASHBOARDS', {})
+
+
+def widget_codes(spec):
+    """
+    Indicator codes a widget reads.
+    """
+    if 'series' in spec:
+        return set(spec['series'].values())
+    if 'latest' in spec:
+        return set(spec['latest'].values())
+    if 'breakdown' in spec:
+        return set(spec['breakdown'].values())
+    if 'indicators' in spec:
+        return set(spec['indicators'])
+    return set()
+
+
+def dashboard_codes(dashboard_type):
+    """
+    Indicator codes used by a dashboard type.
+    """
+    codes = set()
+    for spec in dashboard_types().get(dashboard_type, {}).values():
+        codes |= widget_codes(spec)
+    return codes
+
+
+def _format_value(value, unit):
+    """
+    Display value of a key indicator.
+    """
+    if unit == '%':
+        return f"{value:.2f}%"
+    if unit:
+        return f"{value:,.2f} {unit}"
+    return f"{value:,.2f}"
+
+
+def _build_widget(spec, observations, indicators):
+    """
+    Build one widget from the observations of a region.
+
+    Args:
+        spec: Widget definition
+        observations: {code: [(date, value, previous_value), ...]} ordered by date
+        indicators: {code: (name, unit)}
+    """
+    def latest(code):
+        series = observations.get(code)
+        return series[-1] if series else None
+
+    if 'series' in spec:
+        points = {}
+        for field, code in spec['series'].items():
+            for value_date, value, _ in observations.get(code, ()):
+                point = points.get(value_date)
+                if point is None:
+                    point = points[value_date] = {'year': value_date.year}
+                    if spec.get('quarterly'):
+                        point['quarter'] = f"Q{(value_date.month - 1) // 3 + 1}"
+                point[field] = value
+        series = [points[value_date] for value_date in sorted(points)]
+        if spec.get('periods'):
+            series = series[-spec['periods']:]
+        return series
+
+    if 'latest' in spec:
+        return {
+            field: observation[1] if observation else None
+            for field, observation in ((field, latest(code)) for field, code in spec['latest'].items())
+        }
+
+    if 'breakdown' in spec:
+        label_key = spec.get('label', 'label')
+        value_key = spec.get('value', 'value')
+        return [
+            {label_key: label, value_key: observation[1] if observation else None}
+            for label, observation in ((label, latest(code)) for label, code in spec['breakdown'].items())
+        ]
+
+    if 'indicators' in spec:
+        items = []
+        for code in spec['indicators']:
+            observation = latest(code)
+            if observation is None:
+                continue
+            value_date, value, previous_value = observation
+            name, unit = indicators[code]
+            items.append({
+                'name': name,
+                'value': _format_value(value, unit),
+                'change': round(value - previous_value, 2) if previous_value is not None else None,
+                'lastUpdated': value_date.strftime('%b %Y'),
+            })
+        return items
+
+    return None
+
+
+def build_payloads(dashboard_type, region_ids=(), national=True):
+    """
+    Build the payloads of a dashboard type for the given regions.
+
+    All regions are read in a single query.
+
+    Returns:
+        dict: {region_id or None: payload dict}
+    """
+    widgets = dashboard_types()[dashboard_type]
+    codes = dashboard_codes(dashboard_type)
+    region_ids = list(region_ids)
+    targets = ([None] if national else []) + region_ids
+
+    region_filter = Q(region_id__in=region_ids)
+    if national:
+        region_filter |= Q(region__isnull=True)
+
+    observations = {region_id: {} for region_id in targets}
+    indicators = {}
+    rows = IndicatorValue.objects.filter(
+        region_filter, sector__isnull=True, indicator__code__in=codes
+    ).order_by('date').values_list(
+        'region_id', 'indicator__code', 'indicator__name', 'indicator__unit',
+        'date', 'value', 'previous_value'
+    )
+    for region_id, code, name, unit, value_date, value, previous_value in rows:
+        indicators[code] = (name, unit)
+        observations[region_id].setdefault(code, []).append((value_date, value, previous_value))
+
+    return {
+        region_id: {
+            key: _build_widget(spec, observations[region_id], indicators)
+            for key, spec in widgets.items()
+        }
+        for region_id in targets
+    }
+
+
+def serialize_payload(payload):
+    """
+    Compact JSON of a payload and its gzip-compressed form.
+    """
+    config = getattr(settings, 'STATISTICS_DASHBOARD_STORE', {})
+    content = json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':')).encode('utf-8')
+    return content, gzip.compress(content, compresslevel=config.get('compress_level', 6), mtime=0)
+
+
+def store_payloads(dashboard_type, payloads, region_codes):
+    """
+    Serialize, compress and upsert built payloads.
+
+    Args:
+        payloads: {region_id or None: payload dict}
+        region_codes: {region_id: code}
+
+    Returns:
+        int: Number of payloads stored
+    """
+    rows = []
+    for region_id, payload in payloads.items():
+        content, compressed = serialize_payload(payload)
+        rows.append(DashboardPayload(
+            dashboard_type=dashboard_type,
+            region_code=region_codes[region_id] if region_id is not None else '',
+            content=compressed,
+            content_length=len(content),
+        ))
+
+    DashboardPayload.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['dashboard_type', 'region_code'],
+        update_fields=['content', 'content_length', 'generated_at'],
+    )
+    return len(rows)
+
+
+def materialize_dashboards(types=None, region_ids=None, national=True):
+    """
+    Rebuild stored payloads.
+
+    Args:
+        types: Types to rebuild, or None for all configured types
+        region_ids: Regions to rebuild, or None for all regions
+        national: Whether to rebuild the national payloads
+
+    Returns:
+        int: Number of payloads stored
+    """
+    region_codes = dict(Region.objects.values_list('id', 'code'))
+    if region_ids is None:
+        region_ids = list(region_codes)
+
+    stored = 0
+    for dashboard_type in types or dashboard_types():
+        payloads = build_payloads(dashboard_type, region_ids, national)
+        stored += store_payloads(dashboard_type, payloads, region_codes)
+    return stored
+
+
+def get_payload(dashboard_type, region=None):
+    """
+    Stored gzip-compressed payload of a dashboard, materialized on first use.
+
+    Args:
+        dashboard_type: Configured dashboard type
+        region: Region instance, or None for national figures
+
+    Returns:
+        bytes: Compressed JSON
+    """
+    region_code = region.code if region else ''
+    content = DashboardPayload.objects.filter(
+        dashboard_type=dashboard_type, region_code=region_code
+    ).values_list('content', flat=True).first()
+
+    if content is None:
+        region_ids = [region.id] if region else []
+        payloads = build_payloads(dashboard_type, region_ids, national=region is None)
+        store_payloads(dashboard_type, payloads, {region.id: region.code} if region else {})
+        _, content = serialize_payload(payloads[region.id if region else None])
+
+    return bytes(content)
+
+
+def refresh_dashboards(series):
+    """
+    Rebuild the payloads affected by a load.
+
+    Args:
+        series: {(indicator_id, region_id, sector_id): [min_date, max_date]}
+    """
+    all_sector_series = [(indicator_id, region_id) for indicator_id, region_id, sector_id in series if sector_id is None]
+    if not all_sector_series:
+        return
+
+    codes = dict(
+        Indicator.objects.filter(id__in={indicator_id for indicator_id, _ in all_sector_series})
+        .values_list('id', 'code')
+    )
+
+    stored = 0
+    for dashboard_type in dashboard_types():
+        used_codes = dashboard_codes(dashboard_type)
+        regions = {region_id for indicator_id, region_id in all_sector_series if codes.get(indicator_id) in used_codes}
+        if not regions:
+            continue
+
+        region_ids = regions - {None}
+        stored += materialize_dashboards([dashboard_type], region_ids, national=None in regions)
+
+    if stored:
+        logger.info(f"Rebuilt {stored} dashboard payloads")
@@ -0,0 +1,168 @@
+import io
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta, timezone
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer, dataframe_records
+
+class Command(BaseCommand):
+    help = 'Benchmark rendering and parsing representative API payloads with the stdlib and orjson JSON renderers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=5000,
+            help='Rows of the list and table payloads',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=10,
+            help='Runs per renderer and parser; the median is reported',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Seed of the generated payloads',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        payloads = self.payloads(rng, options['rows'])
+
+        renderer, fast_renderer = JSONRenderer(), ORJSONRenderer()
+        parser, fast_parser = JSONParser(), ORJSONParser()
+
+        self.stdout.write(
+            f'{"payload":<24} {"bytes":>10} {"render (ms)":>12} {"orjson (ms)":>12} {"speedup":>8} '
+            f'{"parse (ms)":>11} {"orjson (ms)":>12} {"speedup":>8}'
+        )
+        for name, (data, fast_data) in payloads.items():
+            content = renderer.render(data())
+            if fast_renderer.render(fast_data()) != content:
+                raise CommandError(f'{name}: orjson output differs from JSONRenderer')
+
+            render_time = self.time_run(lambda: renderer.render(data()), options['repeat'])
+            fast_render_time = self.time_run(lambda: fast_renderer.render(fast_data()), options['repeat'])
+            parse_time = self.time_run(lambda: parser.parse(io.BytesIO(content)), options['repeat'])
+            fast_parse_time = self.time_run(lambda: fast_parser.parse(io.BytesIO(content)), options['repeat'])
+            self.stdout.write(
+                f'{name:<24} {len(content):>10} {render_time:>12.2f} {fast_render_time:>12.2f} '
+                f'{render_time / fast_render_time:>7.1f}x {parse_time:>11.2f} {fast_parse_time:>12.2f} '
+                f'{parse_time / fast_parse_time:>7.1f}x'
+            )
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
+
+    def payloads(self, rng, rows):
+        """
+        Payloads shaped like the responses of the list, list_detail, geojson
+        and dashboard endpoints and of the scraper's data endpoint, by name,
+        as (view data for JSONRenderer, view data for ORJSONRenderer); the
+        data is returned by functions so that conversions a view needs
+        before rendering are timed with the rendering.
+        """
+        first_date = date(2024, 12, 31)
+        updated_at = datetime(2025, 1, 15, 8, 30, tzinfo=timezone.utc)
+
+        values = [
+            {
+                'id': i,
+                'indicator': i % 40,
+                'indicator_name': f'Indicator {i % 40}',
+                'indicator_unit': '%',
+                'value': round(rng.uniform(0, 100000), 2),
+                'date': (first_date - timedelta(days=i)).isoformat(),
+                'change_percent': round(rng.uniform(-10, 10), 2),
+            }
+            for i in range(rows)
+        ]
+        details = [
+            {
+                **value,
+                'indicator': {'id': value['indicator'], 'name': value['indicator_name'], 'code': 'IND', 'unit': '%'},
+                'region': {'id': 1, 'name': 'Banadir', 'code': 'BN', 'center_lat': 2.04, 'center_lng': 45.34},
+                'sector': None,
+                'previous_value': value['value'],
+                'source_url': 'https://nbs.gov.so/',
+                'metadata': {'source': 'scraper', 'page': i},
+                'created_at': '2025-01-15T08:30:00Z',
+            }
+            for i, value in enumerate(values)
+        ]
+        geojson = {
+            'type': 'FeatureCollection',
+            'features': [
+                {
+                    'type': 'Feature',
+                    'geometry': {
+                        'type': 'MultiPolygon',
+                        'coordinates': [[[
+                            [round(rng.uniform(41, 51), 6), round(rng.uniform(-2, 12), 6)]
+                            for _ in range(rows // 10)
+                        ]]],
+                    },
+                    'properties': {'id': i, 'name': f'Region {i}', 'code': f'R{i}'},
+                }
+                for i in range(18)
+            ],
+        }
+        dashboard = {
+            'generated_at': updated_at,
+            'indicators': {
+                f'IND{i}': {
+                    'latest': round(rng.uniform(0, 1000), 2),
+                    'series': [
+                        {'date': first_date - timedelta(days=30 * month), 'value': round(rng.uniform(0, 1000), 2)}
+                        for month in range(rows // 50)
+                    ],
+                }
+                for i in range(20)
+            },
+        }
+        payloads = {
+            'indicator values': (lambda: values, lambda: values),
+            'indicator value details': (lambda: details, lambda: details),
+            'regions geojson': (lambda: geojson, lambda: geojson),
+            'dashboard': (lambda: dashboard, lambda: dashboard),
+        }
+
+        try:
+            import numpy
+            import pandas
+        except ImportError:
+            self.stdout.write('numpy and pandas are not installed, skipping the scraped data payload')
+            return payloads
+
+        # The view converts the DataFrame to records, with to_dict before
+        dataframe = pandas.DataFrame({
+            'region': [f'Region {i % 18}' for i in range(rows)],
+            'year': numpy.arange(rows, dtype=numpy.int64) % 30 + 1995,
+            'value': numpy.round(numpy.random.default_rng(rng.randrange(2 ** 32)).uniform(0, 1000, rows), 2),
+            'share': numpy.linspace(0, 1, rows),
+            'published': pandas.date_range('2000-01-01', periods=rows, freq='D', tz='UTC'),
+            'estimate': numpy.arange(rows) % 7 == 0,
+        })
+        scraped = {'id': 1, 'title': 'Scraped table', 'columns': list(dataframe.columns)}
+        payloads['scraped data'] = (
+            lambda: {**scraped, 'data': dataframe.to_dict(orient='records')},
+            lambda: {**scraped, 'data': dataframe_records(dataframe)},
+        )
+        return payloads
+
+    def time_run(self, run, repeat):
+        """
+        Median wall time of a run in milliseconds.
+        """
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
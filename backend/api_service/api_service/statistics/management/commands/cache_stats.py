@@ -0,0 +1,54 @@
+import logging
+from importlib import import_module
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from api_service.caching import CACHED_ENDPOINTS, cache_stats, reset_cache_stats
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Report the response cache hit ratio of each cached endpoint and of each cache tier'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--endpoints',
+            nargs='+',
+            help='Endpoints to report (default: all cached endpoints)',
+        )
+
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Clear the counts after reporting them',
+        )
+
+    def handle(self, *args, **options):
+        # Cached endpoints register themselves when their views are imported
+        import_module(settings.ROOT_URLCONF)
+
+        endpoints = options.get('endpoints') or list(CACHED_ENDPOINTS)
+        unknown = set(endpoints) - set(CACHED_ENDPOINTS)
+        if unknown:
+            raise CommandError(f'Unknown endpoints: {", ".join(sorted(unknown))}')
+
+        for endpoint, stats in cache_stats(endpoints).items():
+            hit_ratio = f"{stats['hit_ratio']:.1%}" if stats['hit_ratio'] is not None else '-'
+            self.stdout.write(
+                f"{endpoint:<32} hits {stats['hits']:>10} stale {stats['stale']:>8} "
+                f"misses {stats['misses']:>10} hit ratio {hit_ratio:>6}"
+            )
+
+        # Two-tier backends also report the hit rates of the local and Redis tiers
+        if hasattr(cache, 'tier_stats'):
+            for tier, stats in cache.tier_stats().items():
+                hit_rate = f"{stats['hit_rate']:.1%}" if stats['hit_rate'] is not None else '-'
+                self.stdout.write(
+                    f"{tier + ' cache':<32} hits {stats['hits']:>10} misses {stats['misses']:>10} hit rate {hit_rate:>6}"
+                )
+
+        if options['reset']:
+            reset_cache_stats(endpoints)
+            if hasattr(cache, 'reset_tier_stats'):
+                cache.reset_tier_stats()
+            self.stdout.write(self.style.SUCCESS('Cache statistics reset'))
@@ -0,0 +1,45 @@
+import logging
+from django.core.management.base import BaseCommand, CommandError
+from api_service.regions.models import Region
+from api_service.statistics.dashboards import dashboard_types, materialize_dashboards
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Rebuild the stored dashboard payloads for every dashboard type and region'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--types',
+            nargs='+',
+            help='Dashboard types to rebuild (default: all configured types)',
+        )
+        
+        parser.add_argument(
+            '--regions',
+            nargs='+',
+            help='Region codes to rebuild (default: all regions and national figures)',
+        )
+
+    def handle(self, *args, **options):
+        types = options.get('types')
+        if types:
+            unknown = set(types) - set(dashboard_types())
+            if unknown:
+                raise CommandError(f'Unknown dashboard types: {", ".join(sorted(unknown))}')
+        
+        region_ids = None
+        if options.get('regions'):
+            regions = dict(
+                Region.objects.filter(code__in=options['regions']).values_list('code', 'id')
+            )
+            unknown = set(options['regions']) - set(regions)
+            if unknown:
+                raise CommandError(f'Unknown region codes: {", ".join(sorted(unknown))}')
+            region_ids = list(regions.values())
+        
+        self.stdout.write(self.style.SUCCESS('Materializing dashboard payloads...'))
+        
+        stored = materialize_dashboards(types, region_ids, national=region_ids is None)
+        
+        self.stdout.write(self.style.SUCCESS(f'Stored {stored} dashboard payloads'))
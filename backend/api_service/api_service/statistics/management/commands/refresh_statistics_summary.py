@@ -0,0 +1,34 @@
+import logging
+from django.core.management.base import BaseCommand, CommandError
+from api_service.indicators.models import Indicator
+from api_service.statistics.summary import refresh_summaries
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Rebuild the landing page indicator summaries from the national series'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--indicators',
+            nargs='+',
+            help='Indicator codes to refresh (default: all indicators)',
+        )
+
+    def handle(self, *args, **options):
+        indicator_ids = None
+        
+        if options.get('indicators'):
+            indicators = dict(
+                Indicator.objects.filter(code__in=options['indicators']).values_list('code', 'id')
+            )
+            unknown = set(options['indicators']) - set(indicators)
+            if unknown:
+                raise CommandError(f'Unknown indicator codes: {", ".join(sorted(unknown))}')
+            indicator_ids = list(indicators.values())
+        
+        self.stdout.write(self.style.SUCCESS('Refreshing indicator summaries...'))
+        
+        refreshed = refresh_summaries(indicator_ids)
+        
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {refreshed} indicator summaries'))
@@ -0,0 +1,76 @@
+from django.db import models
+from api_service.indicators.models import Indicator
+
+class IndicatorSummary(models.Model):
+    """
+    Latest national value of an indicator, refreshed whenever its values are
+    loaded. Backs the landing page summary.
+    """
+    indicator = models.OneToOneField(
+        Indicator,
+        on_delete=models.CASCADE,
+        related_name='summary'
+    )
+    # Copied from the indicator so the summary endpoint reads a single table
+    indicator_code = models.CharField(max_length=50, unique=True)
+    indicator_name = models.CharField(max_length=255)
+    unit = models.CharField(max_length=50, null=True, blank=True)
+    
+    latest_value = models.FloatField()
+    latest_date = models.DateField()
+    previous_value = models.FloatField(null=True, blank=True)
+    change = models.FloatField(null=True, blank=True)
+    change_percent = models.FloatField(null=True, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['indicator_code']
+        verbose_name_plural = 'indicator summaries'
+        
+    def __str__(self):
+        return f"{self.indicator_code}: {self.latest_value} ({self.latest_date})"
+
+class RecentUpdate(models.Model):
+    """
+    Log entry recording that an indicator's values were loaded.
+    """
+    indicator = models.ForeignKey(
+        Indicator,
+        on_delete=models.CASCADE,
+        related_name='recent_updates'
+    )
+    indicator_name = models.CharField(max_length=255)
+    series_count = models.IntegerField(default=0)
+    latest_date = models.DateField(null=True, blank=True)
+    description = models.CharField(max_length=255)
+    
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        ordering = ['-created_at', '-id']
+        
+    def __str__(self):
+        return f"{self.indicator_name} - {self.created_at}"
+
+class DashboardPayload(models.Model):
+    """
+    Materialized response of the dashboard endpoint for a dashboard type and
+    region, stored as gzip-compressed JSON and served as-is.
+    """
+    dashboard_type = models.CharField(max_length=50)
+    # Region code, or blank for national figures
+    region_code = models.CharField(max_length=20, blank=True, default='')
+    
+    content = models.BinaryField()
+    # Size of the uncompressed JSON
+    content_length = models.IntegerField()
+    
+    generated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['dashboard_type', 'region_code']
+        unique_together = ['dashboard_type', 'region_code']
+        
+    def __str__(self):
+        return f"{self.dashboard_type} - {self.region_code or 'national'}"
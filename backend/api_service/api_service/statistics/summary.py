@@ -0,0 +1,187 @@
+"""
+Incremental maintenance of the landing page summary tables.
+
+IndicatorSummary keeps the latest national value of each indicator and
+RecentUpdate logs every load. The loader refreshes both for the series it
+touched, so the summary and recent updates endpoints only read one small
+table instead of scanning IndicatorValue.
+"""
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db.models import Max, Q
+
+from api_service.indicators.models import Indicator, IndicatorValue
+from .models import IndicatorSummary, RecentUpdate
+
+# Indicators whose latest values are looked up in a single query
+INDICATORS_PER_QUERY = 500
+
+# Summary fields that headline entries can refer to
+SUMMARY_FIELDS = {
+    'value': 'latest_value',
+    'previous_value': 'previous_value',
+    'change': 'change',
+    'change_percent': 'change_percent',
+}
+
+
+def refresh_summaries(indicator_ids=None):
+    """
+    Recompute IndicatorSummary rows from the national series.
+
+    Args:
+        indicator_ids: Indicators to refresh, or None for all indicators
+
+    Returns:
+        int: Number of summaries written
+    """
+    national = IndicatorValue.objects.filter(region__isnull=True, sector__isnull=True)
+    if indicator_ids is not None:
+        indicator_ids = list(indicator_ids)
+        national = national.filter(indicator_id__in=indicator_ids)
+
+    latest = list(
+        national.order_by().values('indicator_id').annotate(latest_date=Max('date'))
+        .values_list('indicator_id', 'latest_date')
+    )
+
+    summaries = []
+    for start in range(0, len(latest), INDICATORS_PER_QUERY):
+        latest_filter = reduce(or_, (
+            Q(indicator_id=indicator_id, date=latest_date)
+            for indicator_id, latest_date in latest[start:start + INDICATORS_PER_QUERY]
+        ))
+        rows = national.filter(latest_filter).values_list(
+            'indicator_id', 'indicator__code', 'indicator__name', 'indicator__unit',
+            'value', 'date', 'previous_value', 'change_percent'
+        )
+        for indicator_id, code, name, unit, value, value_date, previous_value, change_percent in rows:
+            summaries.append(IndicatorSummary(
+                indicator_id=indicator_id,
+                indicator_code=code,
+                indicator_name=name,
+                unit=unit,
+                latest_value=value,
+                latest_date=value_date,
+                previous_value=previous_value,
+                change=value - previous_value if previous_value is not None else None,
+                change_percent=change_percent,
+            ))
+
+    if summaries:
+        IndicatorSummary.objects.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=['indicator'],
+            update_fields=[
+                'indicator_code', 'indicator_name', 'unit', 'latest_value', 'latest_date',
+                'previous_value', 'change', 'change_percent', 'updated_at',
+            ],
+        )
+
+    # Drop summaries of indicators that no longer have national values
+    stale = IndicatorSummary.objects.exclude(indicator_id__in=[row[0] for row in latest])
+    if indicator_ids is not None:
+        stale = stale.filter(indicator_id__in=indicator_ids)
+    stale.delete()
+
+    return len(summaries)
+
+
+def log_recent_updates(series):
+    """
+    Add a RecentUpdate entry for each indicator touched by a load.
+
+    Args:
+        series: {(indicator_id, region_id, sector_id): [min_date, max_date]}
+    """
+    config = getattr(settings, 'STATISTICS_SUMMARY', {})
+
+    touched = {}
+    for (indicator_id, _, _), (_, max_date) in series.items():
+        count, latest_date = touched.get(indicator_id, (0, max_date))
+        touched[indicator_id] = (count + 1, max(latest_date, max_date))
+
+    names = dict(Indicator.objects.filter(id__in=touched).values_list('id', 'name'))
+    RecentUpdate.objects.bulk_create([
+        RecentUpdate(
+            indicator_id=indicator_id,
+            indicator_name=names[indicator_id],
+            series_count=count,
+            latest_date=latest_date,
+            description=f"{count} series updated with data through {latest_date:%b %Y}",
+        )
+        for indicator_id, (count, latest_date) in touched.items()
+        if indicator_id in names
+    ])
+
+    # Keep the log small
+    retain = config.get('recent_updates_retain', 500)
+    cutoff = RecentUpdate.objects.order_by('-id').values_list('id', flat=True)[retain:retain + 1]
+    if cutoff:
+        RecentUpdate.objects.filter(id__lte=cutoff[0]).delete()
+
+
+def refresh_after_load(series):
+    """
+    Refresh the summary tables for the series written by a load.
+    """
+    national_ids = {
+        indicator_id
+        for indicator_id, region_id, sector_id in series
+        if region_id is None and sector_id is None
+    }
+    if national_ids:
+        refresh_summaries(national_ids)
+    log_recent_updates(series)
+
+
+def build_summary():
+    """
+    Build the landing page summary from the configured headline indicators.
+
+    Each section of STATISTICS_SUMMARY['headlines'] maps response fields to an
+    (indicator code, summary field) pair; the section's last_updated is the
+    latest date among its indicators.
+    """
+    headlines = getattr(settings, 'STATISTICS_SUMMARY', {}).get('headlines', {})
+    codes = {code for fields in headlines.values() for code, _ in fields.values()}
+
+    summaries = {
+        summary.indicator_code: summary
+        for summary in IndicatorSummary.objects.filter(indicator_code__in=codes)
+    }
+
+    summary_data = {}
+    for section, fields in headlines.items():
+        section_data = {}
+        dates = []
+        for name, (code, field) in fields.items():
+            summary = summaries.get(code)
+            section_data[name] = getattr(summary, SUMMARY_FIELDS[field]) if summary else None
+            if summary:
+                dates.append(summary.latest_date)
+        section_data['last_updated'] = max(dates).strftime('%b %Y') if dates else None
+        summary_data[section] = section_data
+
+    return summary_data
+
+
+def get_recent_updates(limit=None):
+    """
+    Most recent entries of the update log.
+    """
+    if limit is None:
+        limit = getattr(settings, 'STATISTICS_SUMMARY', {}).get('recent_updates_limit', 10)
+
+    return [
+        {
+            'indicator_name': indicator_name,
+            'updated_at': created_at.date().isoformat(),
+            'change_description': description,
+        }
+        for indicator_name, created_at, description in
+        RecentUpdate.objects.values_list('indicator_name', 'created_at', 'description')[:limit]
+    ]
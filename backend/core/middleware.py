@@ -0,0 +1,224 @@
+"""
+Pre-compressed responses for the SNBS Dashboard microservices.
+
+Large responses under RESPONSE_COMPRESSION['paths'] are compressed once per
+encoding and the compressed bodies are kept in the default cache, keyed on a
+digest of the uncompressed body. Later responses with the same body are
+served from the cache in the best encoding the client accepts, without
+compressing them again.
+
+A body not compressed yet is compressed in the background, at the highest
+configured levels, while the current response is gzipped at a fast level
+(or left uncompressed for clients not accepting gzip). Responses the view
+already gzipped, such as stored dashboard payloads, are served as they are
+to gzip clients, and their brotli encoding is built in the background.
+
+brotli is optional; without it only gzip is stored.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+ENCODINGS = ('br', 'gzip')
+
+_accept_encoding_re = re.compile(r'\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?')
+
+
+def compression_config():
+    """
+    Response compression settings.
+    """
+    return getattr(settings, 'RESPONSE_COMPRESSION', {})
+
+
+def accepted_encodings(header):
+    """
+    Encodings an Accept-Encoding header names, with their weights.
+
+    Returns:
+        dict: {encoding: q}; q=0 marks an encoding the client refuses
+    """
+    accepted = {}
+    for item in header.split(','):
+        match = _accept_encoding_re.match(item)
+        if not match:
+            continue
+        try:
+            q = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+        accepted[match.group(1).lower()] = q
+    return accepted
+
+
+def encoding_weight(accepted, encoding):
+    """
+    Weight of an encoding in accepted_encodings(), falling back to '*'; an
+    encoding refused with q=0 is not accepted through the wildcard.
+    """
+    return accepted.get(encoding, accepted.get('*', 0))
+
+
+def compress(content, encoding, config):
+    """
+    Body compressed in an encoding at its configured level.
+    """
+    if encoding == 'br':
+        return brotli.compress(content, quality=config.get('brotli_quality', 11))
+    return gzip.compress(content, compresslevel=config.get('gzip_level', 9), mtime=0)
+
+
+def _cache_key(digest, encoding):
+    return f'compressed:{encoding}:{digest}'
+
+
+# Background compression: one executor per process, and the bodies it is
+# compressing, so concurrent misses for the same body are compressed once
+_executor = None
+_executor_pid = None
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def _submit(digest, content, source_encoding, encodings, config):
+    """
+    Compress a body in the background, unless it is already being compressed
+    or too many bodies are queued.
+    """
+    global _executor, _executor_pid
+
+    with _pending_lock:
+        if digest in _pending or len(_pending) >= config.get('max_pending', 32):
+            return
+        if _executor_pid != os.getpid():
+            # Threads of an executor created before a fork do not run in the child
+            _executor = ThreadPoolExecutor(
+                max_workers=config.get('workers', 2), thread_name_prefix='response-compression'
+            )
+            _executor_pid = os.getpid()
+            _pending.clear()
+        _pending.add(digest)
+
+    _executor.submit(_compress_and_store, digest, content, source_encoding, encodings, config)
+
+
+def _compress_and_store(digest, content, source_encoding, encodings, config):
+    try:
+        if source_encoding == 'gzip':
+            content = gzip.decompress(content)
+        timeout = config.get('cache_timeout', 60 * 60 * 24)
+        cache.set_many({
+            _cache_key(digest, encoding): compress(content, encoding, config)
+            for encoding in encodings
+        }, timeout)
+    except Exception as e:
+        logger.error(f"Error compressing response: {str(e)}")
+    finally:
+        with _pending_lock:
+            _pending.discard(digest)
+
+
+class PrecompressedResponseMiddleware:
+    """
+    Serve large responses of the configured paths compressed with brotli or
+    gzip, from compressed bodies kept in the cache.
+
+    Placed near the top of MIDDLEWARE, so it compresses the response after
+    other middleware set its headers.
+    """
+    def __init__(self, get_response):
+        config = compression_config()
+        self.paths = tuple(config.get('paths', ()))
+        if not self.paths:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.encodings = [
+            encoding for encoding in config.get('encodings', ENCODINGS)
+            if encoding in ENCODINGS and (encoding != 'br' or brotli is not None)
+        ]
+        if 'br' in config.get('encodings', ENCODINGS) and brotli is None:
+            logger.warning("brotli is not installed, responses are only compressed with gzip")
+        self.content_types = tuple(config.get('content_types', ('application/json',)))
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(self.paths):
+            return response
+
+        source_encoding = response.get('Content-Encoding')
+        if response.status_code != 200 or response.streaming or source_encoding not in (None, 'gzip') \
+                or not response.get('Content-Type', '').startswith(self.content_types):
+            return response
+
+        config = compression_config()
+        content = response.content
+        if len(content) < config.get('min_size', 1024):
+            return response
+
+        # Compressed or not, the response now depends on Accept-Encoding
+        patch_vary_headers(response, ['Accept-Encoding'])
+
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        wanted = sorted(
+            (encoding for encoding in self.encodings if encoding_weight(accepted, encoding) > 0),
+            key=lambda encoding: -encoding_weight(accepted, encoding)
+        )
+        if not wanted:
+            return response
+
+        digest = hashlib.sha1(content).hexdigest()
+        stored = cache.get_many([
+            _cache_key(digest, encoding) for encoding in wanted if encoding != source_encoding
+        ])
+        for encoding in wanted:
+            if encoding == source_encoding:
+                break
+            compressed = stored.get(_cache_key(digest, encoding))
+            if compressed is not None:
+                return self._encode(response, compressed, encoding)
+
+        # The preferred encoding is not stored yet: build every encoding the
+        # body is not already in
+        if wanted[0] != source_encoding:
+            _submit(
+                digest, content, source_encoding,
+                [encoding for encoding in self.encodings if encoding != source_encoding], config
+            )
+
+        if source_encoding is not None or 'gzip' not in wanted:
+            return response
+        return self._encode(
+            response,
+            gzip.compress(content, compresslevel=config.get('inline_gzip_level', 1), mtime=0),
+            'gzip'
+        )
+
+    def _encode(self, response, compressed, encoding):
+        """
+        Replace the body of a response by its compressed form.
+        """
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+
+        # The compressed body differs from the uncompressed one byte for byte
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
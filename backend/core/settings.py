@@ -43,6 +43,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.PrecompressedResponseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -128,6 +129,15 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
@@ -190,3 +200,18 @@ SCRAPER_SCHEDULE_INTERVAL = int(os.environ.get('SCRAPER_SCHEDULE_INTERVAL', '144
 
 # API version
 API_VERSION = os.environ.get('API_VERSION', 'v1')
+
+# Pre-compressed responses (see core/middleware.py); each service sets the
+# path prefixes of its large responses
+RESPONSE_COMPRESSION = {
+    'paths': [],
+    'encodings': ['br', 'gzip'],            # Stored encodings, in order of preference
+    'content_types': ['application/json'],
+    'min_size': 1024,                       # Bytes below which responses are not compressed
+    'brotli_quality': 11,
+    'gzip_level': 9,
+    'inline_gzip_level': 1,                 # gzip level of responses served before their encodings are stored
+    'cache_timeout': 60 * 60 * 24,          # Seconds compressed bodies are kept
+    'workers': 2,                           # Background compression threads per process
+    'max_pending': 32,                      # Bodies queued for compression per process
+}
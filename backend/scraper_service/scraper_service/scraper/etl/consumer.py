@@ -2,15 +2,24 @@ import json
 import logging
 import pika
 import time
+import uuid
+from datetime import timedelta
 from threading import Thread
 from django.conf import settings
-from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 
-from ..models import ScrapedItem
-from .processors import HTMLTableProcessor, PDFTableProcessor, DataCategorizer
+from ..models import ScrapedItem, ProcessedChunk, ProcessedResult, ProcessedMessage
+from ..metrics import collecting, timed_stage, increment
+from .processors import (
+    HTMLTableProcessor, PDFTableProcessor, DataCategorizer, PROCESSOR_VERSION, content_hash
+)
 
 logger = logging.getLogger(__name__)
 
+# Item fields written by processing; the content is handed to the processor
+PROCESSING_FIELDS = ['metadata', 'status', 'error_message', 'updated_at']
+
 class MessageQueueConsumer:
     """
     Consume messages from RabbitMQ for ETL processing.
@@ -20,6 +29,17 @@ class MessageQueueConsumer:
         self.exchange = self.config.get('exchange', 'snbs')
         self.statistics_queue = self.config.get('statistics_queue', 'statistics_data')
         self.publications_queue = self.config.get('publications_queue', 'publications_data')
+        self.indicator_queue = self.config.get('indicator_queue', 'indicator_values')
+        
+        # Tables above the threshold are processed in row chunks
+        scraper_config = getattr(settings, 'SCRAPER_CONFIG', {})
+        self.stream_threshold = scraper_config.get('etl_stream_threshold', 20000)
+        self.chunk_size = scraper_config.get('etl_chunk_size', 5000)
+        
+        # Processed-result cache and duplicate delivery counts of this consumer
+        self.cache_stats = {'hits': 0, 'misses': 0, 'duplicates': 0}
+        self.stats_log_interval = scraper_config.get('etl_stats_log_interval', 100)
+        
         self.connection = None
         self.channel = None
         self.running = False
@@ -62,6 +82,12 @@ class MessageQueueConsumer:
             durable=True
         )
         
+        # Processed records are forwarded to the API service loader on this queue
+        self.channel.queue_declare(
+            queue=self.indicator_queue,
+            durable=True
+        )
+        
         # Bind queues to exchange
         self.channel.queue_bind(
             exchange=self.exchange,
@@ -75,6 +101,12 @@ class MessageQueueConsumer:
             routing_key=self.publications_queue
         )
         
+        self.channel.queue_bind(
+            exchange=self.exchange,
+            queue=self.indicator_queue,
+            routing_key=self.indicator_queue
+        )
+        
         # Set prefetch count to control message dispatching
         self.channel.basic_qos(prefetch_count=1)
         
@@ -129,60 +161,24 @@ class MessageQueueConsumer:
                 channel.basic_ack(delivery_tag=method.delivery_tag)
                 return
             
-            # Process the item
-            with transaction.atomic():
-                # Get the scraped item from the database
-                try:
-                    item = ScrapedItem.objects.get(id=item_id)
-                except ScrapedItem.DoesNotExist:
-                    logger.error(f"ScrapedItem {item_id} not found")
-                    channel.basic_ack(delivery_tag=method.delivery_tag)
-                    return
-                
-                # Process based on item type
-                if item.item_type == ScrapedItem.TYPE_HTML_TABLE:
-                    processor = HTMLTableProcessor()
-                elif item.item_type == ScrapedItem.TYPE_PDF_TABLE:
-                    processor = PDFTableProcessor()
-                else:
-                    logger.error(f"Unsupported item type: {item.item_type}")
-                    item.status = ScrapedItem.STATUS_FAILED
-                    item.error_message = f"Unsupported item type: {item.item_type}"
-                    item.save()
-                    channel.basic_ack(delivery_tag=method.delivery_tag)
-                    return
-                
-                # Process the item content
-                try:
-                    # Process the content
-                    processor.load(item.content).process()
-                    result = processor.get_result()
-                    
-                    # Categorize the data
-                    categorizer = DataCategorizer(result['data'], result['metadata'])
-                    categories = categorizer.categorize()
-                    
-                    # Update the item with processed data
-                    item.metadata.update({
-                        'processed_metadata': result['metadata'],
-                        'categories': categories
-                    })
-                    
-                    # Update the item status
-                    item.status = ScrapedItem.STATUS_PROCESSED
-                    item.save()
-                    
-                    # Forward to the appropriate API service for database insertion
-                    # This would normally call an API endpoint or message queue
-                    # For now, we'll just log it
-                    logger.info(f"Successfully processed item {item_id}")
-                    logger.info(f"Data categories: {categories}")
-                    
-                except Exception as e:
-                    logger.exception(f"Error processing item {item_id}: {str(e)}")
-                    item.status = ScrapedItem.STATUS_FAILED
-                    item.error_message = str(e)
-                    item.save()
+            # Get the scraped item from the database
+            try:
+                item = ScrapedItem.objects.get(id=item_id)
+            except ScrapedItem.DoesNotExist:
+                logger.error(f"ScrapedItem {item_id} not found")
+                channel.basic_ack(delivery_tag=method.delivery_tag)
+                return
+            
+            # Process the item. This is not one transaction, so the chunks of
+            # a large table are committed as they are written
+            with collecting(item.job_id):
+                message_id = properties.message_id or message.get('message_id')
+                if self.is_duplicate(message_id):
+                    logger.info(f"Skipping duplicate delivery of message {message_id} for item {item_id}")
+                elif self.process_item(channel, item):
+                    # Recorded after the item status, so a delivery that was
+                    # not fully processed is processed again when redelivered
+                    self.record_message(message_id, item)
             
             # Acknowledge the message
             channel.basic_ack(delivery_tag=method.delivery_tag)
@@ -194,6 +190,276 @@ class MessageQueueConsumer:
             logger.exception(f"Error processing message: {str(e)}")
             channel.basic_ack(delivery_tag=method.delivery_tag)
     
+    def is_duplicate(self, message_id):
+        """
+        Whether a message ID was already processed successfully.
+        """
+        if not message_id or not ProcessedMessage.objects.filter(message_id=message_id).exists():
+            return False
+        
+        self.count('duplicates')
+        increment('etl_duplicate_message')
+        return True
+    
+    def record_message(self, message_id, item):
+        """
+        Record a successfully processed message ID.
+        """
+        if message_id:
+            ProcessedMessage.objects.get_or_create(message_id=message_id, defaults={'item': item})
+    
+    def count(self, stat):
+        """
+        Update the cache statistics, logging hit rates periodically.
+        """
+        self.cache_stats[stat] += 1
+        
+        total = sum(self.cache_stats.values())
+        if self.stats_log_interval and total % self.stats_log_interval == 0:
+            self.log_cache_stats()
+    
+    def log_cache_stats(self):
+        """
+        Log processed-result cache hit rate and duplicate deliveries.
+        """
+        lookups = self.cache_stats['hits'] + self.cache_stats['misses']
+        hit_rate = (self.cache_stats['hits'] / lookups * 100) if lookups else 0
+        logger.info(
+            f"ETL cache: {self.cache_stats['hits']} hits, {self.cache_stats['misses']} misses "
+            f"({hit_rate:.1f}% hit rate), {self.cache_stats['duplicates']} duplicate messages skipped"
+        )
+    
+    def reuse_cached_result(self, channel, item, result_hash):
+        """
+        Apply a cached processing result to the item, if there is one, and
+        forward the stored records of the item that produced it.
+        
+        Identical content with the same category and time period produces
+        identical indicator values. The loader acks messages it failed to
+        load, so they are forwarded again rather than assumed loaded; loading
+        them twice is an idempotent upsert. A result whose records are no
+        longer stored is not reused.
+        """
+        cached = ProcessedResult.objects.filter(
+            content_hash=result_hash,
+            processor_version=PROCESSOR_VERSION
+        ).first()
+        
+        chunks = ProcessedChunk.objects.filter(item_id=cached.source_item_id) if cached else None
+        if cached is None or not chunks.exists():
+            self.count('misses')
+            increment('etl_cache_miss')
+            return False
+        
+        item.metadata.update({
+            'processed_metadata': cached.processed_metadata,
+            'categories': cached.categories,
+            'processed_from': cached.source_item_id
+        })
+        item.status = ScrapedItem.STATUS_PROCESSED
+        item.error_message = None
+        item.save()
+        
+        ProcessedResult.objects.filter(id=cached.id).update(hit_count=F('hit_count') + 1)
+        
+        for chunk in chunks.iterator(chunk_size=1):
+            self.forward_to_loader(
+                channel, item, {'data': chunk.records, 'metadata': cached.processed_metadata}, cached.categories
+            )
+        
+        self.count('hits')
+        increment('etl_cache_hit')
+        logger.info(f"Reused cached processing result for item {item.id} from item {cached.source_item_id}")
+        return True
+    
+    def cache_result(self, item, result_hash, metadata, categories):
+        """
+        Store the processing result of an item for reuse.
+        """
+        ProcessedResult.objects.update_or_create(
+            content_hash=result_hash,
+            processor_version=PROCESSOR_VERSION,
+            defaults={
+                'processed_metadata': metadata,
+                'categories': categories,
+                'source_item': item
+            }
+        )
+    
+    def process_item(self, channel, item):
+        """
+        Process and categorize a scraped item, then forward its records.
+        
+        Returns:
+            bool: Whether the item was processed; failures are recorded on the item
+        """
+        # Process based on item type
+        if item.item_type == ScrapedItem.TYPE_HTML_TABLE:
+            processor = HTMLTableProcessor()
+        elif item.item_type == ScrapedItem.TYPE_PDF_TABLE:
+            processor = PDFTableProcessor()
+        else:
+            logger.error(f"Unsupported item type: {item.item_type}")
+            item.status = ScrapedItem.STATUS_FAILED
+            item.error_message = f"Unsupported item type: {item.item_type}"
+            item.save()
+            return False
+        
+        # Process the item content
+        try:
+            # The category and time period end up in the loaded values, so
+            # they are part of the cache key
+            result_hash = content_hash(
+                item.content,
+                item.item_type,
+                item.metadata.get('category', ''),
+                item.metadata.get('time_period', '')
+            )
+            if self.reuse_cached_result(channel, item, result_hash):
+                return True
+            
+            # The processor consumes a large table while chunking it, so the
+            # item drops its reference and is saved with PROCESSING_FIELDS only
+            processor.load(item.content)
+            item.content = None
+            
+            # Large tables are processed in chunks to bound memory
+            if processor.row_count() > self.stream_threshold:
+                self.process_item_stream(channel, item, processor)
+                self.cache_result(item, result_hash, item.metadata['processed_metadata'], item.metadata['categories'])
+                return True
+            
+            # Process the content
+            processor.process()
+            result = processor.get_result()
+            
+            # Categorize the data
+            categorizer = DataCategorizer(result['data'], result['metadata'])
+            categories = categorizer.categorize()
+            
+            # Update the item with processed data
+            item.metadata.update({
+                'processed_metadata': result['metadata'],
+                'categories': categories
+            })
+            
+            # Update the item status
+            item.status = ScrapedItem.STATUS_PROCESSED
+            item.save(update_fields=PROCESSING_FIELDS)
+            
+            # Kept so a cache hit on the same content can forward them again
+            records = result['data'] or []
+            self.store_chunks(item, (
+                records[start:start + self.chunk_size] for start in range(0, len(records), self.chunk_size)
+            ))
+            
+            # Forward to the API service loader for database insertion
+            self.forward_to_loader(channel, item, result, categories)
+            
+            self.cache_result(item, result_hash, result['metadata'], categories)
+            
+            logger.info(f"Successfully processed item {item.id}")
+            logger.info(f"Data categories: {categories}")
+            return True
+            
+        except Exception as e:
+            logger.exception(f"Error processing item {item.id}: {str(e)}")
+            item.status = ScrapedItem.STATUS_FAILED
+            item.error_message = str(e)
+            item.save(update_fields=PROCESSING_FIELDS)
+            return False
+    
+    def process_item_stream(self, channel, item, processor):
+        """
+        Process a large table in row chunks.
+        
+        Each chunk of processed records is written to a ProcessedChunk row as
+        soon as it is produced. Once the whole table has been summarized and
+        categorized, the chunks are read back one at a time and forwarded to
+        the loader.
+        """
+        chunk_count, row_offset = self.store_chunks(
+            item, processor.process_stream(chunk_size=self.chunk_size)
+        )
+        
+        result = processor.get_result()
+        
+        # Categorize from the accumulated summary
+        categorizer = DataCategorizer(None, result['metadata'])
+        categories = categorizer.categorize()
+        
+        item.metadata.update({
+            'processed_metadata': result['metadata'],
+            'categories': categories,
+            'processed_chunks': chunk_count
+        })
+        item.status = ScrapedItem.STATUS_PROCESSED
+        item.save(update_fields=PROCESSING_FIELDS)
+        
+        for chunk in item.processed_chunks.iterator(chunk_size=1):
+            self.forward_to_loader(channel, item, {'data': chunk.records, 'metadata': result['metadata']}, categories)
+        
+        logger.info(f"Successfully processed item {item.id} in {chunk_count} chunks ({row_offset} records)")
+        logger.info(f"Data categories: {categories}")
+    
+    def store_chunks(self, item, chunks):
+        """
+        Store chunks of processed records of an item, replacing those of any
+        previous run.
+        
+        Returns:
+            tuple: (chunk count, record count)
+        """
+        item.processed_chunks.all().delete()
+        
+        chunk_count = 0
+        row_offset = 0
+        for records in chunks:
+            ProcessedChunk.objects.create(
+                item=item,
+                chunk_index=chunk_count,
+                row_offset=row_offset,
+                row_count=len(records),
+                records=records
+            )
+            chunk_count += 1
+            row_offset += len(records)
+        return chunk_count, row_offset
+    
+    @timed_stage('etl_forward')
+    def forward_to_loader(self, channel, item, result, categories):
+        """
+        Publish processed records to the indicator queue consumed by the
+        API service bulk loader.
+        """
+        if not result['data']:
+            return
+        
+        message = {
+            'item_id': item.id,
+            'source_url': item.source_url,
+            'title': item.title,
+            'category': item.metadata.get('category', ''),
+            'time_period': item.metadata.get('time_period', ''),
+            'records': result['data'],
+            'metadata': {
+                'dtype_map': result['metadata'].get('dtype_map', {}),
+                'time_dimension': result['metadata'].get('time_dimension'),
+            },
+            'categories': categories,
+        }
+        
+        channel.basic_publish(
+            exchange=self.exchange,
+            routing_key=self.indicator_queue,
+            body=json.dumps(message, default=str),
+            properties=pika.BasicProperties(
+                delivery_mode=2,  # persistent
+                message_id=str(uuid.uuid4()),
+                content_type='application/json'
+            )
+        )
+    
     def cleanup(self):
         """
         Clean up connections.
@@ -206,6 +472,7 @@ class MessageQueueConsumer:
                 self.connection.close()
                 
             self.running = False
+            self.log_cache_stats()
             logger.info("Message consumer stopped and connections closed")
         except Exception as e:
             logger.exception(f"Error during cleanup: {str(e)}")
@@ -227,6 +494,24 @@ class MessageQueueConsumer:
         self.cleanup()
 
 
+def purge_processed_messages(retention_days=None):
+    """
+    Delete processed message IDs older than the retention period, which has
+    to exceed the longest time a message can wait for redelivery.
+    
+    Returns:
+        int: Number of message IDs deleted
+    """
+    if retention_days is None:
+        scraper_config = getattr(settings, 'SCRAPER_CONFIG', {})
+        retention_days = scraper_config.get('etl_processed_message_retention_days', 7)
+    
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted, _ = ProcessedMessage.objects.filter(created_at__lt=cutoff).delete()
+    logger.info(f"Purged {deleted} processed message IDs older than {retention_days} days")
+    return deleted
+
+
 def start_consumer():
     """
     Start the message queue consumer.
@@ -2,12 +2,31 @@ import pandas as pd
 import numpy as np
 import re
 import json
+import hashlib
 import logging
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple, Union
 
+from ..metrics import timed_stage
+
 logger = logging.getLogger(__name__)
 
+# Bump when a change to the processors or categorizer changes their output, so
+# results cached under the previous version are no longer reused
+PROCESSOR_VERSION = '1'
+
+def content_hash(content: Any, *context: Any) -> str:
+    """
+    Hash item content together with any context that affects its processing.
+    """
+    digest = hashlib.sha256()
+    for part in context + (content,):
+        if not isinstance(part, str):
+            part = json.dumps(part, sort_keys=True, separators=(',', ':'), default=str)
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
 class BaseProcessor:
     """
     Base class for ETL processors with common functionality.
@@ -159,6 +178,115 @@ class BaseProcessor:
         return date_columns[0] if date_columns else None
 
 
+class TableSummary:
+    """
+    Incremental type and statistics summary of a table processed in chunks.
+    
+    Counts are accumulated per chunk so the resulting dtype map and categorical
+    columns match what the in-memory analysis computes over the whole table.
+    Distinct values are only tracked up to distinct_limit per column; a column
+    exceeding it is treated as non-categorical.
+    """
+    def __init__(self, distinct_limit: int = 10000):
+        self.distinct_limit = distinct_limit
+        self.row_count = 0
+        self.columns = {}
+    
+    @timed_stage('etl_summarize')
+    def update(self, df: pd.DataFrame):
+        """
+        Add a cleaned chunk to the summary.
+        """
+        self.row_count += len(df)
+        
+        for col in df.columns:
+            summary = self.columns.setdefault(col, {
+                'non_null': 0,
+                'numeric': 0,
+                'dates': 0,
+                'min': None,
+                'max': None,
+                'sum': 0.0,
+                'distinct': set(),
+            })
+            
+            values = df[col].dropna()
+            summary['non_null'] += len(values)
+            
+            numeric = pd.to_numeric(df[col], errors='coerce').dropna()
+            summary['numeric'] += len(numeric)
+            summary['dates'] += pd.to_datetime(df[col], errors='coerce').notna().sum()
+            
+            if len(numeric):
+                chunk_min, chunk_max = float(numeric.min()), float(numeric.max())
+                summary['min'] = chunk_min if summary['min'] is None else min(summary['min'], chunk_min)
+                summary['max'] = chunk_max if summary['max'] is None else max(summary['max'], chunk_max)
+                summary['sum'] += float(numeric.sum())
+            
+            if summary['distinct'] is not None:
+                summary['distinct'].update(values.unique())
+                if len(summary['distinct']) > self.distinct_limit:
+                    summary['distinct'] = None
+    
+    def present_columns(self) -> List[str]:
+        """
+        Columns with at least one value, in table order.
+        """
+        return [col for col, summary in self.columns.items() if summary['non_null']]
+    
+    def dtype_map(self) -> Dict[str, str]:
+        """
+        Column types using the same thresholds as BaseProcessor.detect_data_types.
+        """
+        dtype_map = {}
+        
+        for col in self.present_columns():
+            summary = self.columns[col]
+            if self.row_count and summary['numeric'] / self.row_count > 0.7:
+                dtype_map[col] = 'numeric'
+            elif self.row_count and summary['dates'] / self.row_count > 0.7:
+                dtype_map[col] = 'date'
+            else:
+                dtype_map[col] = 'string'
+        
+        return dtype_map
+    
+    def categorical_columns(self) -> List[str]:
+        """
+        Columns with relatively few unique values compared to total rows.
+        """
+        categorical_cols = []
+        
+        for col in self.present_columns():
+            distinct = self.columns[col]['distinct']
+            if distinct is not None and 1 < len(distinct) < self.row_count * 0.5:
+                categorical_cols.append(col)
+        
+        return categorical_cols
+    
+    def column_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Count, null count and numeric statistics per column.
+        """
+        stats = {}
+        
+        for col in self.present_columns():
+            summary = self.columns[col]
+            stats[col] = {
+                'count': summary['non_null'],
+                'null_count': self.row_count - summary['non_null'],
+                'distinct_count': len(summary['distinct']) if summary['distinct'] is not None else None,
+            }
+            if summary['numeric']:
+                stats[col].update({
+                    'min': summary['min'],
+                    'max': summary['max'],
+                    'mean': summary['sum'] / summary['numeric'],
+                })
+        
+        return stats
+
+
 class HTMLTableProcessor(BaseProcessor):
     """
     Process HTML tables from the scraper.
@@ -198,7 +326,133 @@ class HTMLTableProcessor(BaseProcessor):
             logger.error(f"Error processing HTML table: {str(e)}")
             raise
     
-    def _clean_dataframe(self, df: pd.DataFrame):
+    def _table_data(self) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Get the raw table: a list of records, or columns keyed by name.
+        """
+        if not self.raw_data or not isinstance(self.raw_data, dict):
+            raise ValueError("Invalid data format")
+        
+        return self.raw_data.get('data', self.raw_data)
+    
+    def row_count(self) -> int:
+        """
+        Count the raw table rows without converting the table.
+        """
+        data = self._table_data()
+        if isinstance(data, list):
+            return len(data)
+        
+        columns = list(data.values())
+        if columns and all(isinstance(column, list) for column in columns):
+            return max(len(column) for column in columns)
+        if columns and all(isinstance(column, dict) for column in columns):
+            # Rows are the union of the column indexes, as in a DataFrame
+            return len(set().union(*columns))
+        return len(pd.DataFrame(data))
+    
+    @staticmethod
+    def _take_rows(rows: List[Any], chunk_size: int) -> List[Any]:
+        """
+        Remove and return the first chunk_size entries of a reversed list.
+        """
+        chunk = rows[-chunk_size:]
+        del rows[-chunk_size:]
+        chunk.reverse()
+        return chunk
+    
+    def _row_chunks(self, chunk_size: int):
+        """
+        Yield the raw table rows as DataFrames of at most chunk_size rows.
+        
+        The raw table is consumed: rows are removed from raw_data as they are
+        chunked, so the parsed rows already processed can be freed.
+        """
+        data = self._table_data()
+        if isinstance(data, list):
+            # Reversed once, so each chunk is taken from the end of the list
+            data.reverse()
+            while data:
+                yield pd.DataFrame(self._take_rows(data, chunk_size))
+            return
+        
+        columns = list(data.values())
+        if columns and all(isinstance(column, list) for column in columns):
+            for column in columns:
+                column.reverse()
+            while any(columns):
+                yield pd.DataFrame({
+                    name: self._take_rows(column, chunk_size) for name, column in data.items()
+                })
+            return
+        
+        # Indexed columns are aligned once, then sliced positionally
+        df = pd.DataFrame(data)
+        data.clear()
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size].copy()
+    
+    def process_stream(self, chunk_size: int = 5000, distinct_limit: int = 10000):
+        """
+        Process the table in row chunks, yielding the cleaned records of each chunk.
+        
+        Only one chunk is held as a DataFrame at a time, except for columns
+        keyed by row index, which are aligned in one DataFrame. The raw table is
+        consumed as it is chunked, so it cannot be processed again. Type and statistics
+        summaries are accumulated as chunks pass through and written to
+        self.metadata once the last chunk has been yielded; processed_data is
+        left empty. Columns that turn out to be empty are left out of the
+        summaries but keep their (null) keys in records already yielded.
+        """
+        chunks = self._row_chunks(chunk_size)
+        
+        if 'schema' in self.raw_data and 'fields' in self.raw_data['schema']:
+            column_info = {field.get('name'): field for field in self.raw_data['schema'].get('fields', [])}
+            self.metadata['column_info'] = column_info
+        
+        summary = TableSummary(distinct_limit=distinct_limit)
+        self.processed_data = None
+        
+        try:
+            for df in chunks:
+                # Rows can be dropped per chunk; columns are only dropped from
+                # the summary, once it is known they are empty in every chunk
+                self._clean_dataframe(df, drop_empty_columns=False)
+                summary.update(df)
+                
+                records = self._to_records(df)
+                if records:
+                    yield records
+            
+            self._summarize(summary)
+            
+        except Exception as e:
+            logger.error(f"Error processing HTML table in chunks: {str(e)}")
+            raise
+    
+    def _summarize(self, summary: TableSummary):
+        """
+        Store the accumulated summary of a chunked run in the metadata.
+        """
+        dtype_map = summary.dtype_map()
+        self.metadata['dtype_map'] = dtype_map
+        
+        # Same name-based detection as detect_time_dimension, then date columns
+        date_columns = [col for col in dtype_map if any(term in col.lower() for term in
+                                                       ['year', 'month', 'date', 'time', 'period'])]
+        if not date_columns:
+            date_columns = [col for col, dtype in dtype_map.items() if dtype == 'date']
+        if date_columns:
+            self.metadata['time_dimension'] = date_columns[0]
+        
+        self.metadata['categorical_columns'] = summary.categorical_columns()
+        self.metadata['column_stats'] = summary.column_stats()
+        self.metadata['row_count'] = summary.row_count
+        self.metadata['column_count'] = len(dtype_map)
+        self.metadata['chunked'] = True
+    
+    @timed_stage('etl_clean')
+    def _clean_dataframe(self, df: pd.DataFrame, drop_empty_columns: bool = True):
         """
         Clean the DataFrame.
         """
@@ -206,7 +460,8 @@ class HTMLTableProcessor(BaseProcessor):
         df.dropna(how='all', inplace=True)
         
         # Drop columns that are all NaN
-        df.dropna(axis=1, how='all', inplace=True)
+        if drop_empty_columns:
+            df.dropna(axis=1, how='all', inplace=True)
         
         # Clean column names
         df.columns = [self.normalize_column_name(col) for col in df.columns]
@@ -216,6 +471,7 @@ class HTMLTableProcessor(BaseProcessor):
             if df[col].dtype == 'object':
                 df[col] = df[col].apply(lambda x: self.clean_string(x) if isinstance(x, str) else x)
     
+    @timed_stage('etl_analyze')
     def _analyze_dataframe(self, df: pd.DataFrame):
         """
         Analyze the DataFrame structure.
@@ -244,6 +500,7 @@ class HTMLTableProcessor(BaseProcessor):
         self.metadata['row_count'] = len(df)
         self.metadata['column_count'] = len(df.columns)
     
+    @timed_stage('etl_to_records')
     def _to_records(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
         """
         Convert DataFrame to a list of records.
@@ -282,37 +539,226 @@ class PDFTableProcessor(HTMLTableProcessor):
             
         return self
     
+    def process_stream(self, chunk_size: int = 5000, distinct_limit: int = 10000):
+        """
+        Process PDF table data in row chunks.
+        """
+        first_chunk = True
+        for records in super().process_stream(chunk_size, distinct_limit):
+            # A repeated header can only be the first row of the first chunk
+            if first_chunk and len(records) > 1 and self._is_header_row(records[0]):
+                records = records[1:]
+                self.metadata['header_row_removed'] = True
+            first_chunk = False
+            yield records
+        
+        self.metadata['source_type'] = 'pdf'
+    
     def _fix_pdf_extraction_issues(self):
         """
         Fix common issues with PDF table extraction.
         """
         # Detect and remove duplicate headers that may appear in PDF extractions
         if self.processed_data and len(self.processed_data) > 1:
-            # Check if the first row matches any column names
-            first_row = self.processed_data[0]
-            column_names = set(first_row.keys())
-            
-            # Check if first row values are similar to column names
-            matches = 0
-            for col, val in first_row.items():
-                if val and isinstance(val, str) and col.lower() in val.lower():
-                    matches += 1
-            
-            # If many column values match column names, it's likely a header row
-            if matches > len(column_names) * 0.5:
+            if self._is_header_row(self.processed_data[0]):
                 self.processed_data = self.processed_data[1:]
                 self.metadata['header_row_removed'] = True
+    
+    @staticmethod
+    def _is_header_row(row: Dict[str, Any]) -> bool:
+        """
+        Check whether a record repeats the column names.
+        """
+        column_names = set(row.keys())
+        
+        # Check if row values are similar to column names
+        matches = 0
+        for col, val in row.items():
+            if val and isinstance(val, str) and col.lower() in val.lower():
+                matches += 1
+        
+        # If many column values match column names, it's likely a header row
+        return matches > len(column_names) * 0.5
+
+
+# Default keyword tables for the DataCategorizer. Groups can be replaced through
+# SCRAPER_CONFIG['categorizer_keywords'] or a JSON file of the same shape named by
+# SCRAPER_CONFIG['categorizer_keywords_file'].
+DEFAULT_CATEGORY_KEYWORDS = {
+    'region': ['region', 'district', 'state', 'province', 'city', 'town', 'area'],
+    'sector': ['sector', 'industry', 'category', 'type', 'group'],
+    'indicator_types': {
+        'population': ['population', 'people', 'persons', 'inhabitants', 'demographics', 'citizen'],
+        'economic': ['gdp', 'economy', 'inflation', 'cpi', 'price', 'income', 'economic', 'export', 'import', 'trade'],
+        'education': ['education', 'school', 'literacy', 'student', 'teacher', 'enrollment'],
+        'health': ['health', 'hospital', 'disease', 'mortality', 'vaccination', 'vaccine', 'immunization'],
+        'infrastructure': ['infrastructure', 'road', 'water', 'electricity', 'energy', 'communication'],
+        'agriculture': ['agriculture', 'crop', 'livestock', 'farming', 'land', 'food'],
+    },
+}
+
+# Matcher label prefix for indicator type keyword groups
+INDICATOR_TYPE_LABEL = 'indicator_type:'
+
+
+class KeywordMatcher:
+    """
+    Multi-pattern substring matcher compiled from labelled keyword groups.
+    
+    All keywords are compiled into a single regular expression, so a text is
+    scanned once and every label with a keyword occurring in it is returned.
+    A keyword can only occur within a run of the characters keywords are made
+    of, so a text is split into such runs (words, in practice) and results are
+    memoized per run as well as per text: the same column names recur across
+    tables and reprocessing runs, and even unique names are made of words that
+    recur.
+    """
+    def __init__(self, keyword_groups: Dict[str, List[str]], cache_size: int = 4096):
+        self.labels = list(keyword_groups)
+        keyword_labels = {}
+        for label, keywords in keyword_groups.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if keyword:
+                    keyword_labels.setdefault(keyword, set()).add(label)
+        
+        # The scan reports the longest keyword starting at each position, so a
+        # hit on a keyword must also count for every keyword it contains
+        self._labels = {
+            keyword: frozenset().union(*(
+                labels for other, labels in keyword_labels.items() if other in keyword
+            ))
+            for keyword in keyword_labels
+        }
+        
+        # A trie-shaped alternation lets the regex engine reject most positions
+        # on the first character; the lookahead finds overlapping matches
+        trie = self._pattern_source(sorted(keyword_labels))
+        self._pattern = re.compile(f'(?=({trie}))') if trie else None
+        chars = ''.join(sorted({char for keyword in keyword_labels for char in keyword}))
+        self._runs = re.compile(f'[{re.escape(chars)}]+') if chars else None
+        
+        self._cache = {}
+        self._cache_size = cache_size
+    
+    @staticmethod
+    def _pattern_source(keywords: List[str]) -> str:
+        """
+        Build a regular expression matching the longest keyword at a position.
+        """
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        
+        def build(node):
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ''
+            source = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+            # A keyword ending here makes the longer continuations optional
+            return f'(?:{source})?' if '' in node else source
+        
+        return build(trie)
+    
+    def match(self, text: str) -> frozenset:
+        """
+        Return the labels of every keyword group with a keyword in the text.
+        """
+        if self._pattern is None or not isinstance(text, str):
+            return frozenset()
+        
+        hits = self._cache.get(text)
+        if hits is None:
+            hits = frozenset()
+            for run in self._runs.findall(text.lower()):
+                run_hits = self._cache.get(run)
+                if run_hits is None:
+                    run_hits = frozenset().union(*(
+                        self._labels[keyword] for keyword in set(self._pattern.findall(run))
+                    ))
+                    self._remember(run, run_hits)
+                if run_hits:
+                    hits = hits | run_hits
+            self._remember(text, hits)
+        
+        return hits
+    
+    def _remember(self, key: str, hits: frozenset):
+        if len(self._cache) >= self._cache_size:
+            self._cache.clear()
+        self._cache[key] = hits
+
+
+def load_category_keywords() -> Dict[str, Any]:
+    """
+    Load the categorizer keyword tables, applying any configured overrides.
+    """
+    keywords = {
+        'region': list(DEFAULT_CATEGORY_KEYWORDS['region']),
+        'sector': list(DEFAULT_CATEGORY_KEYWORDS['sector']),
+        'indicator_types': dict(DEFAULT_CATEGORY_KEYWORDS['indicator_types']),
+    }
+    
+    from django.conf import settings
+    config = getattr(settings, 'SCRAPER_CONFIG', {}) if settings.configured else {}
+    
+    overrides = []
+    if config.get('categorizer_keywords_file'):
+        with open(config['categorizer_keywords_file']) as f:
+            overrides.append(json.load(f))
+    if config.get('categorizer_keywords'):
+        overrides.append(config['categorizer_keywords'])
+    
+    for override in overrides:
+        for group in ('region', 'sector'):
+            if group in override:
+                keywords[group] = list(override[group])
+        keywords['indicator_types'].update(override.get('indicator_types', {}))
+    
+    return keywords
+
+
+def build_category_matcher(keywords: Optional[Dict[str, Any]] = None) -> KeywordMatcher:
+    """
+    Compile categorizer keyword tables into a KeywordMatcher.
+    """
+    keywords = keywords or load_category_keywords()
+    groups = {
+        'region': keywords.get('region', []),
+        'sector': keywords.get('sector', []),
+    }
+    for indicator_type, type_keywords in keywords.get('indicator_types', {}).items():
+        groups[f"{INDICATOR_TYPE_LABEL}{indicator_type}"] = type_keywords
+    return KeywordMatcher(groups)
+
+
+_category_matcher = None
+
+def get_category_matcher() -> KeywordMatcher:
+    """
+    Get the shared matcher compiled from the configured keyword tables.
+    """
+    global _category_matcher
+    if _category_matcher is None:
+        _category_matcher = build_category_matcher()
+    return _category_matcher
 
 
 class DataCategorizer:
     """
     Categorize the processed data into different indicators and datasets.
     """
-    def __init__(self, processed_data, metadata):
+    def __init__(self, processed_data, metadata, matcher=None):
         self.processed_data = processed_data
         self.metadata = metadata
+        self.matcher = matcher or get_category_matcher()
         self.categorized_data = {}
+        self.column_hits = {}
     
+    @timed_stage('etl_categorize')
     def categorize(self):
         """
         Categorize the data by detecting its type and structure.
@@ -323,31 +769,44 @@ class DataCategorizer:
             'time_series': False,
             'regional_data': False,
             'sector_data': False,
+            'region_dimension': None,
+            'sector_dimension': None,
             'dimensions': [],
             'measures': [],
         }
         
+        categorical_columns = self.metadata.get('categorical_columns', [])
+        dtype_map = self.metadata.get('dtype_map', {})
+        
+        # Match each column name once against all keyword groups
+        self.column_hits = {
+            col: self.matcher.match(col)
+            for col in list(categorical_columns) + list(dtype_map)
+        }
+        
         # Detect time series data
         if 'time_dimension' in self.metadata:
             self.categorized_data['time_series'] = True
             self.categorized_data['dimensions'].append(self.metadata['time_dimension'])
         
         # Detect regional data
-        region_keywords = ['region', 'district', 'state', 'province', 'city', 'town', 'area']
-        for col in self.metadata.get('categorical_columns', []):
-            if any(keyword in col.lower() for keyword in region_keywords):
+        for col in categorical_columns:
+            if 'region' in self.column_hits[col]:
                 self.categorized_data['regional_data'] = True
                 self.categorized_data['dimensions'].append(col)
+                if not self.categorized_data['region_dimension']:
+                    self.categorized_data['region_dimension'] = col
         
         # Detect sector data
-        sector_keywords = ['sector', 'industry', 'category', 'type', 'group']
-        for col in self.metadata.get('categorical_columns', []):
-            if any(keyword in col.lower() for keyword in sector_keywords):
+        for col in categorical_columns:
+            if 'sector' in self.column_hits[col]:
                 self.categorized_data['sector_data'] = True
                 self.categorized_data['dimensions'].append(col)
+                if not self.categorized_data['sector_dimension']:
+                    self.categorized_data['sector_dimension'] = col
         
         # Identify measures (numeric columns)
-        for col, dtype in self.metadata.get('dtype_map', {}).items():
+        for col, dtype in dtype_map.items():
             if dtype == 'numeric' and col not in self.categorized_data['dimensions']:
                 self.categorized_data['measures'].append(col)
         
@@ -360,27 +819,22 @@ class DataCategorizer:
         """
         Determine the most likely indicator type based on column names and data structure.
         """
-        # Create a mapping of keywords to indicator types
-        indicator_type_keywords = {
-            'population': ['population', 'people', 'persons', 'inhabitants', 'demographics', 'citizen'],
-            'economic': ['gdp', 'economy', 'inflation', 'cpi', 'price', 'income', 'economic', 'export', 'import', 'trade'],
-            'education': ['education', 'school', 'literacy', 'student', 'teacher', 'enrollment'],
-            'health': ['health', 'hospital', 'disease', 'mortality', 'vaccination', 'vaccine', 'immunization'],
-            'infrastructure': ['infrastructure', 'road', 'water', 'electricity', 'energy', 'communication'],
-            'agriculture': ['agriculture', 'crop', 'livestock', 'farming', 'land', 'food'],
+        # Count keyword matches for all columns, in keyword table order for tie-breaking
+        type_labels = {
+            label: label[len(INDICATOR_TYPE_LABEL):]
+            for label in self.matcher.labels
+            if label.startswith(INDICATOR_TYPE_LABEL)
         }
+        type_scores = dict.fromkeys(type_labels.values(), 0)
         
-        # Count keyword matches for all columns
-        type_scores = {indicator_type: 0 for indicator_type in indicator_type_keywords.keys()}
-        
-        # Check column names for keywords
         for col in self.metadata.get('dtype_map', {}):
-            for indicator_type, keywords in indicator_type_keywords.items():
-                if any(keyword in col.lower() for keyword in keywords):
+            for label in self.column_hits[col]:
+                indicator_type = type_labels.get(label)
+                if indicator_type is not None:
                     type_scores[indicator_type] += 1
         
         # Get the indicator type with the highest score
-        max_score = max(type_scores.values())
+        max_score = max(type_scores.values(), default=0)
         if max_score > 0:
             # Find all types with the max score
             max_types = [t for t, s in type_scores.items() if s == max_score]
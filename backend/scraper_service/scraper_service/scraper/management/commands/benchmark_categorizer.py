@@ -0,0 +1,125 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from scraper_service.scraper.etl.processors import (
+    DataCategorizer, DEFAULT_CATEGORY_KEYWORDS, build_category_matcher
+)
+
+class Command(BaseCommand):
+    help = 'Benchmark the compiled DataCategorizer keyword matcher against the per-keyword scan it replaced'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--columns',
+            type=int,
+            default=500,
+            help='Number of columns in each synthetic table',
+        )
+        parser.add_argument(
+            '--tables',
+            type=int,
+            default=200,
+            help='Number of synthetic tables to categorize',
+        )
+        parser.add_argument(
+            '--distinct',
+            type=int,
+            default=0,
+            help='Distinct column names shared across tables (0 for every column name unique)',
+        )
+
+    def handle(self, *args, **options):
+        columns = options['columns']
+        tables = options['tables']
+        distinct = options['distinct']
+        random.seed(0)
+
+        words = [
+            keyword
+            for group in ('region', 'sector')
+            for keyword in DEFAULT_CATEGORY_KEYWORDS[group]
+        ] + [
+            keyword
+            for keywords in DEFAULT_CATEGORY_KEYWORDS['indicator_types'].values()
+            for keyword in keywords
+        ] + ['total', 'male', 'female', 'urban', 'rural', 'rate', 'count', 'percent']
+
+        def column_name(i):
+            return f"{' '.join(random.sample(words, 3)).title()} {i}"
+
+        pool = [column_name(i) for i in range(distinct)]
+
+        metadata_list = []
+        for t in range(tables):
+            if pool:
+                names = random.sample(pool, min(columns, len(pool)))
+            else:
+                names = [column_name(t * columns + i) for i in range(columns)]
+            metadata_list.append({
+                'categorical_columns': names[:columns // 4],
+                'dtype_map': {
+                    name: 'text' if i < columns // 4 else 'numeric'
+                    for i, name in enumerate(names)
+                },
+            })
+
+        start = time.perf_counter()
+        legacy_results = [self.legacy_categorize(metadata) for metadata in metadata_list]
+        legacy_time = time.perf_counter() - start
+
+        matcher = build_category_matcher()
+        start = time.perf_counter()
+        results = [DataCategorizer(None, metadata, matcher=matcher).categorize() for metadata in metadata_list]
+        compiled_time = time.perf_counter() - start
+
+        mismatches = sum(1 for a, b in zip(legacy_results, results) if a != b)
+
+        self.stdout.write(f'Tables: {tables}, columns per table: {columns}, distinct column names: {distinct or "all"}')
+        self.stdout.write(f'Per-keyword scan: {legacy_time:.3f}s')
+        self.stdout.write(f'Compiled matcher: {compiled_time:.3f}s ({legacy_time / compiled_time:.1f}x)')
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f'{mismatches} tables categorized differently'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Categorization results identical'))
+
+    def legacy_categorize(self, metadata):
+        """
+        The original nested keyword scan, kept here as the benchmark baseline.
+        """
+        result = {
+            'indicator_type': None,
+            'time_series': False,
+            'regional_data': False,
+            'sector_data': False,
+            'region_dimension': None,
+            'sector_dimension': None,
+            'dimensions': [],
+            'measures': [],
+        }
+
+        for group, flag, dimension in (
+            ('region', 'regional_data', 'region_dimension'),
+            ('sector', 'sector_data', 'sector_dimension'),
+        ):
+            for col in metadata.get('categorical_columns', []):
+                if any(keyword in col.lower() for keyword in DEFAULT_CATEGORY_KEYWORDS[group]):
+                    result[flag] = True
+                    result['dimensions'].append(col)
+                    if not result[dimension]:
+                        result[dimension] = col
+
+        for col, dtype in metadata.get('dtype_map', {}).items():
+            if dtype == 'numeric' and col not in result['dimensions']:
+                result['measures'].append(col)
+
+        type_scores = {t: 0 for t in DEFAULT_CATEGORY_KEYWORDS['indicator_types']}
+        for col in metadata.get('dtype_map', {}):
+            for indicator_type, keywords in DEFAULT_CATEGORY_KEYWORDS['indicator_types'].items():
+                if any(keyword in col.lower() for keyword in keywords):
+                    type_scores[indicator_type] += 1
+
+        max_score = max(type_scores.values())
+        if max_score > 0:
+            result['indicator_type'] = [t for t, s in type_scores.items() if s == max_score][0]
+
+        return result
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from scraper_service.scraper.etl.consumer import purge_processed_messages
+
+class Command(BaseCommand):
+    help = 'Delete processed message IDs older than the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help="Retention in days (default: SCRAPER_CONFIG['etl_processed_message_retention_days'])",
+        )
+
+    def handle(self, *args, **options):
+        deleted = purge_processed_messages(options.get('days'))
+        self.stdout.write(self.style.SUCCESS(f'Purged {deleted} processed message IDs'))
@@ -4,6 +4,8 @@ import pika
 from django.conf import settings
 import uuid
 
+from .metrics import collecting, timed_stage
+
 logger = logging.getLogger(__name__)
 
 def get_rabbitmq_connection():
@@ -42,6 +44,14 @@ def publish_scraped_items(items, batch_size=10):
         logger.warning("No items to publish to message queue")
         return 0
     
+    # Publish timings are recorded against the job the items were scraped in
+    with collecting(items[0].job_id):
+        return _publish_items(items, batch_size)
+
+def _publish_items(items, batch_size):
+    """
+    Publish items over a single connection.
+    """
     config = settings.RABBITMQ_CONFIG
     exchange = config.get('exchange', 'snbs')
     routing_key = config.get('scraper_queue', 'scraped_data')
@@ -109,6 +119,7 @@ def publish_scraped_items(items, batch_size=10):
         if connection and connection.is_open:
             connection.close()
 
+@timed_stage('publish_batch')
 def _publish_batch(channel, exchange, routing_key, batch, items_queryset):
     """
     Publish a batch of messages to RabbitMQ and update the database.
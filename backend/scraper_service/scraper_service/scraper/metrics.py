@@ -0,0 +1,325 @@
+"""
+Pipeline stage timing for scraper jobs.
+
+Stages are timed with the timed() context manager or the timed_stage()
+decorator, and events are counted with increment(), per thread while a job is
+being collected. When the collection ends the durations are merged into
+histograms, and the events into counters, stored on ScraperJob.stage_metrics,
+which the metrics endpoint renders in the Prometheus text format.
+
+With SCRAPER_CONFIG['stage_metrics'] switched off, timed_stage() returns the
+function unchanged and timed() returns a shared no-op context manager.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+ENABLED = getattr(settings, 'SCRAPER_CONFIG', {}).get('stage_metrics', True)
+
+# Histogram bucket upper bounds in seconds; counts have one more slot for +Inf
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_NULL_CONTEXT = nullcontext()
+_local = threading.local()
+
+
+class StageMetrics:
+    """
+    Duration histograms per pipeline stage, and event counters.
+    """
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        # Pipeline worker threads observe into the same collector
+        self._lock = threading.Lock()
+
+    def observe(self, stage, duration):
+        """
+        Record one duration for a stage.
+        """
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = {'counts': [0] * (len(BUCKETS) + 1), 'sum': 0.0, 'count': 0}
+
+            histogram['counts'][bisect_left(BUCKETS, duration)] += 1
+            histogram['sum'] += duration
+            histogram['count'] += 1
+
+    def increment(self, event, amount=1):
+        """
+        Count occurrences of an event.
+        """
+        with self._lock:
+            self.counters[event] = self.counters.get(event, 0) + amount
+
+    def merge_into(self, stored):
+        """
+        Merge the histograms into a stored stage_metrics dict.
+        """
+        stored = dict(stored or {})
+        stages = dict(stored.get('stages', {}))
+
+        # Stored histograms with different bounds cannot be combined
+        if stored.get('buckets') not in (None, list(BUCKETS)):
+            stages = {}
+
+        for stage, histogram in self.stages.items():
+            existing = stages.get(stage)
+            if existing:
+                histogram = {
+                    'counts': [a + b for a, b in zip(existing['counts'], histogram['counts'])],
+                    'sum': existing['sum'] + histogram['sum'],
+                    'count': existing['count'] + histogram['count'],
+                }
+            stages[stage] = histogram
+
+        counters = dict(stored.get('counters', {}))
+        for event, count in self.counters.items():
+            counters[event] = counters.get(event, 0) + count
+
+        stored['buckets'] = list(BUCKETS)
+        stored['stages'] = stages
+        stored['counters'] = counters
+        return stored
+
+
+class _Span:
+    """
+    Context manager timing one stage into a collector.
+    """
+    __slots__ = ('collector', 'stage', 'start')
+
+    def __init__(self, collector, stage):
+        self.collector = collector
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.collector.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+def _current():
+    """
+    The collector of the innermost active collection in this thread.
+    """
+    stack = getattr(_local, 'stack', None)
+    return stack[-1][1] if stack else None
+
+
+def timed(stage):
+    """
+    Time a block as the given stage of the active collection.
+    """
+    if not ENABLED:
+        return _NULL_CONTEXT
+    collector = _current()
+    if collector is None:
+        return _NULL_CONTEXT
+    return _Span(collector, stage)
+
+
+def timed_stage(stage):
+    """
+    Decorator timing every call of a function as the given stage.
+    """
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            collector = _current()
+            if collector is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                collector.observe(stage, time.perf_counter() - start)
+
+        return wrapper
+    return decorator
+
+
+def increment(event, amount=1):
+    """
+    Count an event in the active collection.
+    """
+    if not ENABLED:
+        return
+    collector = _current()
+    if collector is not None:
+        collector.increment(event, amount)
+
+
+def start_collection(job_id):
+    """
+    Start collecting stage timings for a job in this thread.
+    """
+    if not ENABLED or job_id is None:
+        return
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    _local.stack.append((job_id, StageMetrics()))
+
+
+def finish_collection(job_id):
+    """
+    Stop collecting for a job and merge its timings into ScraperJob.stage_metrics.
+
+    Returns:
+        dict: The stored stage metrics, or None if nothing was collected
+    """
+    stack = getattr(_local, 'stack', None)
+    if not ENABLED or not stack or stack[-1][0] != job_id:
+        return None
+
+    _, collector = stack.pop()
+    if not collector.stages and not collector.counters:
+        return None
+
+    try:
+        return save_stage_metrics(job_id, collector)
+    except Exception as e:
+        logger.error(f"Error saving stage metrics for job {job_id}: {str(e)}")
+        return None
+
+
+@contextmanager
+def collecting(job_id):
+    """
+    Collect stage timings for a job for the duration of a block.
+    """
+    start_collection(job_id)
+    try:
+        yield
+    finally:
+        finish_collection(job_id)
+
+
+def current_collection():
+    """
+    The innermost active collection of this thread, for worker threads to join.
+    """
+    stack = getattr(_local, 'stack', None)
+    return stack[-1] if stack else None
+
+
+@contextmanager
+def joined_collection(collection):
+    """
+    Record the stage timings of this thread into another thread's collection.
+
+    The owning thread still saves the collected timings when it finishes.
+    """
+    if collection is None:
+        yield
+        return
+
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    _local.stack.append(collection)
+    try:
+        yield
+    finally:
+        _local.stack.pop()
+
+
+def update_stage_metrics(job_id, update):
+    """
+    Replace the stored metrics of a job by update(stored metrics).
+
+    The scraper run, publisher and ETL consumer all report into the same job,
+    so the row is locked while updating; nothing else writes stage_metrics.
+    """
+    from .models import ScraperJob
+
+    with transaction.atomic():
+        job = ScraperJob.objects.select_for_update().only('id', 'stage_metrics').get(id=job_id)
+        job.stage_metrics = update(job.stage_metrics)
+        job.save(update_fields=['stage_metrics'])
+
+    return job.stage_metrics
+
+
+def save_stage_metrics(job_id, collector):
+    """
+    Merge collected histograms into the stored metrics of a job.
+    """
+    return update_stage_metrics(job_id, collector.merge_into)
+
+
+def render_prometheus(jobs):
+    """
+    Render job stage histograms, event counters and job counts in the
+    Prometheus text format.
+
+    Args:
+        jobs: Iterable of (job_type, status, stage_metrics) tuples
+
+    Returns:
+        str: Exposition text
+    """
+    histograms = {}
+    events = {}
+    job_counts = {}
+
+    for job_type, status, stage_metrics in jobs:
+        job_counts[(job_type, status)] = job_counts.get((job_type, status), 0) + 1
+
+        if not stage_metrics or stage_metrics.get('buckets') != list(BUCKETS):
+            continue
+
+        for event, count in stage_metrics.get('counters', {}).items():
+            events[(event, job_type)] = events.get((event, job_type), 0) + count
+
+        for stage, histogram in stage_metrics.get('stages', {}).items():
+            total = histograms.setdefault((stage, job_type), {
+                'counts': [0] * (len(BUCKETS) + 1), 'sum': 0.0, 'count': 0
+            })
+            total['counts'] = [a + b for a, b in zip(total['counts'], histogram['counts'])]
+            total['sum'] += histogram['sum']
+            total['count'] += histogram['count']
+
+    lines = [
+        '# HELP scraper_stage_duration_seconds Time spent in each scrape, publish and ETL stage.',
+        '# TYPE scraper_stage_duration_seconds histogram',
+    ]
+    for (stage, job_type), histogram in sorted(histograms.items()):
+        labels = f'stage="{stage}",job_type="{job_type}"'
+        cumulative = 0
+        for bound, count in zip(BUCKETS, histogram['counts']):
+            cumulative += count
+            lines.append(f'scraper_stage_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'scraper_stage_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram["count"]}')
+        lines.append(f'scraper_stage_duration_seconds_sum{{{labels}}} {histogram["sum"]:.6f}')
+        lines.append(f'scraper_stage_duration_seconds_count{{{labels}}} {histogram["count"]}')
+
+    lines.extend([
+        '# HELP scraper_events_total Pipeline events such as ETL cache hits and duplicate messages.',
+        '# TYPE scraper_events_total counter',
+    ])
+    for (event, job_type), count in sorted(events.items()):
+        lines.append(f'scraper_events_total{{event="{event}",job_type="{job_type}"}} {count}')
+
+    lines.extend([
+        '# HELP scraper_jobs_total Scraper jobs by type and status.',
+        '# TYPE scraper_jobs_total gauge',
+    ])
+    for (job_type, status), count in sorted(job_counts.items()):
+        lines.append(f'scraper_jobs_total{{job_type="{job_type}",status="{status}"}} {count}')
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,29 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessedChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chunk_index', models.IntegerField()),
+                ('row_offset', models.IntegerField(default=0)),
+                ('row_count', models.IntegerField(default=0)),
+                ('records', models.JSONField(default=list, encoder=DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='processed_chunks', to='scraper.scrapeditem')),
+            ],
+            options={
+                'ordering': ['item', 'chunk_index'],
+                'unique_together': {('item', 'chunk_index')},
+            },
+        ),
+    ]
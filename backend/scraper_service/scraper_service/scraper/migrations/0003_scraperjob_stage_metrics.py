@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0002_processedchunk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scraperjob',
+            name='stage_metrics',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
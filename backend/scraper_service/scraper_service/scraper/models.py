@@ -1,4 +1,6 @@
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from .metrics import timed
 
 class ScraperJob(models.Model):
     """
@@ -38,6 +40,9 @@ class ScraperJob(models.Model):
     # Error details
     error_message = models.TextField(blank=True, null=True)
     
+    # Per-stage duration histograms, see metrics.py
+    stage_metrics = models.JSONField(default=dict, blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -116,8 +121,70 @@ class ScrapedItem(models.Model):
     
     class Meta:
         ordering = ['job', 'created_at']
+    
+    def save(self, *args, **kwargs):
+        with timed('save_item'):
+            super().save(*args, **kwargs)
         
     def __str__(self):
         if self.title:
             return f"{self.item_type} - {self.title}"
         return f"{self.item_type} from {self.source_url}"
+
+class ProcessedChunk(models.Model):
+    """
+    Model to store the processed records of an item in row chunks, outside
+    the item's JSON metadata, so they can be forwarded again.
+    """
+    item = models.ForeignKey(ScrapedItem, on_delete=models.CASCADE, related_name='processed_chunks')
+    chunk_index = models.IntegerField()
+    row_offset = models.IntegerField(default=0)
+    row_count = models.IntegerField(default=0)
+    records = models.JSONField(encoder=DjangoJSONEncoder, default=list)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['item', 'chunk_index']
+        unique_together = ('item', 'chunk_index')
+        
+    def __str__(self):
+        return f"Chunk {self.chunk_index} of item {self.item_id} ({self.row_count} rows)"
+
+class ProcessedResult(models.Model):
+    """
+    Model to cache ETL results by content hash, so identical tables are not
+    processed again.
+    """
+    content_hash = models.CharField(max_length=64)
+    processor_version = models.CharField(max_length=20)
+    
+    processed_metadata = models.JSONField(encoder=DjangoJSONEncoder, default=dict)
+    categories = models.JSONField(default=dict)
+    
+    # Item whose processing produced the result
+    source_item = models.ForeignKey(ScrapedItem, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    hit_count = models.IntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('content_hash', 'processor_version')
+        
+    def __str__(self):
+        return f"Processed result {self.content_hash[:12]} (v{self.processor_version})"
+
+class ProcessedMessage(models.Model):
+    """
+    Model to record successfully processed message IDs, so redelivered
+    messages are skipped.
+    """
+    message_id = models.CharField(max_length=100, unique=True)
+    item = models.ForeignKey(ScrapedItem, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    
+    # Purged after SCRAPER_CONFIG['etl_processed_message_retention_days']
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    def __str__(self):
+        return f"Message {self.message_id}"
@@ -0,0 +1,193 @@
+import logging
+import queue
+import threading
+import time
+from django.conf import settings
+from django.db import connection
+
+from .metrics import current_collection, joined_collection
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class Stage:
+    """
+    A named pipeline stage.
+
+    The handler is called with one input and returns an iterable of outputs
+    for the next stage (a list, a generator, or None for no output).
+    """
+    def __init__(self, name, handler, workers=1, on_error=None):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.on_error = on_error
+
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.emitted = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.started_at = None
+        self.finished_at = None
+        self.running_workers = 0
+
+        # Depth of this stage's input queue, sampled on every put
+        self.max_queue_depth = 0
+        self.queue_depth_total = 0
+        self.queue_samples = 0
+
+    def record_depth(self, depth):
+        """
+        Sample the depth of the stage's input queue.
+        """
+        with self.lock:
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+            self.queue_depth_total += depth
+            self.queue_samples += 1
+
+    def report(self):
+        """
+        Throughput and queue depth summary of the stage.
+        """
+        wall_seconds = (self.finished_at - self.started_at) if self.started_at and self.finished_at else 0.0
+        return {
+            'workers': self.workers,
+            'processed': self.processed,
+            'emitted': self.emitted,
+            'failed': self.failed,
+            'busy_seconds': round(self.busy_seconds, 4),
+            'wall_seconds': round(wall_seconds, 4),
+            'throughput_per_second': round(self.processed / wall_seconds, 2) if wall_seconds else None,
+            'max_queue_depth': self.max_queue_depth,
+            'mean_queue_depth': round(self.queue_depth_total / self.queue_samples, 2) if self.queue_samples else 0,
+        }
+
+
+class StagedPipeline:
+    """
+    Run stages concurrently, connected by bounded queues.
+
+    Every stage gets its own worker threads and an input queue of at most
+    queue_size items, so a slow stage blocks the stages feeding it instead of
+    letting work pile up in memory. Network-bound fetching can overlap with
+    parsing and DB writes.
+
+    A failing input is logged, counted against its stage and handed to the
+    stage's on_error callback; the rest of the run continues.
+    """
+    def __init__(self, stages, queue_size=None):
+        config = getattr(settings, 'SCRAPER_CONFIG', {}).get('pipeline', {})
+        self.stages = stages
+        self.queue_size = queue_size or config.get('queue_size', 16)
+        self.queues = [queue.Queue(maxsize=self.queue_size) for _ in stages]
+
+    @staticmethod
+    def stage_workers(name, default=1):
+        """
+        Worker count for a stage from SCRAPER_CONFIG['pipeline']['workers'].
+        """
+        config = getattr(settings, 'SCRAPER_CONFIG', {}).get('pipeline', {})
+        return config.get('workers', {}).get(name, default)
+
+    def run(self, inputs):
+        """
+        Feed inputs through all stages and wait for the pipeline to drain.
+
+        Returns:
+            dict: Report per stage name
+        """
+        collection = current_collection()
+        threads = []
+
+        for index, stage in enumerate(self.stages):
+            stage.running_workers = stage.workers
+            for worker in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(index, collection),
+                    name=f"pipeline-{stage.name}-{worker}",
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        for item in inputs:
+            self._put(0, item)
+        for _ in range(self.stages[0].workers):
+            self.queues[0].put(_DONE)
+
+        for thread in threads:
+            thread.join()
+
+        return {stage.name: stage.report() for stage in self.stages}
+
+    def _put(self, index, item):
+        """
+        Put an item on a stage's input queue, blocking while it is full.
+        """
+        self.queues[index].put(item)
+        self.stages[index].record_depth(self.queues[index].qsize())
+
+    def _work(self, index, collection):
+        """
+        Worker loop for one stage.
+        """
+        stage = self.stages[index]
+        next_index = index + 1 if index + 1 < len(self.stages) else None
+        input_queue = self.queues[index]
+
+        try:
+            with joined_collection(collection):
+                while True:
+                    item = input_queue.get()
+                    if item is _DONE:
+                        break
+
+                    start = time.perf_counter()
+                    with stage.lock:
+                        if stage.started_at is None:
+                            stage.started_at = start
+
+                    emitted = 0
+                    try:
+                        for output in stage.handler(item) or ():
+                            emitted += 1
+                            if next_index is not None:
+                                self._put(next_index, output)
+                    except Exception as e:
+                        with stage.lock:
+                            stage.failed += 1
+                        if stage.on_error:
+                            # A failing callback must not stop the worker, or the
+                            # stages feeding it would block on a full queue
+                            try:
+                                stage.on_error(item, e)
+                            except Exception as callback_error:
+                                logger.error(
+                                    f"Pipeline stage {stage.name} failed: {str(e)}; "
+                                    f"error callback failed: {str(callback_error)}"
+                                )
+                        else:
+                            logger.error(f"Pipeline stage {stage.name} failed: {str(e)}")
+
+                    end = time.perf_counter()
+                    with stage.lock:
+                        stage.processed += 1
+                        stage.emitted += emitted
+                        stage.busy_seconds += end - start
+                        stage.finished_at = end
+        finally:
+            # Each thread has its own DB connection
+            connection.close()
+
+            # The last worker of a stage closes the next stage's input
+            with stage.lock:
+                stage.running_workers -= 1
+                last_worker = stage.running_workers == 0
+            if last_worker and next_index is not None:
+                for _ in range(self.stages[next_index].workers):
+                    self.queues[next_index].put(_DONE)
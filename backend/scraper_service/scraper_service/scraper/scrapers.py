@@ -1,4 +1,5 @@
 import os
+import threading
 import time
 import logging
 import requests
@@ -9,9 +10,33 @@ import pandas as pd
 from django.conf import settings
 from datetime import datetime
 from .models import ScraperJob, ScrapedItem
+from .metrics import timed, timed_stage, collecting, finish_collection, update_stage_metrics
+from .pipeline import StagedPipeline, Stage
 
 logger = logging.getLogger(__name__)
 
+class RateLimiter:
+    """
+    Space calls of all threads sharing the limiter at least interval seconds apart.
+    """
+    def __init__(self, interval):
+        self.interval = interval or 0
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+    
+    def wait(self):
+        """
+        Block until the calling thread may make its request.
+        """
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_time)
+            self._next_time = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
 class BaseScraper:
     """
     Base scraper class with common functionality for all scrapers.
@@ -24,16 +49,34 @@ class BaseScraper:
         self.request_delay = self.config.get('request_delay')
         self.max_retries = self.config.get('max_retries')
         
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': self.user_agent
-        })
+        # Shared by the fetch workers, so request_delay bounds the request
+        # rate of the whole scraper rather than of each thread
+        self.rate_limiter = RateLimiter(self.request_delay)
+        
+        # Sessions are not thread-safe, so each pipeline worker gets its own
+        self._local = threading.local()
+    
+    @property
+    def session(self):
+        """
+        HTTP session of the current thread.
+        """
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.headers.update({
+                'User-Agent': self.user_agent
+            })
+        return session
     
+    @timed_stage('fetch_page')
     def fetch_page(self, url):
         """
         Fetch a web page with retry mechanism.
         """
         for attempt in range(self.max_retries + 1):
+            # Respect rate limiting
+            self.rate_limiter.wait()
             try:
                 response = self.session.get(url, timeout=self.request_timeout)
                 response.raise_for_status()
@@ -46,10 +89,8 @@ class BaseScraper:
                 else:
                     logger.error(f"Failed to fetch {url} after {self.max_retries} attempts: {str(e)}")
                     raise
-            
-            # Respect rate limiting
-            time.sleep(self.request_delay)
     
+    @timed_stage('parse_html')
     def parse_html(self, content):
         """
         Parse HTML content with BeautifulSoup.
@@ -66,12 +107,25 @@ class BaseScraper:
         """
         Create and log a new scraper job.
         """
-        job = ScraperJob.objects.create(
+        return ScraperJob.objects.create(
             job_type=job_type,
             url=url,
             status=ScraperJob.STATUS_RUNNING
         )
-        return job
+    
+    def log_pipeline_report(self, job, report):
+        """
+        Log per-stage throughput and queue depth of a pipelined run and keep
+        them on the job.
+        """
+        for stage, stats in report.items():
+            logger.info(
+                f"Pipeline stage {stage}: {stats['processed']} processed, {stats['failed']} failed, "
+                f"{stats['throughput_per_second']}/s with {stats['workers']} workers, "
+                f"queue depth max {stats['max_queue_depth']} mean {stats['mean_queue_depth']}"
+            )
+        
+        job.stage_metrics = update_stage_metrics(job.id, lambda stored: {**(stored or {}), 'pipeline': report})
     
     def log_job_complete(self, job, items_found, items_processed, items_failed=0):
         """
@@ -82,7 +136,13 @@ class BaseScraper:
         job.items_found = items_found
         job.items_processed = items_processed
         job.items_failed = items_failed
-        job.save()
+        # stage_metrics is only written through update_stage_metrics, as the
+        # ETL consumer merges into it while the job runs
+        job.save(update_fields=['status', 'end_time', 'items_found', 'items_processed', 'items_failed', 'updated_at'])
+        
+        # Ends the run's collection early, to keep the saved timings on the
+        # job; collecting() in run() only ends it if the run raised first
+        job.stage_metrics = finish_collection(job.id) or job.stage_metrics
         
         logger.info(f"Job completed: {job}. Found: {items_found}, Processed: {items_processed}, Failed: {items_failed}")
         return job
@@ -94,7 +154,9 @@ class BaseScraper:
         job.status = ScraperJob.STATUS_FAILED
         job.end_time = datetime.now()
         job.error_message = error_message
-        job.save()
+        job.save(update_fields=['status', 'end_time', 'error_message', 'updated_at'])
+        
+        job.stage_metrics = finish_collection(job.id) or job.stage_metrics
         
         logger.error(f"Job failed: {job}. Error: {error_message}")
         return job
@@ -116,50 +178,51 @@ class StatisticsScraper(BaseScraper):
         # Create job record
         job = self.log_job_start(ScraperJob.TYPE_STATISTICS, statistics_url)
         
-        try:
-            # Start by fetching the main statistics page
-            response = self.fetch_page(statistics_url)
-            soup = self.parse_html(response.text)
-            
-            # Find links to statistics pages (this will be specific to the SNBS website structure)
-            # For this example, we'll look for links in the main content area
-            stat_links = []
-            content_area = soup.find('div', class_='main-content')  # Adjust selector based on actual site structure
-            
-            if content_area:
-                links = content_area.find_all('a', href=True)
-                for link in links:
-                    href = link.get('href')
-                    # Filter for statistics pages (adjust the condition based on actual link patterns)
-                    if 'statistics' in href.lower() or 'stats' in href.lower():
-                        stat_links.append(self.get_absolute_url(href))
-            
-            # Record how many statistics pages we found
-            items_found = len(stat_links)
-            items_processed = 0
-            items_failed = 0
-            
-            # Process each statistics page
-            for link in stat_links:
-                try:
-                    self.process_statistics_page(job, link)
-                    items_processed += 1
-                except Exception as e:
-                    logger.error(f"Error processing statistics page {link}: {str(e)}")
-                    items_failed += 1
-                    continue
-            
-            # Log job completion
-            self.log_job_complete(job, items_found, items_processed, items_failed)
-            
-            return job
-            
-        except Exception as e:
-            # Log job failure
-            self.log_job_failed(job, str(e))
-            logger.exception(f"Error running statistics scraper: {str(e)}")
-            return job
-    
+        with collecting(job.id):
+            try:
+                # Start by fetching the main statistics page
+                response = self.fetch_page(statistics_url)
+                soup = self.parse_html(response.text)
+                
+                # Find links to statistics pages (this will be specific to the SNBS website structure)
+                # For this example, we'll look for links in the main content area
+                stat_links = []
+                content_area = soup.find('div', class_='main-content')  # Adjust selector based on actual site structure
+                
+                if content_area:
+                    links = content_area.find_all('a', href=True)
+                    for link in links:
+                        href = link.get('href')
+                        # Filter for statistics pages (adjust the condition based on actual link patterns)
+                        if 'statistics' in href.lower() or 'stats' in href.lower():
+                            stat_links.append(self.get_absolute_url(href))
+                
+                # Record how many statistics pages we found
+                items_found = len(stat_links)
+                items_processed = 0
+                items_failed = 0
+                
+                # Process each statistics page
+                for link in stat_links:
+                    try:
+                        self.process_statistics_page(job, link)
+                        items_processed += 1
+                    except Exception as e:
+                        logger.error(f"Error processing statistics page {link}: {str(e)}")
+                        items_failed += 1
+                        continue
+                
+                # Log job completion
+                self.log_job_complete(job, items_found, items_processed, items_failed)
+                
+                return job
+                
+            except Exception as e:
+                # Log job failure
+                self.log_job_failed(job, str(e))
+                logger.exception(f"Error running statistics scraper: {str(e)}")
+                return job
+        
     def process_statistics_page(self, job, url):
         """
         Process a single statistics page and extract HTML tables.
@@ -174,7 +237,8 @@ class StatisticsScraper(BaseScraper):
         for i, table in enumerate(tables):
             try:
                 # Convert HTML table to pandas DataFrame
-                df = pd.read_html(str(table))[0]
+                with timed('extract_table'):
+                    df = pd.read_html(str(table))[0]
                 
                 # Extract table title
                 title = None
@@ -236,110 +300,124 @@ class PublicationsScraper(BaseScraper):
         # Create job record
         job = self.log_job_start(ScraperJob.TYPE_PUBLICATIONS, publications_url)
         
-        try:
-            # Start by fetching the main publications page
-            response = self.fetch_page(publications_url)
-            soup = self.parse_html(response.text)
-            
-            # Find links to PDF files (this will be specific to the SNBS website structure)
-            pdf_links = []
-            content_area = soup.find('div', class_='publications')  # Adjust selector based on actual site structure
-            
-            if content_area:
-                links = content_area.find_all('a', href=True)
-                for link in links:
-                    href = link.get('href')
-                    # Filter for PDF links
-                    if href.lower().endswith('.pdf'):
-                        pdf_links.append(self.get_absolute_url(href))
-            
-            # Record how many PDFs we found
-            items_found = len(pdf_links)
-            items_processed = 0
-            items_failed = 0
-            
-            # Process each PDF file
-            for link in pdf_links:
-                try:
-                    self.process_pdf(job, link)
-                    items_processed += 1
-                except Exception as e:
-                    logger.error(f"Error processing PDF {link}: {str(e)}")
-                    items_failed += 1
-                    continue
-            
-            # Log job completion
-            self.log_job_complete(job, items_found, items_processed, items_failed)
-            
-            return job
-            
-        except Exception as e:
-            # Log job failure
-            self.log_job_failed(job, str(e))
-            logger.exception(f"Error running publications scraper: {str(e)}")
-            return job
-    
-    def process_pdf(self, job, url):
+        with collecting(job.id):
+            try:
+                # Start by fetching the main publications page
+                response = self.fetch_page(publications_url)
+                soup = self.parse_html(response.text)
+                
+                # Find links to PDF files (this will be specific to the SNBS website structure)
+                pdf_links = []
+                content_area = soup.find('div', class_='publications')  # Adjust selector based on actual site structure
+                
+                if content_area:
+                    links = content_area.find_all('a', href=True)
+                    for link in links:
+                        href = link.get('href')
+                        # Filter for PDF links
+                        if href.lower().endswith('.pdf'):
+                            pdf_links.append(self.get_absolute_url(href))
+                
+                # Record how many PDFs we found
+                items_found = len(pdf_links)
+                
+                # Download, extract and save PDFs as concurrent stages connected
+                # by bounded queues
+                def log_pdf_error(item, e):
+                    url = item if isinstance(item, str) else item[0]
+                    logger.error(f"Error processing PDF {url}: {str(e)}")
+                
+                def log_table_error(item, e):
+                    logger.error(f"Error processing table {item[1]} from PDF {item[0]}: {str(e)}")
+                
+                pipeline = StagedPipeline([
+                    Stage('fetch', lambda url: [(url, self.fetch_page(url).content)],
+                          StagedPipeline.stage_workers('fetch', 3), on_error=log_pdf_error),
+                    Stage('extract', self.extract_pdf_tables,
+                          StagedPipeline.stage_workers('extract', 2), on_error=log_pdf_error),
+                    Stage('persist', lambda table: self.save_pdf_table(job, *table),
+                          StagedPipeline.stage_workers('persist'), on_error=log_table_error),
+                ])
+                report = pipeline.run(pdf_links)
+                self.log_pipeline_report(job, report)
+                
+                # A PDF counts as processed once its tables have been extracted
+                items_processed = report['extract']['processed'] - report['extract']['failed']
+                items_failed = report['fetch']['failed'] + report['extract']['failed']
+                
+                # Log job completion
+                self.log_job_complete(job, items_found, items_processed, items_failed)
+                
+                return job
+                
+            except Exception as e:
+                # Log job failure
+                self.log_job_failed(job, str(e))
+                logger.exception(f"Error running publications scraper: {str(e)}")
+                return job
+        
+    def extract_pdf_tables(self, pdf):
         """
-        Download and process a PDF document to extract tables.
+        Extract tables from a downloaded PDF document.
+        
+        Returns:
+            list: (url, index, DataFrame) for each non-empty table
         """
-        # Download the PDF file
-        response = self.fetch_page(url)
+        url, content = pdf
         
         # Create a temporary file to save the PDF
         import tempfile
         with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
-            temp_file.write(response.content)
+            temp_file.write(content)
             pdf_path = temp_file.name
         
         try:
-            # Determine PDF filename for title
-            pdf_filename = os.path.basename(url)
-            
             # Read tables from PDF using tabula-py
             # This will extract all tables from the PDF into a list of DataFrames
-            tables = tabula.read_pdf(
-                pdf_path, 
-                pages='all', 
-                multiple_tables=True,
-                guess=True,
-                max_pages=self.pdf_max_pages
-            )
-            
-            # Process each table
-            for i, df in enumerate(tables):
-                if i >= self.pdf_max_pages * self.pdf_tables_per_page:
-                    # Limit the number of tables we extract to avoid excessive resource usage
-                    break
-                
-                if not df.empty:
-                    try:
-                        # Calculate page number (approximate)
-                        page_number = (i // self.pdf_tables_per_page) + 1
-                        table_number = (i % self.pdf_tables_per_page) + 1
-                        
-                        # Convert DataFrame to JSON
-                        table_json = df.to_json(orient='table')
-                        
-                        # Create ScrapedItem record
-                        ScrapedItem.objects.create(
-                            job=job,
-                            item_type=ScrapedItem.TYPE_PDF_TABLE,
-                            source_url=url,
-                            page_number=page_number,
-                            table_number=table_number,
-                            title=f"Table {table_number} from page {page_number} of {pdf_filename}",
-                            content=table_json,
-                            metadata={
-                                'columns': list(df.columns),
-                                'shape': df.shape,
-                                'pdf_name': pdf_filename
-                            }
-                        )
-                    except Exception as e:
-                        logger.error(f"Error processing table {i} from PDF {url}: {str(e)}")
-            
+            with timed('extract_table'):
+                tables = tabula.read_pdf(
+                    pdf_path, 
+                    pages='all', 
+                    multiple_tables=True,
+                    guess=True,
+                    max_pages=self.pdf_max_pages
+                )
         finally:
             # Clean up the temporary file
             if os.path.exists(pdf_path):
                 os.remove(pdf_path)
+        
+        # Limit the number of tables we extract to avoid excessive resource usage
+        tables = tables[:self.pdf_max_pages * self.pdf_tables_per_page]
+        return [(url, i, df) for i, df in enumerate(tables) if not df.empty]
+    
+    def save_pdf_table(self, job, url, i, df):
+        """
+        Save a table extracted from a PDF as a ScrapedItem.
+        """
+        # Determine PDF filename for title
+        pdf_filename = os.path.basename(url)
+        
+        # Calculate page number (approximate)
+        page_number = (i // self.pdf_tables_per_page) + 1
+        table_number = (i % self.pdf_tables_per_page) + 1
+        
+        # Convert DataFrame to JSON
+        table_json = df.to_json(orient='table')
+        
+        # Create ScrapedItem record
+        item = ScrapedItem.objects.create(
+            job=job,
+            item_type=ScrapedItem.TYPE_PDF_TABLE,
+            source_url=url,
+            page_number=page_number,
+            table_number=table_number,
+            title=f"Table {table_number} from page {page_number} of {pdf_filename}",
+            content=table_json,
+            metadata={
+                'columns': list(df.columns),
+                'shape': df.shape,
+                'pdf_name': pdf_filename
+            }
+        )
+        return [item.id]
@@ -13,7 +13,7 @@ class ScraperJobSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'job_type', 'url', 'status', 'start_time', 'end_time',
             'items_found', 'items_processed', 'items_failed', 'error_message',
-            'created_at', 'updated_at', 'duration', 'success_rate'
+            'created_at', 'updated_at', 'duration', 'success_rate', 'stage_metrics'
         ]
     
     def get_duration(self, obj):
@@ -6,7 +6,10 @@ from datetime import datetime
 from bs4 import BeautifulSoup
 from .scrapers import BaseScraper
 from .models import ScraperJob, ScrapedItem
+from .metrics import timed, collecting
+from .pipeline import StagedPipeline, Stage
 import requests
+import threading
 import time
 
 logger = logging.getLogger(__name__)
@@ -39,42 +42,65 @@ class SomaliaStatsScraper(BaseScraper):
         # Create job record
         job = self.log_job_start(ScraperJob.TYPE_STATISTICS, self.base_url)
         
-        try:
-            # First, scrape the homepage for key statistics
-            self.scrape_homepage_stats(job)
-            
-            # Track overall statistics
-            total_found = 0
-            total_processed = 0
-            total_failed = 0
-            
-            # Process each statistics category
-            for category, path in self.paths.items():
-                url = self.get_absolute_url(path)
-                if self.stdout:
-                    self.stdout.write(f"Scraping {category} data from {url}")
-                else:
-                    logger.info(f"Scraping {category} data from {url}")
+        with collecting(job.id):
+            try:
+                # First, scrape the homepage for key statistics
+                self.scrape_homepage_stats(job)
                 
-                try:
-                    items_found, items_processed, items_failed = self.process_category(job, category, url)
-                    total_found += items_found
-                    total_processed += items_processed
-                    total_failed += items_failed
-                except Exception as e:
-                    logger.error(f"Error processing category {category}: {str(e)}")
-                    total_failed += 1
-            
-            # Log job completion
-            self.log_job_complete(job, total_found, total_processed, total_failed)
-            return job
-            
-        except Exception as e:
-            # Log job failure
-            self.log_job_failed(job, str(e))
-            logger.exception(f"Error running Somalia statistics scraper: {str(e)}")
-            return job
-    
+                # Fetch, parse, extract and persist the category pages as
+                # concurrent stages connected by bounded queues
+                tally = {'found': 0, 'failed': 0}
+                tally_lock = threading.Lock()
+                
+                def fetch(task):
+                    category, url = task
+                    if self.stdout:
+                        self.stdout.write(f"Scraping {category} data from {url}")
+                    else:
+                        logger.info(f"Scraping {category} data from {url}")
+                    return [(category, url, self.fetch_page(url).text)]
+                
+                def parse(page):
+                    items_found, items_failed, units = self.parse_category(*page)
+                    with tally_lock:
+                        tally['found'] += items_found
+                        tally['failed'] += items_failed
+                    return units
+                
+                def log_page_error(item, e):
+                    logger.error(f"Error processing category {item[0]} at {item[1]}: {str(e)}")
+                
+                def log_unit_error(unit, e):
+                    logger.error(f"Error processing {unit.get('category')} item {unit.get('title')} from {unit.get('url')}: {str(e)}")
+                
+                pipeline = StagedPipeline([
+                    Stage('fetch', fetch, StagedPipeline.stage_workers('fetch', 3), on_error=log_page_error),
+                    Stage('parse', parse, StagedPipeline.stage_workers('parse'), on_error=log_page_error),
+                    Stage('extract', self.extract_unit, StagedPipeline.stage_workers('extract', 2), on_error=log_unit_error),
+                    Stage('persist', lambda unit: self.persist_unit(job, unit), StagedPipeline.stage_workers('persist'), on_error=log_unit_error),
+                ])
+                report = pipeline.run(
+                    (category, self.get_absolute_url(path)) for category, path in self.paths.items()
+                )
+                self.log_pipeline_report(job, report)
+                
+                # A page that could not be fetched or parsed counts as one failed item
+                pages_failed = report['fetch']['failed'] + report['parse']['failed']
+                total_found = tally['found'] + pages_failed
+                total_processed = report['persist']['processed'] - report['persist']['failed']
+                total_failed = (tally['failed'] + pages_failed +
+                                report['extract']['failed'] + report['persist']['failed'])
+                
+                # Log job completion
+                self.log_job_complete(job, total_found, total_processed, total_failed)
+                return job
+                
+            except Exception as e:
+                # Log job failure
+                self.log_job_failed(job, str(e))
+                logger.exception(f"Error running Somalia statistics scraper: {str(e)}")
+                return job
+        
     def scrape_homepage_stats(self, job):
         """
         Scrape key statistics from the homepage.
@@ -136,135 +162,135 @@ class SomaliaStatsScraper(BaseScraper):
         except Exception as e:
             logger.error(f"Error scraping homepage statistics: {str(e)}")
     
-    def process_category(self, job, category, url):
+    def parse_category(self, category, url, html):
         """
-        Process a specific category of statistics by scraping the actual website.
+        Parse a category page into units of work for the extract stage.
+        
+        Returns:
+            tuple: (items_found, items_failed, units)
         """
-        try:
-            response = self.fetch_page(url)
-            soup = self.parse_html(response.text)
-            
-            # Extract tables or structured data
-            tables = soup.find_all('table')
-            items_found = len(tables)
-            items_processed = 0
-            items_failed = 0
-            
-            # If no tables found, look for other structured data
-            if not tables:
-                # Try to find data in other formats (lists, paragraphs with numbers, etc.)
-                data_dict = self.extract_structured_data(soup, category, url)
-                if data_dict:
-                    items_found = len(data_dict)
-                    for title, data in data_dict.items():
-                        try:
-                            # Convert to DataFrame if not already
-                            if not isinstance(data, pd.DataFrame):
-                                df = pd.DataFrame(data)
-                            else:
-                                df = data
-                                
-                            # Extract time period
-                            time_period = self.extract_time_period(soup) or datetime.now().strftime("%Y")
-                            
-                            # Create ScrapedItem record
-                            ScrapedItem.objects.create(
-                                job=job,
-                                item_type=ScrapedItem.TYPE_HTML_TABLE,
-                                source_url=url,
-                                title=f"{category.title()} - {title}",
-                                content=df.to_json(orient='table'),
-                                metadata={
-                                    'category': category,
-                                    'columns': list(df.columns),
-                                    'shape': df.shape,
-                                    'time_period': time_period
-                                }
-                            )
-                            
-                            items_processed += 1
-                            
-                        except Exception as e:
-                            logger.error(f"Error processing {category} data {title} from {url}: {str(e)}")
-                            items_failed += 1
-                else:
-                    # If still no data, create a message item
-                    logger.warning(f"No data found for {category} at {url}")
-                    items_found = 1
-                    items_failed = 1
+        soup = self.parse_html(html)
+        
+        # Extract tables or structured data
+        tables = soup.find_all('table')
+        items_found = len(tables)
+        items_failed = 0
+        units = []
+        
+        time_period = self.extract_time_period(soup)
+        
+        # If no tables found, look for other structured data
+        if not tables:
+            # Try to find data in other formats (lists, paragraphs with numbers, etc.)
+            data_dict = self.extract_structured_data(soup, category, url)
+            if data_dict:
+                items_found = len(data_dict)
+                for title, data in data_dict.items():
+                    units.append({
+                        'kind': 'data',
+                        'category': category,
+                        'url': url,
+                        'title': f"{category.title()} - {title}",
+                        'data': data,
+                        'time_period': time_period or datetime.now().strftime("%Y")
+                    })
             else:
-                # Process tables found in the HTML
-                for i, table in enumerate(tables):
-                    try:
-                        # Convert HTML table to pandas DataFrame
-                        try:
-                            df = pd.read_html(str(table))[0]
-                        except:
-                            # Sometimes simple read_html fails, try a more robust method
-                            df = self.html_table_to_df(table)
-                            
-                        # If table is empty or invalid, skip it
-                        if df.empty or len(df.columns) <= 1:
-                            continue
-                            
-                        # Extract title for the table
-                        title = self.extract_table_title(table, i, category)
-                        
-                        # Extract time period
-                        time_period = self.extract_time_period(soup) or self.extract_time_period_from_df(df)
-                        
-                        # Create ScrapedItem record
-                        ScrapedItem.objects.create(
-                            job=job,
-                            item_type=ScrapedItem.TYPE_HTML_TABLE,
-                            source_url=url,
-                            title=title,
-                            content=df.to_json(orient='table'),
-                            metadata={
-                                'category': category,
-                                'columns': list(df.columns),
-                                'shape': df.shape,
-                                'time_period': time_period
-                            }
-                        )
-                        
-                        items_processed += 1
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing {category} table {i} from {url}: {str(e)}")
-                        items_failed += 1
+                # If still no data, count the page as failed
+                logger.warning(f"No data found for {category} at {url}")
+                items_found = 1
+                items_failed = 1
+        else:
+            # Tables are passed on as HTML so the soup stays in this stage
+            for i, table in enumerate(tables):
+                units.append({
+                    'kind': 'table',
+                    'category': category,
+                    'url': url,
+                    'index': i,
+                    'html': str(table),
+                    'title': self.extract_table_title(table, i, category),
+                    'time_period': time_period
+                })
+        
+        # If this is a publication category, try to extract PDF links
+        if category == 'publications':
+            # Look for publications or documents
+            pdf_links = self.extract_pdf_links(soup, url)
+            if pdf_links:
+                items_found += len(pdf_links)
+                for link_title, link_url in pdf_links.items():
+                    units.append({
+                        'kind': 'link',
+                        'category': category,
+                        'url': link_url,
+                        'title': link_title
+                    })
+        
+        return items_found, items_failed, units
+    
+    def extract_unit(self, unit):
+        """
+        Convert a unit of work into a DataFrame ready to be saved.
+        """
+        if unit['kind'] == 'data':
+            # Convert to DataFrame if not already
+            data = unit.pop('data')
+            unit['df'] = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
             
-            # If this is a publication category, try to extract PDF links
-            if category == 'publications':
-                # Look for publications or documents
-                pdf_links = self.extract_pdf_links(soup, url)
-                if pdf_links:
-                    items_found += len(pdf_links)
-                    for link_title, link_url in pdf_links.items():
-                        try:
-                            # Save publication link as a scraped item
-                            ScrapedItem.objects.create(
-                                job=job,
-                                item_type=ScrapedItem.TYPE_PDF_TEXT,
-                                source_url=link_url,
-                                title=f"Publication - {link_title}",
-                                content=json.dumps({"url": link_url, "title": link_title}),
-                                metadata={
-                                    'category': 'publications',
-                                    'type': 'pdf_link',
-                                    'time_period': datetime.now().strftime("%Y")
-                                }
-                            )
-                            items_processed += 1
-                        except Exception as e:
-                            logger.error(f"Error processing publication link {link_url}: {str(e)}")
-                            items_failed += 1
-                
-            return items_found, items_processed, items_failed
+        elif unit['kind'] == 'table':
+            # Convert HTML table to pandas DataFrame
+            with timed('extract_table'):
+                try:
+                    df = pd.read_html(unit['html'])[0]
+                except:
+                    # Sometimes simple read_html fails, try a more robust method
+                    df = self.html_table_to_df(BeautifulSoup(unit['html'], 'html.parser').find('table'))
             
-        except Exception as e:
-            logger.error(f"Error in process_category for {category} at {url}: {str(e)}")
-            return 1, 0, 1
+            # If table is empty or invalid, skip it
+            if df.empty or len(df.columns) <= 1:
+                return []
+            
+            del unit['html']
+            unit['df'] = df
+            unit['time_period'] = unit['time_period'] or self.extract_time_period_from_df(df)
+        
+        return [unit]
+    
+    def persist_unit(self, job, unit):
+        """
+        Save a unit of work as a ScrapedItem.
+        """
+        if unit['kind'] == 'link':
+            # Save publication link as a scraped item
+            item = ScrapedItem.objects.create(
+                job=job,
+                item_type=ScrapedItem.TYPE_PDF_TEXT,
+                source_url=unit['url'],
+                title=f"Publication - {unit['title']}",
+                content=json.dumps({"url": unit['url'], "title": unit['title']}),
+                metadata={
+                    'category': 'publications',
+                    'type': 'pdf_link',
+                    'time_period': datetime.now().strftime("%Y")
+                }
+            )
+        else:
+            df = unit['df']
+            item = ScrapedItem.objects.create(
+                job=job,
+                item_type=ScrapedItem.TYPE_HTML_TABLE,
+                source_url=unit['url'],
+                title=unit['title'],
+                content=df.to_json(orient='table'),
+                metadata={
+                    'category': unit['category'],
+                    'columns': list(df.columns),
+                    'shape': df.shape,
+                    'time_period': unit['time_period']
+                }
+            )
+        
+        return [item.id]
     
     def extract_table_title(self, table, index, category):
         """Extract title for a table."""
@@ -9,6 +9,7 @@ router.register(r'scraped-items', views.ScrapedItemViewSet, basename='scrapedite
 urlpatterns = [
     path('', include(router.urls)),
     path('latest-statistics/', views.latest_statistics, name='latest-statistics'),
+    path('metrics/', views.stage_metrics, name='stage-metrics'),
     
     # Real-time scraping endpoints
     path('realtime/trigger/', views.trigger_realtime_scrape, name='trigger-realtime-scrape'),
@@ -7,7 +7,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 import logging
 import threading
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.cache import cache_page
 from django.views.decorators.csrf import csrf_exempt
@@ -17,6 +17,8 @@ import json
 import pandas as pd
 from datetime import datetime, timedelta
 
+from core.renderers import dataframe_records
+
 from .models import ScraperJob, ScrapedItem
 from .serializers import (
     ScraperJobSerializer,
@@ -26,6 +28,7 @@ from .serializers import (
 from .scrapers import StatisticsScraper, PublicationsScraper
 from .message_queue import publish_scraped_items
 from .realtime import real_time_manager
+from .metrics import render_prometheus
 
 logger = logging.getLogger(__name__)
 
@@ -123,9 +126,6 @@ class ScrapedItemViewSet(viewsets.ReadOnlyModelViewSet):
             category = metadata.get('category', '')
             time_period = metadata.get('time_period', '')
             
-            # Convert DataFrame to JSON
-            data = df.to_dict(orient='records')
-            
             # Get column information
             columns = []
             for col in df.columns:
@@ -142,7 +142,7 @@ class ScrapedItemViewSet(viewsets.ReadOnlyModelViewSet):
                 'category': category,
                 'time_period': time_period,
                 'columns': columns,
-                'data': data,
+                'data': dataframe_records(df),
                 'last_updated': item.updated_at.isoformat() if item.updated_at else None
             })
             
@@ -257,6 +257,35 @@ def latest_statistics(request):
         }, status=500)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def stage_metrics(request):
+    """
+    Expose per-stage scraper timings in the Prometheus text format.
+    
+    Requires the same authentication as the job endpoints; Prometheus sends
+    the token as a bearer token.
+    
+    Query parameters:
+    - job: Only report the given job ID
+    """
+    jobs = ScraperJob.objects.all()
+    if request.query_params.get('job'):
+        try:
+            job_id = int(request.query_params['job'])
+        except ValueError:
+            return Response({
+                'status': 'error',
+                'message': 'job must be a job ID'
+            }, status=400)
+        jobs = jobs.filter(id=job_id)
+    
+    body = render_prometheus(
+        jobs.order_by().values_list('job_type', 'status', 'stage_metrics').iterator()
+    )
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])  # Allow anyone to trigger a scrape
 def trigger_realtime_scrape(request):
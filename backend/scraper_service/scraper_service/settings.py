@@ -26,10 +26,17 @@ INSTALLED_APPS += [
 ROOT_URLCONF = 'scraper_service.urls'
 WSGI_APPLICATION = 'scraper_service.wsgi.application'
 
+# Large responses served pre-compressed (see core/middleware.py)
+RESPONSE_COMPRESSION['paths'] = [
+    '/api/realtime/data/',
+]
+
 # Crontab settings (schedule tasks)
 CRONJOBS = [
     # Run the Somalia scraper every 20 minutes
     ('*/20 * * * *', 'django.core.management.call_command', ['run_somalia_scraper_test']),
+    # Purge expired processed message IDs daily
+    ('0 3 * * *', 'django.core.management.call_command', ['purge_processed_messages']),
 ]
 
 # Scraper settings
@@ -57,18 +64,47 @@ SCRAPER_CONFIG = {
     # Real-time scraping settings
     'real_time_categories': ['demographics', 'economy', 'inflation'],  # Categories to prioritize for real-time updates
     'enable_websocket_updates': True,  # Enable WebSocket notifications for new data
+    
+    # Tables with more rows than the threshold are processed in row chunks
+    'etl_stream_threshold': 20000,
+    'etl_chunk_size': 5000,
+    
+    # Log ETL result cache hit rates every N messages
+    'etl_stats_log_interval': 100,
+    
+    # Days processed message IDs are kept to skip redeliveries
+    'etl_processed_message_retention_days': 7,
+    
+    # Staged fetch/parse/extract/persist pipeline inside a scraper run
+    'pipeline': {
+        'queue_size': 16,  # Bounded queue length between stages
+        'workers': {
+            'fetch': 3,
+            'parse': 1,
+            'extract': 2,
+            'persist': 1,
+        },
+    },
+    
+    # Per-stage timing of scrape, publish and ETL runs (see scraper/metrics.py)
+    'stage_metrics': os.getenv('SCRAPER_STAGE_METRICS', 'true').lower() == 'true',
+    
+    # DataCategorizer keyword overrides, merged over the defaults in etl/processors.py
+    'categorizer_keywords': {},
+    'categorizer_keywords_file': os.getenv('ETL_CATEGORIZER_KEYWORDS_FILE'),
 }
 
-# RabbitMQ settings for message publishing
-RABBITMQ = {
+# RabbitMQ settings for message publishing and the ETL consumer
+RABBITMQ_CONFIG = {
     'host': os.environ.get('RABBITMQ_HOST', 'rabbitmq'),
     'port': int(os.environ.get('RABBITMQ_PORT', '5672')),
-    'user': os.environ.get('RABBITMQ_USER', 'guest'),
+    'virtual_host': os.environ.get('RABBITMQ_VHOST', '/'),
+    'username': os.environ.get('RABBITMQ_USER', 'guest'),
     'password': os.environ.get('RABBITMQ_PASSWORD', 'guest'),
-    'vhost': os.environ.get('RABBITMQ_VHOST', '/'),
     'exchange': 'snbs_data_exchange',
     'statistics_queue': 'statistics_data',
     'publications_queue': 'publications_data',
+    'indicator_queue': 'indicator_values',  # Processed records for the API service loader
 }
 
 # Schedule settings for different scraper types